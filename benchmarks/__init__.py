@@ -0,0 +1,6 @@
+"""
+Benchmarks of the parsers of the bundled grammars
+
+Run `python -m benchmarks` from the root of the repository to benchmark the current revision (see benchmarks.suite),
+and `python -m benchmarks.compare` to compare the results of two revisions.
+"""
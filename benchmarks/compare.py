@@ -0,0 +1,75 @@
+"""
+Compare the results of the benchmarks of two revisions (see benchmarks.suite)
+
+For each grammar, shape and size benchmarked in both results, the throughputs and peak memories are compared: a
+throughput falling or a peak memory growing by more than the allowed ratio is reported as a regression, which makes the
+comparison fail.
+
+usage: python -m benchmarks.compare [--threshold X] OLD_FILE NEW_FILE
+"""
+
+import argparse
+import json
+import sys
+from typing import List
+
+
+def compare(old: dict, new: dict, threshold: float) -> List[dict]:
+    """
+    Compare the results of two runs of the benchmarks
+
+    :param old:                 the results of the reference run, as written by benchmarks.suite
+    :param new:                 the results of the run to compare with the reference
+    :param threshold:           the relative change of a measure above which it is a regression
+    :return:                    the comparison of each result found in both runs
+    """
+    old_results = {(result["grammar"], result["shape"], result["size"]): result for result in old["results"]}
+    comparisons = []
+    for result in new["results"]:
+        old_result = old_results.get((result["grammar"], result["shape"], result["size"]))
+        if old_result is None:
+            continue
+        speedup = result["chars_per_second"] / old_result["chars_per_second"]
+        memory_ratio = result["peak_memory"] / old_result["peak_memory"] if old_result["peak_memory"] else 1.0
+        comparisons.append({
+            "grammar": result["grammar"],
+            "shape": result["shape"],
+            "size": result["size"],
+            "speedup": speedup,
+            "memory_ratio": memory_ratio,
+            "regression": speedup < 1 - threshold or memory_ratio > 1 + threshold,
+        })
+    return comparisons
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.compare",
+                                 description="compare the results of the benchmarks of two revisions")
+    ap.add_argument("old_file", type=str, help="the results of the reference revision")
+    ap.add_argument("new_file", type=str, help="the results of the revision to compare with the reference")
+    ap.add_argument("--threshold", type=float, default=0.1,
+                    help="the relative change of the throughput or peak memory reported as a regression")
+    args = ap.parse_args()
+
+    with open(args.old_file) as f:
+        old = json.load(f)
+    with open(args.new_file) as f:
+        new = json.load(f)
+    print(f"comparing {new.get('revision') or args.new_file} with {old.get('revision') or args.old_file}")
+    for option in ("interpret", "use_exceptions", "python"):
+        if old.get(option) != new.get(option):
+            print(f"warning: the runs differ in {option} ({old.get(option)} and {new.get(option)})", file=sys.stderr)
+    print(f"{'grammar':<8} {'shape':>6} {'size':>6} {'speedup':>8} {'memory':>8}")
+    comparisons = compare(old, new, args.threshold)
+    for comparison in comparisons:
+        print(f"{comparison['grammar']:<8} {comparison['shape']:>6} {comparison['size']:>6} "
+              f"{comparison['speedup']:>7.2f}x {comparison['memory_ratio']:>7.2f}x"
+              f"{'  REGRESSION' if comparison['regression'] else ''}")
+    regressions = sum(comparison["regression"] for comparison in comparisons)
+    if regressions:
+        print(f"error: {regressions} regressions above {args.threshold:.0%}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
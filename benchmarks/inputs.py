@@ -0,0 +1,82 @@
+"""
+Synthetic inputs of the bundled grammars, generated at a given size (a number of top-level items) or nesting depth
+"""
+
+import os
+from typing import Callable, Dict, NamedTuple
+
+GRAMMARS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "grammars")
+
+
+def json_input(size: int) -> str:
+    item = '{"id": %d, "name": "item", "tags": ["a", "b"], "ratio": 0.5, "valid": true, "parent": null}'
+    return "[\n" + ",\n".join(item % i for i in range(size)) + "\n]"
+
+
+def json_nested_input(depth: int) -> str:
+    return '[{"a": ' * depth + "1" + "}]" * depth
+
+
+def eval_input(size: int) -> str:
+    return " + ".join(f"{i} * ({i} - 1) / 2" for i in range(1, size + 1))
+
+
+def eval_nested_input(depth: int) -> str:
+    return "(" * depth + "1" + " + 1)" * depth
+
+
+def grammar_input(size: int) -> str:
+    return "".join(f"rule_{i}: 'a' rule_{i + 1}? | r\"[0-9]+\" ~ ('b' | 'c')*\n" for i in range(size))
+
+
+def grammar_nested_input(depth: int) -> str:
+    return "rule: " + "('a' " * depth + "'b'" + " | 'c')" * depth + "\n"
+
+
+class GrammarInputs(NamedTuple):
+    """
+    Class describing how to benchmark a bundled grammar
+    """
+    # Grammar file, in the grammars directory
+    grammar_file: str
+    # Rule parsing the inputs
+    rule: str
+    # Keyword arguments of the parser
+    parser_kwargs: dict
+    # Generators of the inputs, indexed by shape: flat inputs grow with their size, nested inputs with their depth
+    shapes: Dict[str, Callable[[int], str]]
+
+    def grammar_path(self) -> str:
+        return os.path.join(GRAMMARS_DIR, self.grammar_file)
+
+    def grammar_text(self, memoize_all: bool = False) -> str:
+        with open(self.grammar_path()) as f:
+            grammar_text = f.read()
+        if memoize_all:
+            # Settings follow the verbatim block of the grammar, if any
+            head, verbatim_end, rest = grammar_text.rpartition("%}\n")
+            grammar_text = f"{head}{verbatim_end}@set memoize_all\n{rest}"
+        return grammar_text
+
+
+# Inputs of each bundled grammar
+GRAMMAR_INPUTS = {
+    "json": GrammarInputs(
+        "json.txt",
+        "json",
+        {"whitespace_regex": r"[ \t\n]+"},
+        {"flat": json_input, "nested": json_nested_input},
+    ),
+    "eval": GrammarInputs(
+        "eval.txt",
+        "expr",
+        {},
+        {"flat": eval_input, "nested": eval_nested_input},
+    ),
+    "grammar": GrammarInputs(
+        "grammar.txt",
+        "grammar",
+        {"comments_regex": r"#[^\n]*"},
+        {"flat": grammar_input, "nested": grammar_nested_input},
+    ),
+}
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Compare the parsers interpreting their grammar with the parsers generated from it
+
+For each grammar, inputs made of a growing number of top-level items, then inputs nested increasingly deep (see
+benchmarks.inputs), are parsed by the generated parser and by the interpreted parser (see pegomancy.interpret),
+reporting the parse time of each. The generated parsers recurse through several Python frames per nesting level, so
+they fail with a RecursionError on deeply nested inputs, which the interpreted parsers parse in time proportional to
+their size.
+
+usage: python benchmarks/interpreter.py [--sizes N [N ...]] [--depths N [N ...]] [--no-exceptions]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.inputs import GRAMMAR_INPUTS  # noqa: E402
+from pegomancy.load import load_parser  # noqa: E402
+
+
+def run(parser_class, rule: str, text: str, **kwargs) -> str:
+    start = time.perf_counter()
+    try:
+        parser_class(text, **kwargs).parse(rule)
+    except RecursionError:
+        return "recursion"
+    return f"{time.perf_counter() - start:.3f}"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    ap.add_argument("--depths", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--no-exceptions", action="store_true")
+    args = ap.parse_args()
+    use_exceptions = not args.no_exceptions
+
+    print(f"{'benchmark':<10} {'input':>7} {'size':>7} {'generated (s)':>14} {'interpreted (s)':>16}")
+    for name, inputs in GRAMMAR_INPUTS.items():
+        grammar_text = inputs.grammar_text()
+        generated_class = load_parser(grammar_text, use_exceptions=use_exceptions, start_rule=inputs.rule)
+        interpreted_class = load_parser(grammar_text, use_exceptions=use_exceptions, start_rule=inputs.rule,
+                                        interpret=True)
+        for shape, make_input in inputs.shapes.items():
+            for size in (args.sizes if shape == "flat" else args.depths):
+                text = make_input(size)
+                generated = run(generated_class, inputs.rule, text, **inputs.parser_kwargs)
+                interpreted = run(interpreted_class, inputs.rule, text, **inputs.parser_kwargs)
+                print(f"{name:<10} {shape:>7} {size:>7} {generated:>14} {interpreted:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare the memory used by the memoization table of the parsers with that of the nested dictionaries they used before
+
+Before rules had IDs, the results of the rules were stored in a dictionary per position, keyed by the function of
+the rule and its arguments, each entry holding a tuple of the result and its end position. JSON inputs made of a
+growing number of top-level items are parsed with every rule memoized, storing the results in either structure,
+reporting the number of memo entries, the memory used by the table itself (excluding the memoized values) and the peak
+memory allocated while parsing (which includes the parse result).
+
+usage: python benchmarks/memo_memory.py [--sizes N [N ...]] [--no-exceptions]
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.inputs import GRAMMAR_INPUTS  # noqa: E402
+from pegomancy.load import load_parser  # noqa: E402
+from pegomancy.memo import FAILURE, MISSING, MemoTable  # noqa: E402
+
+
+class NestedDictMemoTable(MemoTable):
+    """
+    Memoization table storing the results in a dictionary per position, keyed by rule, as the parsers did before rules
+    had IDs
+    """
+
+    def __init__(self, rule_count: int, text_length: int):
+        self.rule_count = rule_count
+        self.cache = {}
+
+    def get(self, rule_id: int, pos: int):
+        entry = self.cache.get(pos, {}).get((rule_id, ()))
+        return MISSING if entry is None else entry[0]
+
+    def get_end(self, rule_id: int, pos: int) -> int:
+        return self.cache[pos][(rule_id, ())][1]
+
+    def get_error(self, rule_id: int, pos: int):
+        return self.cache[pos][(rule_id, ())][1]
+
+    def store(self, rule_id: int, pos: int, value, end: int):
+        self.cache.setdefault(pos, {})[(rule_id, ())] = value, end
+
+    def store_failure(self, rule_id: int, pos: int, error=None):
+        self.cache.setdefault(pos, {})[(rule_id, ())] = FAILURE, error
+
+    def entry_count(self, rule_id: int) -> int:
+        return sum((rule_id, ()) in position_cache for position_cache in self.cache.values())
+
+    def __len__(self):
+        return sum(map(len, self.cache.values()))
+
+    def memory_usage(self) -> int:
+        size = sys.getsizeof(self.cache)
+        for position_cache in self.cache.values():
+            size += sys.getsizeof(position_cache)
+            size += sum(sys.getsizeof(key) + sys.getsizeof(entry) for key, entry in position_cache.items())
+        return size
+
+
+def run(parser_class, rule: str, text: str, **kwargs):
+    tracemalloc.start()
+    parser = parser_class(text, **kwargs)
+    parser.parse(rule)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(parser.memo), parser.memo.memory_usage(), peak_memory
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    ap.add_argument("--no-exceptions", action="store_true")
+    args = ap.parse_args()
+
+    inputs = GRAMMAR_INPUTS["json"]
+    # Every rule was memoized before rules had IDs
+    grammar_text = inputs.grammar_text(memoize_all=True)
+    parser_class = load_parser(grammar_text, use_exceptions=not args.no_exceptions, start_rule=inputs.rule)
+    parser_classes = {
+        "table": parser_class,
+        "dicts": type(parser_class.__name__, (parser_class,), {"memo_table_class": NestedDictMemoTable}),
+    }
+
+    print(f"{'size':>7} {'memo':>6} {'memo entries':>13} {'memo memory':>12} {'peak memory':>12}")
+    for size in args.sizes:
+        text = inputs.shapes["flat"](size)
+        for memo, parser_class in parser_classes.items():
+            entries, memo_memory, peak_memory = run(parser_class, inputs.rule, text, **inputs.parser_kwargs)
+            print(f"{size:>7} {memo:>6} {entries:>13} {memo_memory / 1024:>10.0f}kB {peak_memory / 1024:>10.0f}kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compare the memoization table size of parsers pruning their memo on cuts with that of regular parsers
+
+For each grammar, inputs made of a growing number of top-level items are parsed with and without pruning, every rule
+being memoized, reporting the parse time, the peak number of memo entries and the peak memory allocated while
+parsing (which includes the parse result). Without pruning, the memo grows with the input, while with pruning its
+peak size depends on the size of a single item.
+
+usage: python benchmarks/memo_pruning.py [--sizes N [N ...]] [--no-exceptions]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.inputs import GRAMMAR_INPUTS  # noqa: E402
+from pegomancy.load import load_parser  # noqa: E402
+from pegomancy.memo import MemoTable, PrunableMemoTable  # noqa: E402
+
+# Grammars benchmarked, whose flat inputs are parsed (see benchmarks.inputs)
+BENCHMARKS = ("json", "grammar")
+
+
+def memo_entries(memo: MemoTable) -> int:
+    # Failures are stored in bitmaps allocated up front, so only the entries holding objects are counted
+    return sum(map(len, memo.values)) + sum(map(len, memo.errors))
+
+
+class SampledMemoTable(PrunableMemoTable):
+    """
+    Memoization table recording the largest number of entries it held before being pruned
+    """
+
+    def __init__(self, rule_count: int, text_length: int):
+        super().__init__(rule_count, text_length)
+        self.peak_entries = 0
+
+    def prune(self, pos: int):
+        self.peak_entries = max(self.peak_entries, memo_entries(self))
+        super().prune(pos)
+
+
+def parse(parser_class, rule: str, text: str, use_exceptions: bool, **kwargs):
+    parser = parser_class(text, **kwargs)
+    if use_exceptions:
+        getattr(parser, rule)()
+    else:
+        parser.parse(rule)
+    return parser
+
+
+def run(parser_class, rule: str, text: str, use_exceptions: bool, **kwargs):
+    start = time.perf_counter()
+    parse(parser_class, rule, text, use_exceptions, **kwargs)
+    elapsed = time.perf_counter() - start
+    # Memory is measured separately, since tracing allocations slows parsing down
+    tracemalloc.start()
+    memo = parse(parser_class, rule, text, use_exceptions, **kwargs).memo
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, max(getattr(memo, "peak_entries", 0), memo_entries(memo)), peak_memory
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    ap.add_argument("--no-exceptions", action="store_true")
+    args = ap.parse_args()
+    use_exceptions = not args.no_exceptions
+
+    print(f"{'benchmark':<10} {'size':>7} {'pruning':>8} {'time (s)':>9} {'memo entries':>13} {'peak memory':>12}")
+    for name in BENCHMARKS:
+        inputs = GRAMMAR_INPUTS[name]
+        rule, kwargs = inputs.rule, inputs.parser_kwargs
+        grammar_text = inputs.grammar_text(memoize_all=True)
+        parser_classes = {False: load_parser(grammar_text, use_exceptions=use_exceptions)}
+        parser_class = load_parser(grammar_text, use_exceptions=use_exceptions, prune_memo=True)
+        parser_classes[True] = type(parser_class.__name__, (parser_class,), {"memo_table_class": SampledMemoTable})
+        for size in args.sizes:
+            text = inputs.shapes["flat"](size)
+            for prune_memo, parser_class in parser_classes.items():
+                elapsed, entries, memory = run(parser_class, rule, text, use_exceptions, **kwargs)
+                print(f"{name:<10} {size:>7} {'yes' if prune_memo else 'no':>8} {elapsed:>9.3f} {entries:>13} "
+                      f"{memory / 1024:>10.0f}kB")
+
+
+if __name__ == "__main__":
+    main()
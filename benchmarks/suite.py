@@ -0,0 +1,242 @@
+"""
+Benchmark the parsers of the bundled grammars on inputs of growing sizes and nesting depths
+
+For each grammar and shape of input (see benchmarks.inputs), the parse time (the best of several runs), the
+throughput, the peak memory allocated while parsing (which includes the parse result) and the number of memo entries
+are measured at each size. The stdlib json module parses the JSON inputs as a baseline. The growth of each measure
+with the length of the input is then estimated as the exponent of a power law fitted to the measures: an exponent
+above the allowed one (for example close to 2 for quadratic behavior) makes the benchmark fail.
+
+The results are written as JSON, so that the results of two revisions can be compared (see benchmarks.compare).
+
+Tracing allocations gets slower as the Python stack gets deeper, so measuring the memory of generated parsers on
+deeply nested inputs takes long: the default depths are kept small, while larger ones suit interpreted parsers.
+
+usage: python -m benchmarks [--grammars NAME [NAME ...]] [--sizes N [N ...]] [--depths N [N ...]] [--repeat N]
+                            [--max-exponent X] [--interpret] [--no-exceptions] [-o OUTPUT_FILE]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pegomancy.load import load_parser
+
+from .inputs import GRAMMAR_INPUTS
+
+# Recursion limit while parsing, which generated parsers reach on nested inputs (several frames per nesting level)
+RECURSION_LIMIT = 100000
+
+# Measures whose growth with the length of the input is checked
+SCALED_MEASURES = ("seconds", "peak_memory", "memo_entries")
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    Measure the shortest time a function takes to run, over several runs
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def scaling_exponent(lengths: Sequence[int], measures: Sequence[float]) -> Optional[float]:
+    """
+    Estimate how a measure grows with the length of the input, as the exponent k of the power law length ** k fitted
+    to the measures (1 for linear growth, 2 for quadratic growth)
+
+    :return:                    the exponent, or None if there are not enough positive measures to fit it
+    """
+    points = [(math.log(length), math.log(measure)) for length, measure in zip(lengths, measures) if measure > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def revision() -> Optional[str]:
+    """
+    Identify the revision of the source tree being benchmarked, if it is a git checkout
+    """
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def measure(parser_class, rule: str, text: str, repeat: int, **kwargs) -> dict:
+    """
+    Measure the parsing of a text
+
+    :return:                    the measures, as a dictionary
+    """
+    seconds = best_time(lambda: parser_class(text, **kwargs).parse(rule), repeat)
+    # Memory is measured separately, since tracing allocations slows parsing down
+    tracemalloc.start()
+    parser = parser_class(text, **kwargs)
+    parser.parse(rule)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "length": len(text),
+        "seconds": seconds,
+        "chars_per_second": len(text) / seconds,
+        "peak_memory": peak_memory,
+        "memo_entries": len(parser.memo),
+        "memo_memory": parser.memo.memory_usage(),
+    }
+
+
+def run_suite(
+        grammars: Sequence[str],
+        sizes: Sequence[int],
+        depths: Sequence[int],
+        repeat: int = 3,
+        interpret: bool = False,
+        use_exceptions: bool = True,
+        report: Callable[[dict], None] = lambda result: None,
+) -> List[dict]:
+    """
+    Run the benchmarks of some grammars
+
+    :param grammars:            the names of the grammars (see GRAMMAR_INPUTS)
+    :param sizes:               the sizes of the flat inputs
+    :param depths:              the nesting depths of the nested inputs
+    :param repeat:              the number of runs each parse time is the best of
+    :param interpret:           whether the grammars are interpreted, rather than generated (see load_parser)
+    :param use_exceptions:      whether the parsers raise exceptions, or return FAILURE (see ParserGenerator)
+    :param report:              the function called with each result as soon as it is measured
+    :return:                    the results, one per grammar, shape and size
+    """
+    results = []
+    for name in grammars:
+        inputs = GRAMMAR_INPUTS[name]
+        with open(inputs.grammar_path()) as f:
+            grammar_text = f.read()
+        parser_class = load_parser(
+            grammar_text,
+            use_exceptions=use_exceptions,
+            start_rule=inputs.rule,
+            interpret=interpret,
+        )
+        for shape, make_input in inputs.shapes.items():
+            for size in (sizes if shape == "flat" else depths):
+                text = make_input(size)
+                result = {"grammar": name, "shape": shape, "size": size}
+                result.update(measure(parser_class, inputs.rule, text, repeat, **inputs.parser_kwargs))
+                if name == "json":
+                    result["baseline_seconds"] = best_time(lambda: json.loads(text), repeat)
+                report(result)
+                results.append(result)
+    return results
+
+
+def check_scaling(results: List[dict], max_exponent: float) -> List[dict]:
+    """
+    Estimate the growth of the measures of each grammar and shape of input with the length of the input
+
+    :param results:             the results of the benchmarks (see run_suite)
+    :param max_exponent:        the largest exponent allowed (see scaling_exponent)
+    :return:                    the exponent of each measure, and whether it is allowed
+    """
+    series: Dict[tuple, List[dict]] = {}
+    for result in results:
+        series.setdefault((result["grammar"], result["shape"]), []).append(result)
+    checks = []
+    for (name, shape), shape_results in series.items():
+        lengths = [result["length"] for result in shape_results]
+        for measure_name in SCALED_MEASURES:
+            exponent = scaling_exponent(lengths, [result[measure_name] for result in shape_results])
+            checks.append({
+                "grammar": name,
+                "shape": shape,
+                "measure": measure_name,
+                "exponent": exponent,
+                "ok": exponent is None or exponent <= max_exponent,
+            })
+    return checks
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m benchmarks",
+                                 description="benchmark the parsers of the bundled grammars")
+    ap.add_argument("--grammars", type=str, nargs="+", default=list(GRAMMAR_INPUTS), choices=list(GRAMMAR_INPUTS),
+                    metavar="NAME", help=f"the grammars to benchmark (among {', '.join(GRAMMAR_INPUTS)})")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000],
+                    help="the numbers of top-level items of the flat inputs")
+    ap.add_argument("--depths", type=int, nargs="+", default=[50, 100, 200, 400],
+                    help="the nesting depths of the nested inputs")
+    ap.add_argument("--repeat", type=int, default=3, help="the number of runs each parse time is the best of")
+    ap.add_argument("--max-exponent", type=float, default=1.5,
+                    help="the largest growth exponent allowed for the measures (1 being linear, 2 quadratic)")
+    ap.add_argument("--interpret", action="store_true", help="benchmark interpreted parsers instead of generated ones")
+    ap.add_argument("--no-exceptions", action="store_true", help="benchmark parsers generated without exceptions")
+    ap.add_argument("-o", "--output-file", type=str, help="the file the results are written to, as JSON")
+    args = ap.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))
+
+    print(f"{'grammar':<8} {'shape':>6} {'size':>6} {'length':>8} {'time (s)':>9} {'kchars/s':>9} {'peak memory':>12} "
+          f"{'memo entries':>13} {'json (s)':>9}")
+
+    def report(result: dict):
+        baseline = f"{result['baseline_seconds']:.4f}" if "baseline_seconds" in result else "-"
+        print(f"{result['grammar']:<8} {result['shape']:>6} {result['size']:>6} {result['length']:>8} "
+              f"{result['seconds']:>9.4f} {result['chars_per_second'] / 1000:>9.1f} "
+              f"{result['peak_memory'] / 1024:>10.0f}kB {result['memo_entries']:>13} {baseline:>9}")
+
+    results = run_suite(
+        args.grammars,
+        args.sizes,
+        args.depths,
+        repeat=args.repeat,
+        interpret=args.interpret,
+        use_exceptions=not args.no_exceptions,
+        report=report,
+    )
+    checks = check_scaling(results, args.max_exponent)
+    print()
+    print(f"{'grammar':<8} {'shape':>6} {'measure':>13} {'exponent':>9}")
+    for check in checks:
+        exponent = "-" if check["exponent"] is None else f"{check['exponent']:.2f}"
+        print(f"{check['grammar']:<8} {check['shape']:>6} {check['measure']:>13} {exponent:>9}"
+              f"{'' if check['ok'] else '  ABOVE LIMIT'}")
+    if args.output_file is not None:
+        document = {
+            "revision": revision(),
+            "python": platform.python_version(),
+            "interpret": args.interpret,
+            "use_exceptions": not args.no_exceptions,
+            "max_exponent": args.max_exponent,
+            "results": results,
+            "scaling": checks,
+        }
+        with open(args.output_file, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+    failed = [check for check in checks if not check["ok"]]
+    for check in failed:
+        print(f"error: the {check['measure']} of {check['grammar']} ({check['shape']} inputs) grows with exponent "
+              f"{check['exponent']:.2f}, above {args.max_exponent}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,232 @@
+import mmap
+import multiprocessing
+import os
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Type, Union
+
+from .load import load_parser_module
+from .parse import EXPECTED_EOF_MESSAGE, BaseParseError, BaseParser
+from .reader import compile_regex, encoded_pattern
+from .source_info import SourceIndex
+
+
+class DocumentResult(NamedTuple):
+    """
+    Class describing the outcome of parsing one of the documents given to parse_many
+    """
+    # Index of the document among the documents given
+    index: int
+    # Path of the document, or None if its text was given
+    path: Optional[str]
+    # Result of the rule, or None if parsing failed
+    value: Any
+    # Error that made parsing fail (a BaseParseError, or an OSError raised reading the document), if any
+    error: Optional[Exception]
+
+
+def _resolve_parser_class(parser_class: Union[Type[BaseParser], str]) -> Type[BaseParser]:
+    if not isinstance(parser_class, str):
+        return parser_class
+    path, _, class_name = parser_class.partition(":")
+    return load_parser_module(path, class_name or "Parser")
+
+
+# State of a worker process of parse_many or parse_split: the parser class, the rule, the other arguments of the
+# parser, and the memory map of the file cut into chunks by parse_split, if any
+_worker = None
+
+
+def _init_worker(parser_class: Union[Type[BaseParser], str], rule_name: str, args, kwargs, path=None):
+    global _worker
+    text = None
+    if path is not None:
+        # The file is mapped once, and stays mapped as long as the worker lives
+        with open(path, "rb") as f:
+            text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size > 0 else b""
+    _worker = (_resolve_parser_class(parser_class), rule_name, args, kwargs, text)
+
+
+def _detached_error(error: BaseParseError, locate: bool = True) -> BaseParseError:
+    """
+    Create a copy of an error that no longer refers to the source text, so that it can be sent to another process
+
+    :param error:               the error
+    :param locate:              whether to resolve the location of the error while the text is still available, or
+                                only keep its offset
+    :return:                    the copy of the error
+    """
+    if locate:
+        return type(error)(error.message, error.location)
+    return type(error)(error.message, offset=error.offset)
+
+
+def _parse_document(job) -> DocumentResult:
+    index, document = job
+    parser_class, rule_name, args, kwargs, _ = _worker
+    path = os.fspath(document) if isinstance(document, os.PathLike) else None
+    try:
+        if path is None:
+            value = parser_class(document, *args, **kwargs).parse(rule_name)
+        else:
+            # The parser locates its errors before unmapping the file
+            with parser_class.from_file(path, *args, **kwargs) as parser:
+                value = parser.parse(rule_name)
+    except BaseParseError as e:
+        return DocumentResult(index, path, None, _detached_error(e))
+    except OSError as e:
+        return DocumentResult(index, path, None, e)
+    return DocumentResult(index, path, value, None)
+
+
+def parse_many(
+        parser_class: Union[Type[BaseParser], str],
+        documents: Iterable[Union[str, bytes, os.PathLike]],
+        rule_name: str,
+        *args,
+        workers: Optional[int] = None,
+        ordered: bool = True,
+        chunksize: int = 1,
+        **kwargs
+) -> Iterator[DocumentResult]:
+    """
+    Parse many documents using a pool of worker processes
+
+    Each worker creates the parser class once, then parses the documents it is sent one after the other. Documents
+    given as paths are read by the workers (see BaseParser.from_file), so that only their paths and results are
+    sent between processes: the results (and the rule handler, if any) must therefore be picklable. Failing to parse
+    a document does not stop the batch: the error is reported in the result of the document instead.
+
+    :param parser_class:        the parser class, which the workers must be able to import (as is the case for a
+                                class defined in a module), or the path of a module generated by pegomant, optionally
+                                followed by ':' and the name of the class (Parser by default)
+    :param documents:           the documents: texts (or encoded texts), or paths (as os.PathLike objects, such as
+                                pathlib.Path, since strings are texts) of files encoded in UTF-8
+    :param rule_name:           the name of the rule parsing each document
+    :param args:                the other arguments of the parser
+    :param workers:             the number of worker processes (by default, the number of CPUs)
+    :param ordered:             whether results are returned in the order of the documents, rather than as soon as
+                                each document is parsed
+    :param chunksize:           the number of documents sent to a worker at once, which should be raised when parsing
+                                many small documents
+    :param kwargs:              the other keyword arguments of the parser
+    :return:                    an iterator over the results of the documents, which must be exhausted (or closed)
+                                to stop the workers
+    """
+    initargs = (parser_class, rule_name, args, kwargs)
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        jobs = enumerate(documents)
+        if ordered:
+            yield from pool.imap(_parse_document, jobs, chunksize)
+        else:
+            yield from pool.imap_unordered(_parse_document, jobs, chunksize)
+
+
+def _split_positions(pattern: Pattern, text, chunk_size: int) -> List[int]:
+    """
+    Find the positions at which the text is cut into chunks of about a given size
+
+    :param pattern:             the pattern matching where the text may be cut, which is cut at the end of the first
+                                match found after each chunk
+    :param text:                the text
+    :param chunk_size:          the minimum size of the chunks, except for the last one
+    :return:                    the positions of the starts of the chunks, followed by the end of the text
+    """
+    positions = [0]
+    pos = chunk_size
+    while pos < len(text):
+        match = pattern.search(text, pos)
+        if match is None or match.end() >= len(text):
+            break
+        positions.append(match.end())
+        pos = match.end() + chunk_size
+    positions.append(len(text))
+    return positions
+
+
+def _parse_chunk(job):
+    start, end, chunk = job
+    parser_class, rule_name, args, kwargs, text = _worker
+    # Chunks of a file are read from its memory map, while chunks of a text are sent along with the job
+    parser = parser_class(text[start:end] if chunk is None else chunk, *args, **kwargs)
+    elements = []
+    try:
+        elements.extend(getattr(parser, f"iter_{rule_name}")())
+        parser.reader.consume_non_significant()
+        if not parser.eof():
+            raise parser.make_error(message=EXPECTED_EOF_MESSAGE, pos=parser.mark())
+    except BaseParseError as e:
+        return elements, _detached_error(e, locate=False)
+    return elements, None
+
+
+def parse_split(
+        parser_class: Union[Type[BaseParser], str],
+        source: Union[str, bytes, os.PathLike],
+        rule_name: str,
+        *args,
+        split_regex: Optional[str] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        **kwargs
+) -> Iterator:
+    """
+    Parse the elements of an iterable rule in a large input using a pool of worker processes, by cutting the input
+    into chunks parsed separately
+
+    The input is cut after matches of a pattern which must only match between two elements of the repetition of the
+    rule, such as a newline between two records (the pattern is searched from the position where each chunk reaches
+    its size, so it may use lookbehinds). Each chunk is then parsed with the iter_<rule> method of the parser (see
+    ParserGenerator.iterable_rules) as if it was the whole text: the items of the rule around its repetition must
+    therefore match each chunk, which is easiest when the rule is only a repetition (e.g. `records: record*`).
+
+    The elements are returned in order, and parsing stops at the first error, once the elements matched before it
+    were returned. Errors are raised with their offsets in the whole input (the values of the elements are returned
+    as the rule handler built them, and the positions they may hold are relative to their chunk).
+
+    :param parser_class:        the parser class, which must have an iter_<rule> method and which the workers must be
+                                able to import, or the path of a module generated by pegomant (see parse_many)
+    :param source:              the source text (or encoded text), or the path of a file encoded in UTF-8 (as an
+                                os.PathLike object), which the workers read through a memory map
+    :param rule_name:           the name of the iterable rule
+    :param args:                the other arguments of the parser
+    :param split_regex:         the pattern matching where the input may be cut (by default, the pattern declared by
+                                the split setting of the grammar)
+    :param workers:             the number of worker processes (by default, the number of CPUs)
+    :param chunk_size:          the size of the chunks, in characters, or in bytes for encoded text (by default, the
+                                input is cut into 4 chunks per worker)
+    :param kwargs:              the other keyword arguments of the parser
+    :return:                    an iterator over the elements of the repetition, which must be exhausted (or closed) to
+                                stop the workers
+    """
+    path = os.fspath(source) if isinstance(source, os.PathLike) else None
+    split_regex = split_regex or _resolve_parser_class(parser_class).SPLIT_REGEX
+    if split_regex is None:
+        raise ValueError("no split pattern was given, and the grammar does not declare one")
+    if path is not None:
+        with open(path, "rb") as f:
+            text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size > 0 else b""
+    else:
+        text = source
+    encoding = None if isinstance(text, str) else "utf-8"
+    try:
+        pattern = compile_regex(split_regex) if encoding is None else encoded_pattern(split_regex, encoding)
+        workers = workers or os.cpu_count()
+        positions = _split_positions(pattern, text, chunk_size or max(len(text) // (workers * 4), 1))
+        # Each job is the range of a chunk, along with the chunk itself unless the workers read it from the file
+        jobs = ((start, end, None if path is not None else text[start:end])
+                for start, end in zip(positions, positions[1:]))
+        initargs = (parser_class, rule_name, args, kwargs, path)
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            for start, (elements, error) in zip(positions, pool.imap(_parse_chunk, jobs)):
+                yield from elements
+                if error is not None:
+                    error = type(error)(
+                        error.message,
+                        offset=start + (error.offset or 0),
+                        source_index=SourceIndex(text, build_lazily=True, encoding=encoding),
+                    )
+                    # The error is located while the file is still mapped
+                    error.location
+                    raise error
+    finally:
+        if isinstance(text, mmap.mmap):
+            text.close()
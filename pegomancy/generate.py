@@ -1,70 +1,571 @@
+import io
 import sys
 from textwrap import dedent
-from typing import TextIO
+from typing import FrozenSet, Iterable, List, Optional, TextIO, Tuple
 
-from .grammar import AbstractItem, Alternative, Grammar, Rule
+from .grammar import \
+    AbstractItem, \
+    Alternative, \
+    CutItem, \
+    EOFItem, \
+    Grammar, \
+    LiteralItem, \
+    MaybeSepBy, \
+    OneOrMore, \
+    RegexItem, \
+    Rule, \
+    SepBy, \
+    ZeroOrMore
+from .reader import compile_regex, embeddable_regex, literal_choice_regex
+
+# Settings of the grammar declaring regex patterns, and the attributes of the parser class they define
+_PATTERN_SETTINGS = (
+    ("whitespace", "DEFAULT_WHITESPACE_REGEX"),
+    ("comments", "DEFAULT_COMMENTS_REGEX"),
+    ("split", "SPLIT_REGEX"),
+)
+
+
+def _indented(fprint):
+    def indented_fprint(line: str = "", **kwargs):
+        fprint(f"    {line}" if line else "", **kwargs)
+
+    return indented_fprint
 
 
 class ParserGenerator:
+    def __init__(
+            self,
+            use_exceptions: bool = True,
+            prune_memo: bool = False,
+            iterable_rules: Iterable[str] = (),
+            instrument: bool = False,
+    ):
+        """
+        :param use_exceptions:      whether the generated rules raise a ParseError when they fail, or return FAILURE
+                                    and only record the farthest failure (see SentinelTextParser)
+        :param prune_memo:          whether the generated parser frees the memo entries that can no longer be used
+                                    when a cut is reached (see MemoPruningMixin)
+        :param iterable_rules:      the rules for which the generated parser has an iter_<rule> method, yielding the
+                                    elements of their repetition one at a time (see _iterated_item)
+        :param instrument:          whether the generated parser records the statistics of the applications of its
+                                    rules (see InstrumentedMixin)
+        """
+        self.use_exceptions = use_exceptions
+        self.prune_memo = prune_memo
+        self.iterable_rules = tuple(iterable_rules)
+        self.instrument = instrument
+        # Sequences of terminals matched at once by the parser being generated (see RawTextParser.terminal_sequences)
+        self.terminal_sequences = []
+
+    def _generate_node(self, var_names, attributes, rule: Rule, indent: str, fprint):
+        fprint(f"{indent}node = self._wrap_node(")
+        fprint(f"{indent}    {rule.name!r},")
+        fprint(f"{indent}    [{', '.join(var_names)}],")
+        line = f"{indent}    {attributes!r}"
+        if len(line) <= 120:
+            fprint(line)
+        else:
+            reprs = list(map(repr, attributes))
+            lines = [", ".join(reprs[i:i + 2]) for i in range(0, len(reprs), 2)]
+            fprint(f"{indent}    [{lines[0]},")
+            for line in lines[1:-1]:
+                fprint(f"{indent}     {line},")
+            fprint(f"{indent}     {lines[-1]}]")
+        fprint(f"{indent})")
+
+    @staticmethod
+    def _terminal_call(item: AbstractItem) -> Optional[Tuple[str, str]]:
+        """
+        Describe a terminal that can be fused with other terminals, as the name of the method matching it and the code
+        of its argument
+        """
+        if isinstance(item, LiteralItem):
+            return "expect_string", item.literal_code()
+        if isinstance(item, RegexItem) and embeddable_regex(item.target) is not None:
+            return "expect_regex", item.pattern_literal()
+        return None
+
+    def _sequence_index(self, calls: Tuple[Tuple[str, str], ...]) -> int:
+        if calls not in self.terminal_sequences:
+            self.terminal_sequences.append(calls)
+        return self.terminal_sequences.index(calls)
+
+    def _fuse_terminals(self, items: List[AbstractItem]) -> List[Tuple[List[AbstractItem], str, bool]]:
+        """
+        Split the items of an alternative into groups matched by a single condition, fusing the consecutive terminals
+        into sequences and the repetitions of a terminal into a single call
+
+        :return:                    a list of (items, condition, whether the condition may fail) tuples
+        """
+        runs = []
+        for item in items:
+            assert isinstance(item, AbstractItem), "expected alternative item to be an AbstractItem"
+            if runs and self._terminal_call(item) is not None and self._terminal_call(runs[-1][-1]) is not None:
+                runs[-1].append(item)
+            else:
+                runs.append([item])
+        groups = []
+        for run in runs:
+            item = run[0]
+            if len(run) > 1:
+                index = self._sequence_index(tuple(map(self._terminal_call, run)))
+                groups.append((run, f"self.expect_sequence({index})", True))
+            elif isinstance(item, (OneOrMore, ZeroOrMore)) and self._is_repeatable_terminal(item.inner_item):
+                index = self._sequence_index((self._terminal_call(item.inner_item),))
+                minimum = 1 if isinstance(item, OneOrMore) else 0
+                groups.append((run, f"self.expect_repetition({index}, {minimum})", item.can_fail()))
+            else:
+                groups.append((run, item.generate_condition(), item.can_fail()))
+        return groups
+
+    def _is_repeatable_terminal(self, item: AbstractItem) -> bool:
+        if self._terminal_call(item) is None:
+            return False
+        if isinstance(item, LiteralItem):
+            return item.value() != ""
+        return compile_regex(item.target).match("") is None
+
+    def _has_choice_point(self, rule: Rule) -> bool:
+        """
+        Check whether a rule of a parser pruning its memo registers a choice point (see MemoPruningMixin), which is the
+        case of the rules with several alternatives, unless they are matched using a single regex
+        """
+        return self.prune_memo and len(rule.alternatives) > 1 and self._literal_choices(rule) is None
+
+    def _generate_items(self, items: List[AbstractItem], var_names: List[str], rule: Rule, indent: str,
+                        fprint) -> str:
+        """
+        Generate the code matching a sequence of items, appending the names of the variables holding their values
+
+        :return:                    the indentation of the code to run once all items matched
+        """
+        for group, cond, can_fail in self._fuse_terminals(items):
+            if self.prune_memo and isinstance(group[0], CutItem):
+                cond = f"cut = self._commit({'choice' if self._has_choice_point(rule) else ''})"
+            names = [f"v{len(var_names) + i}" for i in range(len(group))]
+            var_names.extend(names)
+            if self.use_exceptions:
+                fprint(f"{indent}{', '.join(names)} = {cond}")
+                continue
+            var_name = names[0] if len(names) == 1 else "sequence"
+            fprint(f"{indent}{var_name} = {cond}")
+            if can_fail:
+                fprint(f"{indent}if {var_name} is not FAILURE:")
+                indent += "    "
+            if len(names) > 1:
+                fprint(f"{indent}{', '.join(names)} = sequence")
+        return indent
+
     def _generate_alternative_(self, alt: Alternative, rule: Rule, fprint):
         var_names = []
-        attributes = []
-        for item in alt.items:
-            assert isinstance(item, AbstractItem), "expected alternative item to be an AbstractItem"
-            cond = item.generate_condition()
-            var_name = f"v{len(var_names)}"
-            var_names.append(var_name)
-            attributes.append(item.attributes)
-            fprint(f"            {var_name} = {cond}")
-        fprint(f"            node = self._wrap_node(")
-        fprint(f"                {rule.name!r},")
-        fprint(f"                [{', '.join(var_names)}],")
-        fprint(f"                {attributes!r}")
-        fprint(f"            )")
+        self._generate_items(alt.items, var_names, rule, "            ", fprint)
+        self._generate_node(var_names, [item.attributes for item in alt.items], rule, "            ", fprint)
         fprint(f"            return node")
 
+    def _generate_sentinel_alternative(self, alt: Alternative, rule: Rule, fprint):
+        has_cut = any(isinstance(item, CutItem) for item in alt.items)
+        if has_cut:
+            fprint(f"        cut = False")
+        var_names = []
+        indent = self._generate_items(alt.items, var_names, rule, "        ", fprint)
+        self._generate_node(var_names, [item.attributes for item in alt.items], rule, indent, fprint)
+        fprint(f"{indent}if node is not FAILURE:")
+        fprint(f"{indent}    return node")
+        fprint(f"        self.rewind(pos)")
+        if has_cut:
+            fprint(f"        if cut is True:")
+            fprint(f"            raise self.make_cut_error()")
+        fprint()
+
     def _generate_alternative(self, alt: Alternative, rule: Rule, fprint):
+        if not self.use_exceptions:
+            self._generate_sentinel_alternative(alt, rule, fprint)
+            return
         fprint(f"        cut = False")
         fprint(f"        try:")
         self._generate_alternative_(alt, rule, fprint)
         fprint(f"        except ParseError as e:")
         fprint(f"            self.rewind(pos)")
         fprint(f"            if cut is True:")
-        fprint(f"                raise CutError(e.message, e.location)")
+        fprint(f"                raise CutError.from_error(e)")
         fprint()
 
-    def _generate_rule(self, rule: Rule, fprint):
-        if rule.is_left_recursive():
-            fprint(f"    @left_recursive_parsing_rule")
+    def _generate_sentinel_factored_alternatives(self, alts: List[Alternative], prefix_length: int, rule: Rule,
+                                                 fprint):
+        if any(isinstance(item, CutItem) for alt in alts for item in alt.items):
+            fprint(f"        cut = False")
+        prefix_names = []
+        indent = self._generate_items(alts[0].items[:prefix_length], prefix_names, rule, "        ", fprint)
+        fprint(f"{indent}prefix_end = self.mark()")
+        for alt in alts:
+            var_names = list(prefix_names)
+            suffix_indent = self._generate_items(alt.items[prefix_length:], var_names, rule, indent, fprint)
+            self._generate_node(var_names, [item.attributes for item in alt.items], rule, suffix_indent, fprint)
+            fprint(f"{suffix_indent}if node is not FAILURE:")
+            fprint(f"{suffix_indent}    return node")
+            fprint(f"{indent}self.rewind(prefix_end)")
+            if any(isinstance(item, CutItem) for item in alt.items):
+                fprint(f"{indent}if cut is True:")
+                fprint(f"{indent}    raise self.make_cut_error()")
+        fprint(f"        self.rewind(pos)")
+        fprint()
+
+    def _generate_factored_alternatives(self, alts: List[Alternative], prefix_length: int, rule: Rule, fprint):
+        """
+        Generate consecutive alternatives sharing a common prefix (which cannot contain a cut), matching the prefix
+        only once before trying the rest of each alternative in turn
+        """
+        if not self.use_exceptions:
+            self._generate_sentinel_factored_alternatives(alts, prefix_length, rule, fprint)
+            return
+        fprint(f"        try:")
+        prefix_names = []
+        self._generate_items(alts[0].items[:prefix_length], prefix_names, rule, "            ", fprint)
+        fprint(f"            prefix_end = self.mark()")
+        for alt in alts:
+            var_names = list(prefix_names)
+            fprint(f"            cut = False")
+            fprint(f"            try:")
+            self._generate_items(alt.items[prefix_length:], var_names, rule, "                ", fprint)
+            self._generate_node(var_names, [item.attributes for item in alt.items], rule, "                ", fprint)
+            fprint(f"                return node")
+            fprint(f"            except ParseError as e:")
+            fprint(f"                self.rewind(prefix_end)")
+            fprint(f"                if cut is True:")
+            fprint(f"                    raise CutError.from_error(e)")
+        fprint(f"        except ParseError:")
+        fprint(f"            pass")
+        fprint(f"        self.rewind(pos)")
+        fprint()
+
+    @staticmethod
+    def _literal_choices(rule: Rule) -> Optional[List[LiteralItem]]:
+        """
+        Retrieve the literals of a rule made of several alternatives that each consist of a single literal, which can
+        then be matched at once using a single regex
+        """
+        if len(rule.alternatives) < 2:
+            return None
+        literals = []
+        for alt in rule.alternatives:
+            if len(alt.items) != 1 or not isinstance(alt.items[0], LiteralItem):
+                return None
+            literals.append(alt.items[0])
+        return literals
+
+    def _generate_literal_choice_rule(self, rule: Rule, literals: List[LiteralItem], fprint):
+        pattern = literal_choice_regex(literal.value() for literal in literals)
+        targets = tuple(literal.value() for literal in literals)
+        attributes = [literal.attributes for literal in literals]
+        if self.use_exceptions:
+            fprint(f"        try:")
+            indent = "            "
+            var_name = "index" if len(set(map(repr, attributes))) > 1 else "_"
+            fprint(f"{indent}{var_name}, v0 = self.expect_literals({pattern!r}, {targets!r})")
+        else:
+            fprint(f"        choice = self.expect_literals({pattern!r}, {targets!r})")
+            fprint(f"        if choice is not FAILURE:")
+            indent = "            "
+            var_name = "index" if len(set(map(repr, attributes))) > 1 else "_"
+            fprint(f"{indent}{var_name}, v0 = choice")
+        fprint(f"{indent}node = self._wrap_node(")
+        fprint(f"{indent}    {rule.name!r},")
+        fprint(f"{indent}    [v0],")
+        if var_name == "_":
+            fprint(f"{indent}    [{attributes[0]!r}]")
         else:
-            fprint(f"    @parsing_rule")
+            fprint(f"{indent}    [(")
+            for attrs in attributes:
+                fprint(f"{indent}        {attrs!r},")
+            fprint(f"{indent}    )[index]]")
+        fprint(f"{indent})")
+        if self.use_exceptions:
+            fprint(f"{indent}return node")
+            fprint(f"        except ParseError:")
+            fprint(f"            self.rewind(pos)")
+        else:
+            fprint(f"{indent}if node is not FAILURE:")
+            fprint(f"{indent}    return node")
+            fprint(f"        self.rewind(pos)")
+
+    @staticmethod
+    def _generate_choice_point_release(next_firsts: List[Optional[FrozenSet[str]]], fprint):
+        """
+        Release the choice point of a rule before trying an alternative when no alternative can be tried after it,
+        since the cursor will then not be rewound to try another one (see MemoPruningMixin)
+
+        :param next_firsts:         the FIRST sets of the groups of alternatives after the alternative
+        :param fprint:              the function printing the generated code
+        """
+        if not next_firsts:
+            fprint(f"        del self.choice_points[choice:]")
+        elif None not in next_firsts:
+            fprint(f"        if next_char not in {''.join(sorted(frozenset().union(*next_firsts)))!r}:")
+            fprint(f"            del self.choice_points[choice:]")
+
+    @staticmethod
+    def _generate_expected_terminals(terminals: List[AbstractItem], fprint):
+        fprint(f"        self.record_failures(pos, (")
+        for terminal in terminals:
+            if isinstance(terminal, LiteralItem):
+                fprint(f"            {terminal.literal_code()},")
+            elif isinstance(terminal, RegexItem):
+                fprint(f"            self.regexes[{terminal.pattern_literal()}],")
+            elif isinstance(terminal, EOFItem):
+                fprint(f"            END_OF_INPUT,")
+        fprint(f"        ))")
+
+    def _generate_rule(self, rule: Rule, index: int, rule_id: Optional[int],
+                       first_sets: List[Optional[FrozenSet[str]]], expected_terminals: List[AbstractItem], fprint):
+        prefix = "" if self.use_exceptions else "sentinel_"
+        # Instrumented decorators take the index of the rule among the instrumented rules before its ID
+        if self.instrument:
+            prefix, rule_args = f"{prefix}instrumented_", f"{index}, {rule_id}"
+        else:
+            rule_args = f"{rule_id}"
+        has_choice_point = self._has_choice_point(rule)
+        if rule_id is None:
+            if self.instrument:
+                fprint(f"    @instrumented_rule({index})")
+        elif rule.is_left_recursive():
+            if self.prune_memo:
+                # Keep the memo entry grown by the rule while it is being grown, whatever the cuts of its alternatives
+                fprint(f"    @choice_point")
+            fprint(f"    @{prefix}left_recursive_parsing_rule({rule_args})")
+        else:
+            fprint(f"    @{prefix}parsing_rule({rule_args})")
+        if has_choice_point:
+            fprint(f"    @choice_point")
         fprint(f"    def {rule.name}(self):")
+        literals = self._literal_choices(rule)
+        if literals is not None:
+            fprint(f"        pos = self.mark()")
+            self._generate_literal_choice_rule(rule, literals, fprint)
+            if self.use_exceptions:
+                fprint(f"        raise self.make_error(message={'expected a ' + rule.name!r}, pos=self.mark())")
+            else:
+                fprint(f"        return FAILURE")
+            return
+        dispatch = any(first is not None for first in first_sets)
+        if has_choice_point:
+            fprint(f"        choice = len(self.choice_points) - 1")
+        if dispatch:
+            fprint(f"        next_char = self.reader.next_significant_char()")
         fprint(f"        pos = self.mark()")
-        for alt in rule.alternatives:
-            self._generate_alternative(alt, rule, fprint)
-        fprint(f"        raise self.make_error(message=f\"expected a {rule.name}\", pos=self.mark())")
+        # Consecutive alternatives sharing a prefix with the previous one (see Grammar.left_factored) are grouped
+        groups = []
+        for alt, first in zip(rule.alternatives, first_sets):
+            if groups and alt.shared_prefix > 0:
+                groups[-1].append((alt, first))
+            else:
+                groups.append([(alt, first)])
+        group_firsts = []
+        for group in groups:
+            firsts = [first for _, first in group]
+            group_firsts.append(None if None in firsts else frozenset().union(*firsts))
+        for i, group in enumerate(groups):
+            alts = [alt for alt, _ in group]
+            first = group_firsts[i]
+            alt_fprint = fprint
+            if first is not None:
+                # An empty next_char (at the end of the source text) is contained in any string, so alternatives
+                # are always tried there: this is only a missed shortcut, since they fail normally
+                fprint(f"        if next_char in {''.join(sorted(first))!r}:")
+                alt_fprint = _indented(fprint)
+            if has_choice_point and len(alts) == 1:
+                self._generate_choice_point_release(group_firsts[i + 1:], alt_fprint)
+            if len(alts) == 1:
+                self._generate_alternative(alts[0], rule, alt_fprint)
+            else:
+                prefix_length = min(alt.shared_prefix for alt in alts[1:])
+                self._generate_factored_alternatives(alts, prefix_length, rule, alt_fprint)
+        if self.use_exceptions:
+            fprint(f"        raise self.make_error(message={'expected a ' + rule.name!r}, pos=self.mark())")
+        else:
+            if expected_terminals:
+                self._generate_expected_terminals(expected_terminals, fprint)
+            fprint(f"        return FAILURE")
+
+    @staticmethod
+    def _iterated_item(rule: Rule) -> Optional[int]:
+        """
+        Find the repetition whose elements are yielded by the iterator of a rule: the last repeated item of a rule made
+        of a single alternative
+
+        :return:                    the index of the item in the alternative, or None if the rule cannot be iterated
+        """
+        if len(rule.alternatives) != 1:
+            return None
+        items = rule.alternatives[0].items
+        for i in reversed(range(len(items))):
+            if isinstance(items[i], (ZeroOrMore, OneOrMore, SepBy, MaybeSepBy)):
+                return i
+        return None
+
+    def _generate_iterator_items(self, items: List[AbstractItem], fprint):
+        for group, cond, can_fail in self._fuse_terminals(items):
+            if self.prune_memo and isinstance(group[0], CutItem):
+                cond = "cut = self._commit()"
+            if self.use_exceptions or not can_fail:
+                fprint(f"            {cond}")
+            else:
+                fprint(f"            if {cond} is FAILURE:")
+                fprint(f"                raise self.make_farthest_error()")
+
+    def _generate_rule_iterator(self, rule: Rule, fprint):
+        """
+        Generate the iter_<rule> method of an iterable rule, which matches the items of the rule but yields the elements
+        of its repetition as they are matched instead of building its node, freeing their memo entries along the way
+        (see RawTextParser._iter_repeat)
+        """
+        index = self._iterated_item(rule)
+        if index is None:
+            raise ValueError(f"rule {rule.name} cannot be iterated, since it is not a single sequence of items with a "
+                             f"repeated item")
+        items = rule.alternatives[0].items
+        repetition = items[index]
+        if isinstance(repetition, (ZeroOrMore, OneOrMore)):
+            minimum = 1 if isinstance(repetition, OneOrMore) else 0
+            call = f"self._iter_repeat({minimum}, lambda: {repetition.inner_item.generate_condition()})"
+        else:
+            minimum = 1 if isinstance(repetition, SepBy) else 0
+            call = f"self._iter_sep_by(lambda: {repetition.element_item.generate_condition()}, " \
+                   f"lambda: {repetition.separator_item.generate_condition()}, {minimum})"
+        fprint(f"    def iter_{rule.name}(self):")
+        fprint(f"        cut = False")
+        fprint(f"        try:")
+        self._generate_iterator_items(items[:index], fprint)
+        fprint(f"            yield from {call}")
+        self._generate_iterator_items(items[index + 1:], fprint)
+        fprint(f"        except ParseError as e:")
+        fprint(f"            if cut is True:")
+        fprint(f"                raise CutError.from_error(e)")
+        fprint(f"            raise")
+
+    def _generate_regexes(self, grammar: Grammar, fprint):
+        patterns = []
+        for item in grammar.iter_items():
+            if isinstance(item, RegexItem) and item.pattern_literal() not in patterns:
+                patterns.append(item.pattern_literal())
+        for rule in grammar.rules:
+            literals = self._literal_choices(rule)
+            if literals is not None:
+                pattern = repr(literal_choice_regex(literal.value() for literal in literals))
+                if pattern not in patterns:
+                    patterns.append(pattern)
+        fprint(f"    regexes = {{")
+        for pattern in patterns:
+            fprint(f"        {pattern}: compile_regex({pattern}),")
+        fprint(f"    }}")
         fprint()
 
+    @staticmethod
+    def _generate_pattern_settings(grammar: Grammar, fprint):
+        for setting, attribute in _PATTERN_SETTINGS:
+            if setting in grammar.settings:
+                pattern = grammar.settings[setting]
+                if not isinstance(pattern, str):
+                    raise ValueError(f"the {setting} setting must be given a regex pattern")
+                fprint(f"    {attribute} = {RegexItem(pattern).pattern_literal()}")
+
+    def _generate_terminal_sequences(self, fprint):
+        fprint(f"    terminal_sequences = (")
+        for calls in self.terminal_sequences:
+            items = ", ".join(f"({method!r}, {argument})" for method, argument in calls)
+            fprint(f"        ({items}{',' if len(calls) == 1 else ''}),")
+        fprint(f"    )")
+
     def generate_parser(self, grammar: Grammar, class_name: str = None, file: TextIO = None):
         class_name = class_name or "Parser"
         file = file or sys.stdout
+        unknown_rules = set(self.iterable_rules) - {rule.name for rule in grammar.rules}
+        if unknown_rules:
+            raise ValueError(f"unknown iterable rules: {', '.join(sorted(unknown_rules))}")
+        self.terminal_sequences = []
 
         def fprint(*args, **kwargs):
             print(*args, **kwargs, file=file)
 
-        fprint(dedent("""\
-        from pegomancy.parse import \\
-            CutError, \\
-            ParseError, \\
-            RawTextParser, \\
-            parsing_rule, \\
-            left_recursive_parsing_rule
-        """))
+        # Rules are generated first, since generating them collects the terminal sequences declared before them
+        rules = io.StringIO()
+
+        def rprint(*args, **kwargs):
+            print(*args, **kwargs, file=rules)
+
+        if self.use_exceptions:
+            fprint(dedent("""\
+            from pegomancy.parse import \\
+                CutError, \\
+                ParseError, \\
+                RawTextParser, \\
+                parsing_rule, \\
+                left_recursive_parsing_rule
+            """))
+            base_class = "RawTextParser"
+        else:
+            fprint(dedent("""\
+            from pegomancy.parse import \\
+                END_OF_INPUT, \\
+                FAILURE, \\
+                CutError, \\
+                ParseError, \\
+                SentinelTextParser, \\
+                sentinel_parsing_rule, \\
+                sentinel_left_recursive_parsing_rule
+            """))
+            base_class = "SentinelTextParser"
+        if self.instrument:
+            prefix = "" if self.use_exceptions else "sentinel_"
+            fprint(dedent(f"""\
+            from pegomancy.instrument import \\
+                InstrumentedMixin, \\
+                instrumented_rule, \\
+                {prefix}instrumented_parsing_rule, \\
+                {prefix}instrumented_left_recursive_parsing_rule
+            """), end="")
+            base_class = f"InstrumentedMixin, {base_class}"
+        if self.prune_memo:
+            fprint("from pegomancy.parse import MemoPruningMixin, choice_point")
+            base_class = f"MemoPruningMixin, {base_class}"
+        elif self.iterable_rules:
+            fprint("from pegomancy.memo import PrunableMemoTable")
         fprint("from pegomancy.grammar_items import ItemAttributes")
+        fprint("from pegomancy.reader import compile_regex")
         for verbatim in grammar.prelude:
             fprint(verbatim)
         fprint("\n")
-        fprint(f"class {class_name}(RawTextParser):")
-        rules = grammar.rules
-        for rule in rules:
-            self._generate_rule(rule, fprint)
+        fprint(f"class {class_name}({base_class}):")
+        self._generate_regexes(grammar, fprint)
+        memoized_rules = grammar.memoized_rules()
+        rule_ids = {}
+        for rule in grammar.rules:
+            if rule.name in memoized_rules:
+                rule_ids[rule.name] = len(rule_ids)
+        grammar_first_sets = grammar.first_sets()
+        nullable = grammar.nullable_rules()
+        for index, rule in enumerate(grammar.rules):
+            first_sets = [grammar.alternative_first_set(alt, grammar_first_sets, nullable) for alt in rule.alternatives]
+            # Alternatives skipped by the dispatch on the next character do not record their expected terminals, so
+            # the sentinel rules record them all when they fail, for the farthest failure to remain accurate
+            expected_terminals = []
+            for alt, first in zip(rule.alternatives, first_sets):
+                if first is not None:
+                    for terminal in grammar.leading_terminals(alt.items, nullable):
+                        if terminal not in expected_terminals:
+                            expected_terminals.append(terminal)
+            rprint()
+            self._generate_rule(rule, index, rule_ids.get(rule.name), first_sets, expected_terminals, rprint)
+            if rule.name in self.iterable_rules:
+                rprint()
+                self._generate_rule_iterator(rule, rprint)
+        self._generate_terminal_sequences(fprint)
+        fprint(f"    rule_count = {len(rule_ids)}")
+        fprint(f"    memoized_rules = {tuple(rule_ids)!r}")
+        if self.instrument:
+            fprint(f"    instrumented_rules = {tuple(rule.name for rule in grammar.rules)!r}")
+        self._generate_pattern_settings(grammar, fprint)
+        if self.iterable_rules and not self.prune_memo:
+            # Iterating over a rule frees the memo entries of the elements it yielded
+            fprint(f"    memo_table_class = PrunableMemoTable")
+        fprint(rules.getvalue(), end="")
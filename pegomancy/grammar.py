@@ -1,8 +1,15 @@
-from dataclasses import dataclass, field
+import ast
+from dataclasses import dataclass, field, replace
 from textwrap import dedent
-from typing import List
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
 
 from .grammar_parser import GrammarParser
+from .reader import compile_regex
 from .grammar_items import ItemAttributes, AbstractItem, NestedItemMixin
 
 
@@ -11,7 +18,7 @@ class GrammarParserRuleHandler:
         self.synthesized_rules = []
 
     def _synthesize_rule(self, alts):
-        rule = Rule(f"synthesized_rule_{len(self.synthesized_rules)}", alts)
+        rule = Rule(f"synthesized_rule_{len(self.synthesized_rules)}", alts, synthesized=True)
         self.synthesized_rules.append(rule)
         return rule.name
 
@@ -83,10 +90,15 @@ class GrammarParserRuleHandler:
         alts = node.get("alts") or []
         return alts + [node.get("alt")]
 
+    @staticmethod
+    def rule_flag(node):
+        return node["flag"]
+
     @staticmethod
     def rule(node):
         alts = node["alts"]
-        return Rule(node["name"], alts)
+        flag = node.get("flag")
+        return Rule(node["name"], alts, memoize=None if flag is None else flag == "memo")
 
     @staticmethod
     def verbatim_block(node):
@@ -94,13 +106,14 @@ class GrammarParserRuleHandler:
 
     @staticmethod
     def setting(node):
-        return node["setting"]
+        value = node["value"].target if node["value"] is not None else True
+        return node["setting"], value
 
     def grammar(self, node):
         verbatim = node["verbatim"]
-        settings = {setting: True for setting in node["settings"]}
+        settings = dict(node["settings"])
         rules = self.synthesized_rules + node["rules"]
-        return Grammar(verbatim, rules, **settings)
+        return Grammar(verbatim, rules, settings)
 
 
 @dataclass
@@ -108,9 +121,12 @@ class RegexItem(AbstractItem):
     target: str
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
-    def generate_condition(self) -> str:
+    def pattern_literal(self) -> str:
         v = self.target.replace("'", "\\'")
-        return f"self.expect_regex(r'{v}')"
+        return f"r'{v}'"
+
+    def generate_condition(self) -> str:
+        return f"self.expect_regex({self.pattern_literal()})"
 
 
 @dataclass
@@ -118,9 +134,18 @@ class LiteralItem(AbstractItem):
     target: str
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
-    def generate_condition(self) -> str:
+    def literal_code(self) -> str:
         v = self.target.replace("'", "\\'")
-        return f"self.expect_string('{v}')"
+        return f"'{v}'"
+
+    def value(self) -> str:
+        """
+        Compute the string matched by the literal, whose escape sequences are interpreted by the generated code
+        """
+        return ast.literal_eval(self.literal_code())
+
+    def generate_condition(self) -> str:
+        return f"self.expect_string({self.literal_code()})"
 
 
 @dataclass
@@ -137,6 +162,13 @@ class Maybe(AbstractItem, NestedItemMixin):
     inner_item: AbstractItem
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.inner_item]
+
+    @staticmethod
+    def can_fail() -> bool:
+        return False
+
     def generate_condition(self) -> str:
         return f"self._maybe(lambda: {self.inner_item.generate_condition()})"
 
@@ -146,6 +178,13 @@ class ZeroOrMore(AbstractItem, NestedItemMixin):
     inner_item: AbstractItem
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.inner_item]
+
+    @staticmethod
+    def can_fail() -> bool:
+        return False
+
     def generate_condition(self) -> str:
         return f"self._repeat(0, lambda: {self.inner_item.generate_condition()})"
 
@@ -155,6 +194,9 @@ class OneOrMore(AbstractItem, NestedItemMixin):
     inner_item: AbstractItem
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.inner_item]
+
     def generate_condition(self) -> str:
         return f"self._repeat(1, lambda: {self.inner_item.generate_condition()})"
 
@@ -165,6 +207,9 @@ class SepBy(AbstractItem, NestedItemMixin):
     separator_item: AbstractItem
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.element_item, self.separator_item]
+
     def generate_condition(self) -> str:
         return f"self._sep_by(lambda: {self.element_item.generate_condition()}, lambda: {self.separator_item.generate_condition()})"
 
@@ -175,6 +220,13 @@ class MaybeSepBy(AbstractItem, NestedItemMixin):
     separator_item: AbstractItem
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.element_item, self.separator_item]
+
+    @staticmethod
+    def can_fail() -> bool:
+        return False
+
     def generate_condition(self) -> str:
         return f"self._maybe_sep_by(lambda: {self.element_item.generate_condition()}, lambda: {self.separator_item.generate_condition()})"
 
@@ -184,6 +236,9 @@ class Lookahead(AbstractItem, NestedItemMixin):
     inner_item: AbstractItem
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.inner_item]
+
     def generate_condition(self) -> str:
         return f"self._lookahead(lambda: {self.inner_item.generate_condition()})"
 
@@ -193,6 +248,9 @@ class NegativeLookahead(AbstractItem, NestedItemMixin):
     inner_item: AbstractItem
     attributes: ItemAttributes = field(default_factory=ItemAttributes)
 
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.inner_item]
+
     def generate_condition(self) -> str:
         return f"self._not_lookahead(lambda: {self.inner_item.generate_condition()})"
 
@@ -201,6 +259,10 @@ class NegativeLookahead(AbstractItem, NestedItemMixin):
 class CutItem(AbstractItem):
     attributes: ItemAttributes = field(default_factory=lambda: ItemAttributes(ignore=True))
 
+    @staticmethod
+    def can_fail() -> bool:
+        return False
+
     def generate_condition(self) -> str:
         return f"cut = True"
 
@@ -213,15 +275,54 @@ class EOFItem(AbstractItem):
         return f"self.expect_eof()"
 
 
+@dataclass
+class InlinedRuleItem(AbstractItem, NestedItemMixin):
+    """
+    Application of a rule made of a single item, matching this item in place (see optimize.inline_rules)
+    """
+    rule_name: str
+    inner_item: AbstractItem
+    attributes: ItemAttributes = field(default_factory=ItemAttributes)
+
+    def sub_items(self) -> List[AbstractItem]:
+        return [self.inner_item]
+
+    def generate_condition(self) -> str:
+        attributes = self.inner_item.attributes
+        if attributes.is_named() or attributes.is_ignored():
+            return f"self._inlined_node({self.rule_name!r}, {self.inner_item.generate_condition()}, {attributes!r})"
+        return f"self._inlined_node({self.rule_name!r}, {self.inner_item.generate_condition()})"
+
+
 @dataclass
 class Alternative:
     items: List
+    # Number of leading items shared with the previous alternative of the rule, matched only once by the generated
+    # parser (see Grammar.left_factored)
+    shared_prefix: int = 0
 
 
 @dataclass
 class Rule:
     name: str
     alternatives: List[Alternative]
+    # Whether the rule was explicitly marked as memoized or not, None if this is left to the grammar analysis
+    memoize: Optional[bool] = None
+    # Whether the rule was synthesized from a parenthesized group of alternatives
+    synthesized: bool = False
+
+    def referenced_rules(self) -> Set[str]:
+        """
+        Collect the names of the rules applied by the rule
+
+        :return:                    the names of the rules
+        """
+        return {
+            item.rule_name
+            for alt in self.alternatives
+            for item in _walk_items(alt.items)
+            if isinstance(item, RuleItem)
+        }
 
     def is_left_recursive(self) -> bool:
         for alt in self.alternatives:
@@ -233,10 +334,385 @@ class Rule:
         return False
 
 
+def _common_prefix_length(items: List[AbstractItem], other_items: List[AbstractItem]) -> int:
+    """
+    Compute the number of leading items matched the same way by two sequences of items, up to the first cut
+    """
+    length = 0
+    for item, other_item in zip(items, other_items):
+        if isinstance(item, CutItem) or item.generate_condition() != other_item.generate_condition():
+            break
+        length += 1
+    return length
+
+
+def _walk_items(items: List[AbstractItem]) -> Iterator[AbstractItem]:
+    for item in items:
+        yield item
+        yield from _walk_items(item.sub_items())
+
+
+def _leading_items(items: List[AbstractItem], nullable_rules: Set[str]) -> Iterator[AbstractItem]:
+    """
+    Iterate over the items that may be applied at the position where a sequence of items starts
+    """
+    for item in items:
+        yield item
+        if isinstance(item, (SepBy, MaybeSepBy)):
+            yield from _leading_items([item.element_item], nullable_rules)
+        else:
+            yield from _leading_items(item.sub_items(), nullable_rules)
+        if not _is_nullable(item, nullable_rules):
+            break
+
+
+def _is_nullable(item: AbstractItem, nullable_rules: Set[str]) -> bool:
+    """
+    Check whether an item may succeed without consuming any input
+    """
+    if isinstance(item, (Maybe, ZeroOrMore, MaybeSepBy, Lookahead, NegativeLookahead, CutItem, EOFItem)):
+        return True
+    if isinstance(item, (OneOrMore, SepBy, InlinedRuleItem)):
+        return _is_nullable(item.sub_items()[0], nullable_rules)
+    if isinstance(item, RuleItem):
+        return item.rule_name in nullable_rules
+    if isinstance(item, LiteralItem):
+        return item.value() == ""
+    if isinstance(item, RegexItem):
+        return compile_regex(item.target).match("") is not None
+    return False
+
+
+# Character standing for the end of the source text in FIRST sets
+END_OF_TEXT = ""
+
+
+def _regex_nodes_first_chars(nodes) -> Tuple[Optional[Set[str]], bool]:
+    first = set()
+    for op, av in nodes:
+        chars, nullable = _regex_node_first_chars(op, av)
+        if chars is None:
+            return None, nullable
+        first |= chars
+        if not nullable:
+            return first, False
+    return first, True
+
+
+def _regex_node_first_chars(op, av) -> Tuple[Optional[Set[str]], bool]:
+    if op is sre_parse.LITERAL:
+        return {chr(av)}, False
+    if op is sre_parse.IN:
+        chars = set()
+        for set_op, set_av in av:
+            if set_op is sre_parse.LITERAL:
+                chars.add(chr(set_av))
+            elif set_op is sre_parse.RANGE and set_av[1] - set_av[0] < 256:
+                chars.update(map(chr, range(set_av[0], set_av[1] + 1)))
+            else:
+                return None, False
+        return chars, False
+    if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None)):
+        minimum, _, sub_pattern = av
+        chars, nullable = _regex_nodes_first_chars(sub_pattern)
+        return chars, nullable or minimum == 0
+    if op is sre_parse.SUBPATTERN:
+        _, add_flags, _, sub_pattern = av
+        if add_flags & sre_parse.SRE_FLAG_IGNORECASE:
+            return None, False
+        return _regex_nodes_first_chars(sub_pattern)
+    if op is getattr(sre_parse, "ATOMIC_GROUP", None):
+        return _regex_nodes_first_chars(av)
+    if op is sre_parse.BRANCH:
+        first, any_nullable = set(), False
+        for branch in av[1]:
+            chars, nullable = _regex_nodes_first_chars(branch)
+            if chars is None:
+                return None, False
+            first |= chars
+            any_nullable = any_nullable or nullable
+        return first, any_nullable
+    if op in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+        # Zero-width assertions do not consume the first character
+        return set(), True
+    return None, False
+
+
+def _regex_first_chars(regex: str) -> Optional[FrozenSet[str]]:
+    """
+    Compute the characters a regex pattern may start its matches with
+
+    Only the simple constructs are analyzed (literals, character ranges, repetitions, groups and branches): for
+    anything else (e.g. '.', negated sets or character classes such as '\\w'), any character is assumed possible.
+
+    :param regex:               the pattern to analyze
+    :return:                    the set of characters, or None if any character may start a match
+    """
+    if regex.startswith("^"):
+        regex = regex[1:]
+    try:
+        parsed = sre_parse.parse(regex, compile_regex(regex).flags)
+    except Exception:
+        return None
+    if parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE:
+        return None
+    chars, nullable = _regex_nodes_first_chars(list(parsed))
+    if chars is None or nullable:
+        return None
+    return frozenset(chars)
+
+
+def _first_chars(
+        items: List[AbstractItem],
+        first_sets: Dict[str, Optional[FrozenSet[str]]],
+        nullable_rules: Set[str],
+) -> Optional[FrozenSet[str]]:
+    """
+    Compute the characters a sequence of items may start with (its FIRST set), END_OF_TEXT standing for the end of
+    the source text, or None if the sequence may start with any character
+    """
+    first = frozenset()
+    for item in items:
+        if isinstance(item, LiteralItem):
+            chars = frozenset(item.value()[:1])
+        elif isinstance(item, RegexItem):
+            chars = _regex_first_chars(item.target)
+        elif isinstance(item, RuleItem):
+            chars = first_sets[item.rule_name]
+        elif isinstance(item, EOFItem):
+            chars = frozenset(END_OF_TEXT)
+        elif isinstance(item, (NegativeLookahead, CutItem)):
+            chars = frozenset()
+        elif isinstance(item, (SepBy, MaybeSepBy)):
+            chars = _first_chars([item.element_item], first_sets, nullable_rules)
+        else:
+            chars = _first_chars(item.sub_items(), first_sets, nullable_rules)
+        if chars is None:
+            return None
+        first |= chars
+        if not _is_nullable(item, nullable_rules):
+            break
+    return first
+
+
 @dataclass
 class Grammar:
     prelude: List
     rules: List[Rule]
+    settings: Dict[str, object] = field(default_factory=dict)
+
+    def rule_by_name(self, name: str) -> Rule:
+        for rule in self.rules:
+            if rule.name == name:
+                return rule
+        raise KeyError(name)
+
+    def nullable_rules(self) -> Set[str]:
+        """
+        Compute the set of rules that may succeed without consuming any input
+
+        :return:                    the names of the nullable rules
+        """
+        nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for rule in self.rules:
+                if rule.name in nullable:
+                    continue
+                if any(all(_is_nullable(item, nullable) for item in alt.items) for alt in rule.alternatives):
+                    nullable.add(rule.name)
+                    changed = True
+        return nullable
+
+    def first_sets(self) -> Dict[str, Optional[FrozenSet[str]]]:
+        """
+        Compute the FIRST set of every rule, that is the characters its matches may start with (after any
+        non-significant text), END_OF_TEXT standing for the end of the source text
+
+        :return:                    a dictionary mapping rule names to their FIRST set, or to None if the rule may
+                                    start with any character
+        """
+        nullable = self.nullable_rules()
+        first_sets = {rule.name: frozenset() for rule in self.rules}
+        changed = True
+        while changed:
+            changed = False
+            for rule in self.rules:
+                if first_sets[rule.name] is None:
+                    continue
+                first = frozenset()
+                for alt in rule.alternatives:
+                    chars = _first_chars(alt.items, first_sets, nullable)
+                    if chars is None:
+                        first = None
+                        break
+                    first |= chars
+                if first != first_sets[rule.name]:
+                    first_sets[rule.name] = first
+                    changed = True
+        return first_sets
+
+    def alternative_first_set(
+            self,
+            alt: Alternative,
+            first_sets: Dict[str, Optional[FrozenSet[str]]],
+            nullable: Set[str],
+    ) -> Optional[FrozenSet[str]]:
+        """
+        Compute the characters the matches of an alternative may start with
+
+        :param alt:                 the alternative
+        :param first_sets:          the FIRST sets of the rules, as computed by first_sets
+        :param nullable:            the nullable rules, as computed by nullable_rules
+        :return:                    the FIRST set of the alternative, or None if it may start with any character or
+                                    match without consuming any input
+        """
+        if all(_is_nullable(item, nullable) for item in alt.items):
+            return None
+        return _first_chars(alt.items, first_sets, nullable)
+
+    def leading_terminals(self, items: List[AbstractItem], nullable: Set[str]) -> List[AbstractItem]:
+        """
+        Collect the terminals (literals, regexes and end of file markers) that may be applied at the position where
+        a sequence of items starts, following the rules applied there
+
+        :param items:               the sequence of items
+        :param nullable:            the nullable rules, as computed by nullable_rules
+        :return:                    the terminals, without duplicates
+        """
+        terminals = []
+        visited = set()
+        pending = [items]
+        while pending:
+            for item in _leading_items(pending.pop(0), nullable):
+                if isinstance(item, RuleItem) and item.rule_name not in visited:
+                    visited.add(item.rule_name)
+                    pending.extend(alt.items for alt in self.rule_by_name(item.rule_name).alternatives)
+                elif isinstance(item, (LiteralItem, RegexItem, EOFItem)) and item not in terminals:
+                    terminals.append(item)
+        return terminals
+
+    def _leading_rules(self, items: List[AbstractItem], nullable: Set[str], stop: Set[str]) -> Set[str]:
+        """
+        Compute the rules that may be applied at the position where a sequence of items starts, following the
+        rules applied there transitively unless they belong to the stop set
+        """
+        leading = set()
+        pending = [items]
+        while pending:
+            for item in _leading_items(pending.pop(), nullable):
+                if isinstance(item, RuleItem) and item.rule_name not in leading:
+                    leading.add(item.rule_name)
+                    if item.rule_name not in stop:
+                        pending.extend(alt.items for alt in self.rule_by_name(item.rule_name).alternatives)
+        return leading
+
+    def _shared_prefix_rules(self, rule: Rule, stop: Set[str]) -> Set[str]:
+        """
+        Compute the rules applied within a common prefix of several alternatives of a rule (which are thus applied
+        several times at the same position), expanding the rules these alternatives start with unless they belong to
+        the stop set
+        """
+        sequences = []
+        pending = [(alt.items, {rule.name}) for alt in rule.alternatives]
+        while pending and len(sequences) < 256:
+            items, expanded = pending.pop(0)
+            sequences.append(items)
+            first = items[0]
+            if isinstance(first, RuleItem) and first.rule_name not in stop | expanded:
+                for alt in self.rule_by_name(first.rule_name).alternatives:
+                    pending.append((alt.items + items[1:], expanded | {first.rule_name}))
+        keys = [[item.generate_condition() for item in items] for items in sequences]
+        shared_rules = set()
+        for i, (items, key) in enumerate(zip(sequences, keys)):
+            for other_key in keys[i + 1:]:
+                common = 0
+                while common < min(len(key), len(other_key)) and key[common] == other_key[common]:
+                    common += 1
+                for item in _walk_items(items[:common]):
+                    if isinstance(item, RuleItem):
+                        shared_rules.add(item.rule_name)
+        return shared_rules
+
+    def memoized_rules(self) -> Set[str]:
+        """
+        Decide which rules need to be memoized
+
+        Left-recursive rules are always memoized, since the memoization table is what stops their recursion.
+        The memoize_all setting memoizes every rule, while the memoize_none setting only memoizes left-recursive
+        rules. Otherwise, the other rules are memoized if they may be applied several times at the same position:
+        - because they may be reached from several alternatives of a rule (that are tried at the same position)
+        - because they may be reached from an alternative of a left-recursive rule (whose alternatives are tried
+          again each time its result grows)
+        - because they may be reached from a lookahead (which rewinds to where it started)
+        Finally, rules explicitly marked with (memo) or (nomemo) are respectively memoized or not.
+
+        :return:                    the names of the rules to memoize
+        """
+        left_recursive = {rule.name for rule in self.rules if rule.is_left_recursive()}
+        explicit = {rule.name for rule in self.rules if rule.memoize is True}
+        memoized = left_recursive | explicit
+        if self.settings.get("memoize_all"):
+            memoized = {rule.name for rule in self.rules}
+        elif not self.settings.get("memoize_none"):
+            nullable = self.nullable_rules()
+            while True:
+                needed = set()
+                for rule in self.rules:
+                    seen = set()
+                    for alt in rule.alternatives:
+                        leading = self._leading_rules(alt.items, nullable, stop=memoized)
+                        needed |= leading & seen
+                        seen |= leading
+                    if rule.name in left_recursive:
+                        needed |= seen
+                    needed |= self._shared_prefix_rules(rule, stop=memoized)
+                for item in self.iter_items():
+                    if isinstance(item, (Lookahead, NegativeLookahead)):
+                        needed |= self._leading_rules([item.inner_item], nullable, stop=memoized)
+                needed -= memoized
+                if not needed:
+                    break
+                # Memoizing a rule prevents the rules it leads to from being applied again, so only memoize the
+                # outermost rules before looking for the rules that still need it
+                reached = set()
+                for name in needed:
+                    for alt in self.rule_by_name(name).alternatives:
+                        reached |= self._leading_rules(alt.items, nullable, stop=memoized)
+                memoized |= (needed - reached) or needed
+        not_memoized = {rule.name for rule in self.rules if rule.memoize is False}
+        return memoized - (not_memoized - left_recursive)
+
+    def iter_items(self) -> Iterator[AbstractItem]:
+        """
+        Iterate over all the items of the grammar, including nested ones
+
+        :return:                    an iterator over the items
+        """
+        for rule in self.rules:
+            for alt in rule.alternatives:
+                yield from _walk_items(alt.items)
+
+    def left_factored(self) -> 'Grammar':
+        """
+        Factor the prefixes shared by consecutive alternatives of the rules, so that the generated parser only matches
+        them once before trying the rest of each alternative in turn
+
+        Since matching the same items at the same position always gives the same result, the ordered choice semantics
+        are kept, and each alternative still builds its node using its own item attributes. Prefixes stop before cuts,
+        so that a cut still only commits to the alternative it appears in.
+
+        :return:                    the left-factored grammar
+        """
+        rules = []
+        for rule in self.rules:
+            alternatives = []
+            for i, alt in enumerate(rule.alternatives):
+                shared_prefix = _common_prefix_length(rule.alternatives[i - 1].items, alt.items) if i > 0 else 0
+                alternatives.append(replace(alt, shared_prefix=shared_prefix))
+            rules.append(replace(rule, alternatives=alternatives))
+        return replace(self, rules=rules)
 
     @staticmethod
     def from_specification(text: str) -> 'Grammar':
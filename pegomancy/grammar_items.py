@@ -1,4 +1,5 @@
 from abc import abstractmethod, ABCMeta
+from typing import List
 
 
 class ItemAttributes:
@@ -25,6 +26,13 @@ class AbstractItem(metaclass=ABCMeta):
     def is_nested() -> bool:
         return False
 
+    def sub_items(self) -> List['AbstractItem']:
+        return []
+
+    @staticmethod
+    def can_fail() -> bool:
+        return True
+
 
 class NestedItemMixin:
     @staticmethod
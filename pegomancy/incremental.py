@@ -0,0 +1,131 @@
+from functools import lru_cache
+from typing import Type, Union
+
+from .memo import IncrementalMemoTable
+from .parse import BaseParseError, RawTextParser, SentinelTextParser
+from .reader import TrackingBufferReader, TrackingReader
+
+
+class IncrementalParsingMixin:
+    """
+    Mixin for parsers whose results can be reused to parse the source text again once it was edited (see
+    IncrementalParser)
+
+    The parser records how far each memoized rule examined the text (see memo.IncrementalMemoTable): after an edit,
+    the results of the rules that examined the edited text are discarded, while the others are kept (and moved along
+    with the text after the edit), so that parsing the new text only applies the rules again around the edit. The
+    results are moved to the parser of the new text rather than copied, so that an edit takes a time depending on its
+    size rather than on the size of the text.
+    Only the results of memoized rules are reused, so grammars parsed incrementally benefit from memoizing most of
+    their rules (using @set memoize_all, or (memo) on the rules matching large parts of the text).
+
+    The results of the rules are reused as they are: they should not hold positions in the text, which would not be
+    updated when the text before them is edited.
+    """
+
+    reader_class = TrackingReader
+    buffer_reader_class = TrackingBufferReader
+    memo_table_class = IncrementalMemoTable
+
+    def __init__(self, text, *args, **kwargs):
+        super().__init__(text, *args, **kwargs)
+        if not isinstance(self.memo, IncrementalMemoTable):
+            raise ValueError("incremental parsers cannot evict memoized results")
+        self.memo.reader = self.reader
+        # Arguments of the parser, to create the parsers of the edited text
+        self.args = args
+        self.kwargs = kwargs
+
+    def parse(self, rule_name: str):
+        try:
+            return super().parse(rule_name)
+        except BaseParseError:
+            self.memo.abandon()
+            raise
+
+    def edited(self, offset: int, removed_length: int, inserted_text: Union[str, bytes]):
+        """
+        Create the parser of the text resulting from an edit, reusing the results of the rules that did not examine
+        the edited text
+
+        The results are moved to the new parser: this parser must not be used anymore.
+
+        :param offset:              the offset of the edit
+        :param removed_length:      the length of the text removed at the offset
+        :param inserted_text:       the text inserted at the offset (encoded if the source text is, or encoded using
+                                    the encoding of the reader)
+        :return:                    the new parser, whose rules may then be applied to the new text
+        """
+        text = self.reader.text
+        if offset < 0 or removed_length < 0 or offset + removed_length > len(text):
+            raise ValueError("the edited text is out of the source text")
+        if isinstance(text, str):
+            new_text = text[:offset] + inserted_text + text[offset + removed_length:]
+        else:
+            if isinstance(inserted_text, str):
+                inserted_text = inserted_text.encode(self.reader.encoding)
+            new_text = b"".join((text[:offset], inserted_text, text[offset + removed_length:]))
+        parser = type(self)(new_text, *self.args, **self.kwargs)
+        self.memo.edit(offset, offset + removed_length, len(inserted_text), lookbehind=self.reader.lookbehind)
+        parser.memo = self.memo
+        parser.memo.reader = parser.reader
+        # Rules reused after the edit may have examined text before their position
+        parser.reader.lookbehind = self.reader.lookbehind
+        return parser
+
+
+@lru_cache(maxsize=None)
+def _incremental_parser_class(parser_class: Type[RawTextParser]) -> Type[RawTextParser]:
+    return type(f"Incremental{parser_class.__name__}", (IncrementalParsingMixin, parser_class), {})
+
+
+class IncrementalParser:
+    """
+    Class parsing a source text again each time it is edited, such as a document open in an editor, reusing the
+    results of the rules that the edits did not affect (see IncrementalParsingMixin)
+    """
+
+    def __init__(self, parser_class: Type[RawTextParser], rule_name: str, text, *args, **kwargs):
+        """
+        :param parser_class:        the class of the parser
+        :param rule_name:           the name of the rule parsing the whole text
+        :param text:                the source text
+        :param args:                the other arguments of the parser
+        :param kwargs:              the other keyword arguments of the parser
+        """
+        self.parser_class = parser_class
+        self.rule_name = rule_name
+        self.parser = _incremental_parser_class(parser_class)(text, *args, **kwargs)
+
+    @property
+    def text(self):
+        return self.parser.reader.text
+
+    def parse(self):
+        """
+        Parse the current text
+
+        Parsers generated without exceptions describe the farthest failure when parsing fails, which the failures
+        reused from a previous parse do not account for: the text is then parsed again from scratch to report it.
+
+        :return:                    the result of the rule
+        """
+        self.parser.rewind(0)
+        try:
+            return self.parser.parse(self.rule_name)
+        except BaseParseError:
+            if isinstance(self.parser, SentinelTextParser):
+                self.parser_class(self.text, *self.parser.args, **self.parser.kwargs).parse(self.rule_name)
+            raise
+
+    def edit(self, offset: int, removed_length: int, inserted_text: Union[str, bytes]):
+        """
+        Edit the text and parse it again
+
+        :param offset:              the offset of the edit
+        :param removed_length:      the length of the text removed at the offset
+        :param inserted_text:       the text inserted at the offset
+        :return:                    the result of the rule on the new text
+        """
+        self.parser = self.parser.edited(offset, removed_length, inserted_text)
+        return self.parse()
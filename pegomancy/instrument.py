@@ -0,0 +1,290 @@
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from io import StringIO
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from .generate import ParserGenerator
+from .grammar import Grammar
+from .memo import FAILURE
+from .parse import BaseParseError, _left_recursive_parsing_rule, _parsing_rule
+
+
+@dataclass
+class RuleStats:
+    """
+    Class gathering the statistics of the applications of a rule
+    """
+    calls: int = 0
+    # Calls whose result was memoized, and calls that applied the rule (only counted for memoized rules)
+    memo_hits: int = 0
+    memo_misses: int = 0
+    # Calls that failed, returning FAILURE or raising an error
+    failures: int = 0
+    # Rewinds of the cursor before its position, while applying the rule itself rather than the rules it applied
+    rewinds: int = 0
+    # Applications of the alternatives of a left-recursive rule while growing its seed
+    growths: int = 0
+    # Time spent applying the rule, excluding the rules it applied
+    self_time: float = 0.0
+    # Time spent applying the rule, including the rules it applied (recursive applications being counted once)
+    cumulative_time: float = 0.0
+    # Results of the rule held by the memoization table at the end of parsing, and the memory used to store them
+    memo_entries: int = 0
+    memo_memory: int = 0
+
+    def merge(self, other: 'RuleStats'):
+        self.calls += other.calls
+        self.memo_hits += other.memo_hits
+        self.memo_misses += other.memo_misses
+        self.failures += other.failures
+        self.rewinds += other.rewinds
+        self.growths += other.growths
+        self.self_time += other.self_time
+        self.cumulative_time += other.cumulative_time
+        self.memo_entries += other.memo_entries
+        self.memo_memory = max(self.memo_memory, other.memo_memory)
+
+
+@dataclass
+class RuleReport:
+    """
+    Class gathering the statistics of the rules of a grammar, over one or several parses
+    """
+    rules: Dict[str, RuleStats] = field(default_factory=dict)
+
+    def merge(self, other: 'RuleReport'):
+        for name, stats in other.rules.items():
+            self.rules.setdefault(name, RuleStats()).merge(stats)
+
+    def to_dict(self) -> dict:
+        return {name: asdict(stats) for name, stats in self.rules.items()}
+
+    def print_table(self, file: TextIO):
+        """
+        Print the statistics of the rules applied, the most costly first
+
+        :param file:                the file to print the table to
+        """
+        header = f"{'rule':<24} {'calls':>9} {'hits':>9} {'misses':>9} {'failures':>9} {'rewinds':>9} " \
+                 f"{'growths':>8} {'self (s)':>9} {'cumul (s)':>9} {'entries':>9} {'memory (KiB)':>12}"
+        print(header, file=file)
+        print("-" * len(header), file=file)
+        applied = [(name, stats) for name, stats in self.rules.items() if stats.calls]
+        for name, stats in sorted(applied, key=lambda item: -item[1].self_time):
+            print(
+                f"{name:<24} {stats.calls:>9} {stats.memo_hits:>9} {stats.memo_misses:>9} {stats.failures:>9} "
+                f"{stats.rewinds:>9} {stats.growths:>8} {stats.self_time:>9.4f} {stats.cumulative_time:>9.4f} "
+                f"{stats.memo_entries:>9} {stats.memo_memory / 1024:>12.1f}",
+                file=file,
+            )
+
+
+class InstrumentedMixin:
+    """
+    Mixin for parsers recording the statistics of the applications of their rules (see RuleStats)
+
+    The rules of the parsers generated with instrumentation are wrapped by the instrumented_* decorators, which time
+    each application and count its outcome, and rewinds of the cursor are attributed to the rule being applied. The
+    parsers generated without it are left as is, and pay nothing for it.
+    """
+
+    # Names of the instrumented rules, indexed by the indices given to their decorators
+    instrumented_rules = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rule_stats = [RuleStats() for _ in self.instrumented_rules]
+        # Applications of rules in progress, as [index of the rule, time spent in the rules it applied, number of
+        # times the undecorated rule was called]
+        self.rule_frames = []
+        # Number of applications in progress of each rule, for recursive applications to be timed once
+        self.rule_depths = [0] * len(self.instrumented_rules)
+
+    def rewind(self, pos: int):
+        if self.rule_frames and pos < self.reader.mark():
+            self.rule_stats[self.rule_frames[-1][0]].rewinds += 1
+        self.reader.rewind(pos)
+
+    def rule_report(self) -> RuleReport:
+        """
+        Report the statistics of the rules applied so far, along with the memo entries each rule holds
+
+        :return:                    the report
+        """
+        report = RuleReport()
+        rule_ids = {name: rule_id for rule_id, name in enumerate(self.memoized_rules)}
+        for name, stats in zip(self.instrumented_rules, self.rule_stats):
+            stats = RuleStats(**asdict(stats))
+            rule_id = rule_ids.get(name)
+            if rule_id is not None:
+                stats.memo_entries = self.memo.entry_count(rule_id)
+                stats.memo_memory = self.memo.rule_memory_usage(rule_id)
+            report.rules[name] = stats
+        return report
+
+
+def _evaluated_rule(f):
+    """
+    Wrap an undecorated rule to count its calls in the application of the rule in progress
+    """
+
+    @wraps(f)
+    def wrapped_func(self: InstrumentedMixin):
+        self.rule_frames[-1][2] += 1
+        return f(self)
+
+    return wrapped_func
+
+
+def _instrumented_rule(f, index: int, memoized: bool, left_recursive: bool):
+    @wraps(f)
+    def wrapped_func(self: InstrumentedMixin):
+        stats = self.rule_stats[index]
+        frames = self.rule_frames
+        depths = self.rule_depths
+        frame = [index, 0.0, 0]
+        frames.append(frame)
+        depths[index] += 1
+        failed = True
+        start = perf_counter()
+        try:
+            result = f(self)
+            failed = result is FAILURE
+            return result
+        finally:
+            elapsed = perf_counter() - start
+            frames.pop()
+            depths[index] -= 1
+            stats.calls += 1
+            stats.self_time += elapsed - frame[1]
+            if not depths[index]:
+                stats.cumulative_time += elapsed
+            if frames:
+                frames[-1][1] += elapsed
+            if failed:
+                stats.failures += 1
+            if memoized:
+                if frame[2]:
+                    stats.memo_misses += 1
+                else:
+                    stats.memo_hits += 1
+            if left_recursive:
+                stats.growths += frame[2]
+
+    return wrapped_func
+
+
+def instrumented_rule(index: int):
+    """
+    Wrap a parsing function that is not memoized to record the statistics of its calls
+
+    :param index:               the index of the rule in the instrumented rules of the parser
+    :return:                    the decorator wrapping the function
+    """
+    return lambda f: _instrumented_rule(f, index, memoized=False, left_recursive=False)
+
+
+def instrumented_parsing_rule(index: int, rule_id: int):
+    """
+    Wrap a parsing function to memoize its calls and record their statistics (see parsing_rule)
+
+    :param index:               the index of the rule in the instrumented rules of the parser
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    return lambda f: _instrumented_rule(
+        _parsing_rule(_evaluated_rule(f), rule_id, raising=True),
+        index,
+        memoized=True,
+        left_recursive=False,
+    )
+
+
+def instrumented_left_recursive_parsing_rule(index: int, rule_id: int):
+    """
+    Wrap a left-recursive parsing function to memoize its calls and record their statistics (see
+    left_recursive_parsing_rule)
+
+    :param index:               the index of the rule in the instrumented rules of the parser
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    return lambda f: _instrumented_rule(
+        _left_recursive_parsing_rule(_evaluated_rule(f), rule_id, raising=True),
+        index,
+        memoized=True,
+        left_recursive=True,
+    )
+
+
+def sentinel_instrumented_parsing_rule(index: int, rule_id: int):
+    """
+    Wrap a parsing function returning FAILURE instead of raising a ParseError to memoize its calls and record their
+    statistics (see sentinel_parsing_rule)
+
+    :param index:               the index of the rule in the instrumented rules of the parser
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    return lambda f: _instrumented_rule(
+        _parsing_rule(_evaluated_rule(f), rule_id, raising=False),
+        index,
+        memoized=True,
+        left_recursive=False,
+    )
+
+
+def sentinel_instrumented_left_recursive_parsing_rule(index: int, rule_id: int):
+    """
+    Wrap a left-recursive parsing function returning FAILURE instead of raising a ParseError to memoize its calls and
+    record their statistics (see sentinel_left_recursive_parsing_rule)
+
+    :param index:               the index of the rule in the instrumented rules of the parser
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    return lambda f: _instrumented_rule(
+        _left_recursive_parsing_rule(_evaluated_rule(f), rule_id, raising=False),
+        index,
+        memoized=True,
+        left_recursive=True,
+    )
+
+
+def instrument_grammar(
+        grammar: Grammar,
+        texts: Iterable[str],
+        rule_name: str,
+        *,
+        use_exceptions: bool = True,
+        errors: Optional[List[BaseParseError]] = None,
+        **parser_kwargs
+) -> RuleReport:
+    """
+    Parse a corpus of inputs with an instrumented parser of a grammar, gathering the statistics of its rules
+
+    :param grammar:                 the grammar
+    :param texts:                   the inputs
+    :param rule_name:               the name of the rule to parse the inputs with
+    :param use_exceptions:          whether the parser should be generated with exceptions or not
+    :param errors:                  a list to which the errors raised while parsing are added, if any
+    :param parser_kwargs:           additional arguments given to the parser (such as whitespace_regex)
+    :return:                        the statistics of the rules over the corpus
+    """
+    source = StringIO()
+    ParserGenerator(use_exceptions=use_exceptions, instrument=True).generate_parser(grammar, file=source)
+    namespace = {}
+    exec(compile(source.getvalue(), "<instrumented parser>", "exec"), namespace)
+    parser_class = namespace["Parser"]
+
+    report = RuleReport()
+    for text in texts:
+        parser = parser_class(text, **parser_kwargs)
+        try:
+            parser.parse(rule_name)
+        except BaseParseError as e:
+            if errors is not None:
+                errors.append(e)
+        report.merge(parser.rule_report())
+    return report
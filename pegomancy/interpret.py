@@ -0,0 +1,705 @@
+import ast
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+
+from .generate import _PATTERN_SETTINGS, ParserGenerator
+from .grammar import \
+    AbstractItem, \
+    Alternative, \
+    CutItem, \
+    EOFItem, \
+    Grammar, \
+    InlinedRuleItem, \
+    Lookahead, \
+    LiteralItem, \
+    Maybe, \
+    MaybeSepBy, \
+    NegativeLookahead, \
+    OneOrMore, \
+    RegexItem, \
+    Rule, \
+    RuleItem, \
+    SepBy, \
+    ZeroOrMore
+from .memo import FAILURE, MISSING
+from .parse import \
+    END_OF_INPUT, \
+    EXPECTED_REPETITIONS_MESSAGE, \
+    UNEXPECTED_MESSAGE, \
+    CutError, \
+    ParseError, \
+    RawTextParser, \
+    SentinelTextParser
+from .reader import compile_regex, literal_choice_regex
+
+# Operations of the instructions run by GrammarInterpreter, each instruction being an (operation, a, b, c) tuple
+# whose operands are described next to the operations
+_TERMINAL = 0  # match a terminal: a = expect_* method, b = its argument
+_CALL = 1  # apply a rule: a = the index of the rule
+_WRAP = 2  # build the node of an alternative: a = the rule name, b = the number of values, c = their attributes
+_RETURN = 3  # return the node built from the current rule
+_TRY_ALTERNATIVE = 4  # start an alternative: a = the instruction run if it fails
+_FAIL_ALTERNATIVE = 5  # rewind once an alternative failed, then check its cut: a = whether it follows a prefix
+_DISPATCH = 6  # skip alternatives unless the next character may start them: a = the characters, b = the next group
+_FAIL = 7  # resume at the instruction of the innermost failure handler
+_ENTER = 8  # start the body of a rule: a = whether it dispatches on the next character
+_FAIL_RULE = 9  # fail the current rule: a = the terminals it records as expected (without exceptions)
+_SEQUENCE = 10  # match a sequence of terminals: a = expect_sequence, b = the index of the sequence
+_REPETITION = 11  # match a repeated terminal: a = expect_repetition, b = the index of the terminal, c = the minimum
+_EOF = 12  # match the end of input: a = expect_eof
+_LITERAL_CHOICE = 13  # match one of the literals of a rule and build its node: a = the pattern, b = the literals,
+# c = the rule name and the attributes of the literals
+_MAYBE = 14  # start an optional item: a = the instruction run if it fails
+_POP_HANDLER = 15  # remove the innermost failure handler once its item matched: a = the next instruction
+_MAYBE_FAILED = 16  # replace an optional item that failed by None
+_REPEAT = 17  # start a repetition: a = the instruction run once an element fails
+_REPEAT_NEXT = 18  # collect an element of a repetition: a = the instruction matching the next element
+_REPEAT_DONE = 19  # end a repetition once an element failed: a = the minimum number of elements
+_SEP_BY = 20  # start a list of separated elements: a = the instruction run if an element fails
+_SEP_BY_ELEMENT = 21  # collect an element of a list: a = the instruction run if the next separator fails
+_SEP_BY_SEPARATOR = 22  # collect a separator of a list: a = the instruction matching the next element
+_SEP_BY_DONE = 23  # end a list once a separator failed, skipping the next instruction (_SEP_BY_FAILED)
+_SEP_BY_FAILED = 24  # rewind once an element of a list failed: a = whether the list is optional
+_LOOKAHEAD = 25  # start a lookahead: a = the instruction run if its item fails
+_LOOKAHEAD_MATCHED = 26  # rewind once the item of a lookahead matched
+_LOOKAHEAD_FAILED = 27  # fail once the item of a lookahead failed
+_NOT_LOOKAHEAD = 28  # start a negative lookahead: a = the instruction run if its item fails
+_NOT_LOOKAHEAD_MATCHED = 29  # fail once the item of a negative lookahead matched
+_NOT_LOOKAHEAD_FAILED = 30  # succeed once the item of a negative lookahead failed
+_INLINED = 31  # build the node of an inlined rule: a = the rule name, b = the attributes of its item
+_CUT = 32  # reach the cut of an alternative
+_START_GROUP = 33  # start alternatives sharing a prefix: a = the instruction run if the prefix fails
+_END_PREFIX = 34  # record the end of the prefix shared by alternatives
+_END_GROUP = 35  # remove the failure handler of the prefix once all the alternatives sharing it failed
+_REWIND = 36  # rewind to the start of the current rule
+_HALT = 37  # stop, returning the result of the rule parsing started from
+_HALT_FAILED = 38  # stop, raising the error of the rule parsing started from
+
+# Indexes of the instructions shared by all the rules, which start the instructions of a parser
+_HALT_FAILED_IP = 0
+_FAIL_IP = 1
+
+
+class _CompiledRule(NamedTuple):
+    name: str
+    # Index of the first instruction of the body of the rule
+    entry: int
+    # ID of the rule in the memoization table, or None if it is not memoized
+    rule_id: Optional[int]
+    left_recursive: bool
+
+
+class _Handler:
+    """
+    Failure handler of a rule or of an item being matched, holding the state needed to resume once its items failed
+    """
+    __slots__ = ("ip", "height", "pos", "last", "matches")
+
+    def __init__(self, ip: int, height: int, pos: int = 0):
+        # Instruction run when the items fail, and number of values on the stack to restore
+        self.ip = ip
+        self.height = height
+        # Position before the item, and after its last element matched (for repetitions and lists)
+        self.pos = pos
+        self.last = pos
+        # Elements matched so far (for repetitions and lists)
+        self.matches = None
+
+
+class _Frame:
+    """
+    Application of a rule being matched
+    """
+    __slots__ = ("rule", "return_ip", "values_base", "handlers_base", "pos", "next_char", "prefix_end", "cut",
+                 "memo_pos", "result", "last_pos")
+
+    def __init__(self, rule: _CompiledRule, return_ip: int, values_base: int, handlers_base: int, memo_pos: int = 0):
+        self.rule = rule
+        # Instruction run once the rule returned, and sizes of the stacks of values and handlers when it was applied
+        self.return_ip = return_ip
+        self.values_base = values_base
+        self.handlers_base = handlers_base
+        # Variables of the body of the rule (see ParserGenerator._generate_rule)
+        self.pos = 0
+        self.next_char = ""
+        self.prefix_end = 0
+        self.cut = False
+        # Position the rule is memoized at, and state of the growing of a left-recursive rule
+        self.memo_pos = memo_pos
+        self.result = FAILURE
+        self.last_pos = memo_pos
+
+
+class _Compiler:
+    """
+    Compiler of a grammar into the instructions run by GrammarInterpreter, mirroring the code of ParserGenerator
+    """
+
+    def __init__(self, grammar: Grammar, parser_class: Type[RawTextParser]):
+        self.grammar = grammar
+        self.parser_class = parser_class
+        # The generator numbers the terminal sequences the same way as in the code it generates
+        self.generator = ParserGenerator(use_exceptions=not issubclass(parser_class, SentinelTextParser))
+        self.code: List[list] = [[_HALT_FAILED, None, None, None], [_FAIL, None, None, None]]
+        self.rule_indices = {rule.name: i for i, rule in enumerate(grammar.rules)}
+        # IDs of the memoized rules, the compiled rules, and the index of the instruction parsing with each rule
+        self.rule_ids: Dict[str, int] = {}
+        self.rules: List[_CompiledRule] = []
+        self.start_instructions: Dict[str, int] = {}
+
+    def emit(self, operation: int, a=None, b=None, c=None) -> list:
+        """
+        Append an instruction, returned as a list so that the instructions it jumps to can be set once compiled
+        """
+        instruction = [operation, a, b, c]
+        self.code.append(instruction)
+        return instruction
+
+    def here(self) -> int:
+        return len(self.code)
+
+    def compile_terminal(self, method: str, argument_code: str):
+        self.emit(_TERMINAL, getattr(self.parser_class, method), ast.literal_eval(argument_code))
+
+    def compile_item(self, item: AbstractItem):
+        if isinstance(item, LiteralItem):
+            self.compile_terminal("expect_string", item.literal_code())
+        elif isinstance(item, RegexItem):
+            self.compile_terminal("expect_regex", item.pattern_literal())
+        elif isinstance(item, RuleItem):
+            self.emit(_CALL, self.rule_indices[item.rule_name])
+        elif isinstance(item, EOFItem):
+            self.emit(_EOF, self.parser_class.expect_eof)
+        elif isinstance(item, CutItem):
+            self.emit(_CUT)
+        elif isinstance(item, InlinedRuleItem):
+            self.compile_item(item.inner_item)
+            self.emit(_INLINED, item.rule_name, item.inner_item.attributes)
+        elif isinstance(item, Maybe):
+            start = self.emit(_MAYBE)
+            self.compile_item(item.inner_item)
+            end = self.emit(_POP_HANDLER)
+            start[1] = self.here()
+            self.emit(_MAYBE_FAILED)
+            end[1] = self.here()
+        elif isinstance(item, (ZeroOrMore, OneOrMore)):
+            start = self.emit(_REPEAT)
+            element = self.here()
+            self.compile_item(item.inner_item)
+            self.emit(_REPEAT_NEXT, element)
+            start[1] = self.here()
+            self.emit(_REPEAT_DONE, 1 if isinstance(item, OneOrMore) else 0)
+        elif isinstance(item, (SepBy, MaybeSepBy)):
+            start = self.emit(_SEP_BY)
+            element = self.here()
+            self.compile_item(item.element_item)
+            collect = self.emit(_SEP_BY_ELEMENT)
+            self.compile_item(item.separator_item)
+            self.emit(_SEP_BY_SEPARATOR, element)
+            collect[1] = self.here()
+            self.emit(_SEP_BY_DONE)
+            start[1] = self.here()
+            self.emit(_SEP_BY_FAILED, isinstance(item, MaybeSepBy))
+        elif isinstance(item, Lookahead):
+            start = self.emit(_LOOKAHEAD)
+            self.compile_item(item.inner_item)
+            end = self.emit(_LOOKAHEAD_MATCHED)
+            start[1] = self.here()
+            self.emit(_LOOKAHEAD_FAILED)
+            end[1] = self.here()
+        elif isinstance(item, NegativeLookahead):
+            start = self.emit(_NOT_LOOKAHEAD)
+            self.compile_item(item.inner_item)
+            self.emit(_NOT_LOOKAHEAD_MATCHED)
+            start[1] = self.here()
+            self.emit(_NOT_LOOKAHEAD_FAILED)
+        else:
+            raise TypeError(f"cannot interpret item {item!r}")
+
+    def compile_items(self, items: List[AbstractItem]):
+        """
+        Compile the items of an alternative, fusing the consecutive terminals and the repetitions of a terminal like
+        ParserGenerator._fuse_terminals
+        """
+        generator = self.generator
+        runs = []
+        for item in items:
+            terminal = generator._terminal_call(item) is not None
+            if runs and terminal and generator._terminal_call(runs[-1][-1]) is not None:
+                runs[-1].append(item)
+            else:
+                runs.append([item])
+        for run in runs:
+            item = run[0]
+            if len(run) > 1:
+                index = generator._sequence_index(tuple(map(generator._terminal_call, run)))
+                self.emit(_SEQUENCE, self.parser_class.expect_sequence, index)
+            elif isinstance(item, (OneOrMore, ZeroOrMore)) and generator._is_repeatable_terminal(item.inner_item):
+                index = generator._sequence_index((generator._terminal_call(item.inner_item),))
+                minimum = 1 if isinstance(item, OneOrMore) else 0
+                self.emit(_REPETITION, self.parser_class.expect_repetition, index, minimum)
+            else:
+                self.compile_item(item)
+
+    def compile_alternative(self, alt: Alternative, rule: Rule, prefix_length: int):
+        start = self.emit(_TRY_ALTERNATIVE)
+        self.compile_items(alt.items[prefix_length:])
+        self.emit(_WRAP, rule.name, len(alt.items), [item.attributes for item in alt.items])
+        self.emit(_RETURN)
+        start[1] = self.here()
+        self.emit(_FAIL_ALTERNATIVE, prefix_length > 0)
+
+    def compile_rule(self, rule: Rule, first_sets, expected_terminals: tuple) -> int:
+        entry = self.here()
+        literals = ParserGenerator._literal_choices(rule)
+        if literals is not None:
+            self.emit(_ENTER, False)
+            start = self.emit(_TRY_ALTERNATIVE)
+            pattern = literal_choice_regex(literal.value() for literal in literals)
+            targets = tuple(literal.value() for literal in literals)
+            self.emit(_LITERAL_CHOICE, pattern, targets, (rule.name, [literal.attributes for literal in literals]))
+            self.emit(_RETURN)
+            start[1] = self.here()
+            self.emit(_REWIND)
+            self.emit(_FAIL_RULE, ())
+            return entry
+        self.emit(_ENTER, any(first is not None for first in first_sets))
+        groups = []
+        for alt, first in zip(rule.alternatives, first_sets):
+            if groups and alt.shared_prefix > 0:
+                groups[-1].append((alt, first))
+            else:
+                groups.append([(alt, first)])
+        for group in groups:
+            alts = [alt for alt, _ in group]
+            firsts = [first for _, first in group]
+            dispatch = None
+            if None not in firsts:
+                dispatch = self.emit(_DISPATCH, "".join(sorted(frozenset().union(*firsts))))
+            if len(alts) == 1:
+                self.compile_alternative(alts[0], rule, 0)
+            else:
+                prefix_length = min(alt.shared_prefix for alt in alts[1:])
+                start = self.emit(_START_GROUP)
+                self.compile_items(alts[0].items[:prefix_length])
+                self.emit(_END_PREFIX)
+                for alt in alts:
+                    self.compile_alternative(alt, rule, prefix_length)
+                self.emit(_END_GROUP)
+                start[1] = self.here()
+                self.emit(_REWIND)
+            if dispatch is not None:
+                dispatch[2] = self.here()
+        self.emit(_FAIL_RULE, expected_terminals)
+        return entry
+
+    def expected_terminal(self, terminal: AbstractItem, regexes: dict):
+        if isinstance(terminal, LiteralItem):
+            return terminal.value()
+        if isinstance(terminal, RegexItem):
+            return regexes[ast.literal_eval(terminal.pattern_literal())]
+        return END_OF_INPUT
+
+    def compile(self, regexes: dict) -> tuple:
+        """
+        Compile the rules of the grammar
+
+        :param regexes:             the compiled patterns of the parser, indexed by pattern
+        :return:                    the instructions
+        """
+        grammar = self.grammar
+        memoized_rules = grammar.memoized_rules()
+        for rule in grammar.rules:
+            if rule.name in memoized_rules:
+                self.rule_ids[rule.name] = len(self.rule_ids)
+        grammar_first_sets = grammar.first_sets()
+        nullable = grammar.nullable_rules()
+        for rule in grammar.rules:
+            first_sets = [grammar.alternative_first_set(alt, grammar_first_sets, nullable) for alt in rule.alternatives]
+            expected_terminals = []
+            for alt, first in zip(rule.alternatives, first_sets):
+                if first is not None:
+                    for terminal in grammar.leading_terminals(alt.items, nullable):
+                        if terminal not in expected_terminals:
+                            expected_terminals.append(terminal)
+            expected = tuple(self.expected_terminal(terminal, regexes) for terminal in expected_terminals)
+            entry = self.compile_rule(rule, first_sets, expected)
+            self.rules.append(_CompiledRule(rule.name, entry, self.rule_ids.get(rule.name), rule.is_left_recursive()))
+        for rule in grammar.rules:
+            # Parsing applies the rule, then halts once it returns
+            self.start_instructions[rule.name] = self.here()
+            self.emit(_CALL, self.rule_indices[rule.name])
+            self.emit(_HALT)
+        return tuple(tuple(instruction) for instruction in self.code)
+
+    def terminal_sequences(self) -> tuple:
+        return tuple(
+            tuple((method, ast.literal_eval(argument)) for method, argument in calls)
+            for calls in self.generator.terminal_sequences
+        )
+
+
+class GrammarInterpreter:
+    """
+    Mixin for parsers running a grammar directly, instead of generated code (see interpreter_class)
+
+    The rules are compiled into instructions that match the items of their alternatives in turn, using the same
+    methods as the code generated by ParserGenerator to match terminals, memoize rules and build nodes, so that the
+    results, the errors and the rule handler calls are the same as those of the generated parser. The instructions
+    run in a loop that keeps the rules being applied on explicit stacks rather than in Python frames: the nesting of
+    the source text is only limited by the available memory, not by the recursion limit of Python.
+    """
+
+    # Instructions of the parser, compiled rules of the grammar, and index of the instruction parsing with each rule
+    instructions = ()
+    compiled_rules: Tuple[_CompiledRule, ...] = ()
+    start_instructions: Dict[str, int] = {}
+
+    def parse(self, rule_name: str):
+        """
+        Parse the source text using a given rule
+
+        :param rule_name:   the name of the rule to use
+        :return:            the result of the rule
+        """
+        if rule_name not in self.start_instructions:
+            raise ValueError(f"unknown rule: {rule_name}")
+        return self._run(self.start_instructions[rule_name])
+
+    def _run(self, ip: int):
+        code = self.instructions
+        rules = self.compiled_rules
+        raising = not isinstance(self, SentinelTextParser)
+        memo = self.memo
+        reader = self.reader
+        mark = reader.mark
+        rewind = reader.rewind
+        values = []
+        handlers = [_Handler(_HALT_FAILED_IP, 0)]
+        frames = []
+        frame = None
+        error = None
+        entry = None
+        while True:
+            op, a, b, c = code[ip]
+            ip += 1
+            if op == _TERMINAL:
+                try:
+                    value = a(self, b)
+                except ParseError as e:
+                    error = e
+                    ip = _FAIL_IP
+                    continue
+                if value is FAILURE:
+                    ip = _FAIL_IP
+                    continue
+                values.append(value)
+            elif op == _CALL:
+                rule = rules[a]
+                rule_id = rule.rule_id
+                if rule_id is None:
+                    frames.append(frame)
+                    frame = _Frame(rule, ip, len(values), len(handlers))
+                    ip = rule.entry
+                    continue
+                reader.consume_non_significant()
+                pos = mark()
+                result = memo.get(rule_id, pos)
+                if result is MISSING:
+                    if rule.left_recursive:
+                        seed = self.make_error(message=f"expected a {rule.name}", pos=pos) if raising else None
+                        memo.hold(rule_id, pos)
+                        memo.store_failure(rule_id, pos, seed)
+                    frames.append(frame)
+                    frame = _Frame(rule, ip, len(values), len(handlers), pos)
+                    ip = rule.entry
+                elif result is FAILURE:
+                    error = memo.get_error(rule_id, pos) if raising else None
+                    ip = _FAIL_IP
+                else:
+                    rewind(memo.get_end(rule_id, pos))
+                    values.append(result)
+            elif op == _FAIL:
+                entry = handlers.pop()
+                del values[entry.height:]
+                ip = entry.ip
+            elif op == _TRY_ALTERNATIVE:
+                handlers.append(_Handler(a, len(values)))
+                frame.cut = False
+            elif op == _WRAP:
+                if b:
+                    node_values = values[-b:]
+                    del values[-b:]
+                else:
+                    node_values = []
+                try:
+                    node = self._wrap_node(a, node_values, c)
+                except ParseError as e:
+                    error = e
+                    ip = _FAIL_IP
+                    continue
+                if node is FAILURE:
+                    ip = _FAIL_IP
+                    continue
+                values.append(node)
+            elif op == _RETURN:
+                node = values[-1]
+                done = frame
+                del values[done.values_base:]
+                del handlers[done.handlers_base:]
+                rule = done.rule
+                if rule.rule_id is not None:
+                    pos = done.memo_pos
+                    if rule.left_recursive:
+                        end = mark()
+                        if end > done.last_pos:
+                            # Grow the seed, then apply the rule again at the same position
+                            memo.store(rule.rule_id, pos, node, end)
+                            done.result = node
+                            done.last_pos = end
+                            rewind(pos)
+                            ip = rule.entry
+                            continue
+                        node = done.result
+                        if node is FAILURE:
+                            # Releasing the seed may evict it (see WindowedMemoTable), so its error is read first
+                            error = memo.get_error(rule.rule_id, pos) if raising else None
+                        memo.release(rule.rule_id, pos)
+                        rewind(done.last_pos)
+                        frame = frames.pop()
+                        ip = done.return_ip
+                        if node is FAILURE:
+                            ip = _FAIL_IP
+                            continue
+                        values.append(node)
+                        continue
+                    memo.store(rule.rule_id, pos, node, mark())
+                frame = frames.pop()
+                ip = done.return_ip
+                values.append(node)
+            elif op == _FAIL_ALTERNATIVE:
+                rewind(frame.prefix_end if a else frame.pos)
+                if frame.cut:
+                    if raising:
+                        raise CutError.from_error(error)
+                    raise self.make_cut_error()
+            elif op == _DISPATCH:
+                if frame.next_char not in a:
+                    ip = b
+            elif op == _ENTER:
+                if a:
+                    frame.next_char = reader.next_significant_char()
+                frame.pos = mark()
+            elif op == _FAIL_RULE:
+                done = frame
+                rule = done.rule
+                if raising:
+                    error = self.make_error(message=f"expected a {rule.name}", pos=mark())
+                elif a:
+                    self.record_failures(done.pos, a)
+                del values[done.values_base:]
+                del handlers[done.handlers_base:]
+                frame = frames.pop()
+                ip = _FAIL_IP
+                if rule.rule_id is not None:
+                    pos = done.memo_pos
+                    if rule.left_recursive:
+                        if done.result is FAILURE:
+                            error = memo.get_error(rule.rule_id, pos) if raising else None
+                        memo.release(rule.rule_id, pos)
+                        rewind(done.last_pos)
+                        if done.result is not FAILURE:
+                            values.append(done.result)
+                            ip = done.return_ip
+                    elif raising:
+                        memo.store_failure(rule.rule_id, pos, error)
+                    else:
+                        memo.store_failure(rule.rule_id, pos)
+            elif op == _SEQUENCE:
+                try:
+                    sequence = a(self, b)
+                except ParseError as e:
+                    error = e
+                    ip = _FAIL_IP
+                    continue
+                if sequence is FAILURE:
+                    ip = _FAIL_IP
+                    continue
+                values.extend(sequence)
+            elif op == _MAYBE:
+                handlers.append(_Handler(a, len(values), mark()))
+            elif op == _POP_HANDLER:
+                handlers.pop()
+                ip = a
+            elif op == _MAYBE_FAILED:
+                rewind(entry.pos)
+                values.append(None)
+            elif op == _REPETITION:
+                try:
+                    value = a(self, b, c)
+                except ParseError as e:
+                    error = e
+                    ip = _FAIL_IP
+                    continue
+                if value is FAILURE:
+                    ip = _FAIL_IP
+                    continue
+                values.append(value)
+            elif op == _LITERAL_CHOICE:
+                try:
+                    choice = self.expect_literals(a, b)
+                    if choice is not FAILURE:
+                        index, value = choice
+                        choice = self._wrap_node(c[0], [value], [c[1][index]])
+                except ParseError as e:
+                    error = e
+                    ip = _FAIL_IP
+                    continue
+                if choice is FAILURE:
+                    ip = _FAIL_IP
+                    continue
+                values.append(choice)
+            elif op == _REPEAT:
+                handler = _Handler(a, len(values), mark())
+                handler.matches = []
+                handlers.append(handler)
+            elif op == _REPEAT_NEXT:
+                handler = handlers[-1]
+                handler.matches.append(values.pop())
+                handler.last = mark()
+                ip = a
+            elif op == _REPEAT_DONE:
+                rewind(entry.last)
+                if len(entry.matches) >= a:
+                    values.append(entry.matches)
+                else:
+                    rewind(entry.pos)
+                    if raising:
+                        error = self.make_error(message=EXPECTED_REPETITIONS_MESSAGE, args=(a, "<lambda>"), pos=mark())
+                    ip = _FAIL_IP
+            elif op == _SEP_BY:
+                handler = _Handler(a, len(values), mark())
+                handler.matches = []
+                handlers.append(handler)
+            elif op == _SEP_BY_ELEMENT:
+                handler = handlers[-1]
+                handler.matches.append(values.pop())
+                handler.last = mark()
+                handlers.append(_Handler(a, len(values)))
+            elif op == _SEP_BY_SEPARATOR:
+                handlers.pop()
+                handlers[-1].matches.append(values.pop())
+                ip = a
+            elif op == _SEP_BY_DONE:
+                handler = handlers.pop()
+                rewind(handler.last)
+                values.append(handler.matches)
+                ip += 1
+            elif op == _SEP_BY_FAILED:
+                rewind(entry.pos)
+                if a:
+                    values.append([])
+                else:
+                    ip = _FAIL_IP
+            elif op == _LOOKAHEAD:
+                handlers.append(_Handler(a, len(values), mark()))
+            elif op == _LOOKAHEAD_MATCHED:
+                rewind(handlers.pop().pos)
+                ip = a
+            elif op == _LOOKAHEAD_FAILED:
+                if not raising:
+                    rewind(entry.pos)
+                ip = _FAIL_IP
+            elif op == _NOT_LOOKAHEAD:
+                handlers.append(_Handler(a, len(values), mark()))
+            elif op == _NOT_LOOKAHEAD_MATCHED:
+                values.pop()
+                rewind(handlers.pop().pos)
+                if raising:
+                    error = self.make_error(message=UNEXPECTED_MESSAGE, args=("<lambda>",), pos=mark())
+                ip = _FAIL_IP
+            elif op == _NOT_LOOKAHEAD_FAILED:
+                if not raising:
+                    rewind(entry.pos)
+                values.append(None)
+            elif op == _INLINED:
+                try:
+                    node = self._inlined_node(a, values.pop(), b)
+                except ParseError as e:
+                    error = e
+                    ip = _FAIL_IP
+                    continue
+                if node is FAILURE:
+                    ip = _FAIL_IP
+                    continue
+                values.append(node)
+            elif op == _CUT:
+                frame.cut = True
+                values.append(True)
+            elif op == _EOF:
+                try:
+                    value = a(self)
+                except ParseError as e:
+                    error = e
+                    ip = _FAIL_IP
+                    continue
+                if value is FAILURE:
+                    ip = _FAIL_IP
+                    continue
+                values.append(value)
+            elif op == _START_GROUP:
+                handlers.append(_Handler(a, len(values)))
+            elif op == _END_PREFIX:
+                frame.prefix_end = mark()
+            elif op == _END_GROUP:
+                del values[handlers.pop().height:]
+            elif op == _REWIND:
+                rewind(frame.pos)
+            elif op == _HALT:
+                return values.pop()
+            elif op == _HALT_FAILED:
+                if raising:
+                    raise error
+                raise self.make_farthest_error()
+
+
+def interpreter_class(grammar: Grammar, class_name: str = "Parser", use_exceptions: bool = True) -> Type[RawTextParser]:
+    """
+    Create the class of a parser running a grammar directly (see GrammarInterpreter), which behaves like the class
+    generated by ParserGenerator for the grammar, without generating code or loading it
+
+    The verbatim code of the grammar is not run, and the parser has no iter_<rule> methods: only its parse method
+    applies the rules.
+
+    :param grammar:             the grammar, usually optimized first (see optimize_grammar)
+    :param class_name:          the name of the parser class
+    :param use_exceptions:      whether failures are reported like the rules generated with exceptions do, or by
+                                describing the farthest failure (see ParserGenerator)
+    :return:                    the parser class
+    """
+    regexes = {}
+    for item in grammar.iter_items():
+        if isinstance(item, RegexItem):
+            pattern = ast.literal_eval(item.pattern_literal())
+            regexes.setdefault(pattern, compile_regex(pattern))
+    for rule in grammar.rules:
+        literals = ParserGenerator._literal_choices(rule)
+        if literals is not None:
+            pattern = literal_choice_regex(literal.value() for literal in literals)
+            regexes.setdefault(pattern, compile_regex(pattern))
+    attributes = {"regexes": regexes}
+    for setting, attribute in _PATTERN_SETTINGS:
+        if setting in grammar.settings:
+            if not isinstance(grammar.settings[setting], str):
+                raise ValueError(f"the {setting} setting must be given a regex pattern")
+            attributes[attribute] = grammar.settings[setting]
+    base_class = RawTextParser if use_exceptions else SentinelTextParser
+    cls = type(class_name, (GrammarInterpreter, base_class), attributes)
+    # The instructions call the methods of the class, which must therefore exist before compiling them
+    compiler = _Compiler(grammar, cls)
+    cls.instructions = compiler.compile(regexes)
+    cls.compiled_rules = tuple(compiler.rules)
+    cls.start_instructions = compiler.start_instructions
+    cls.terminal_sequences = compiler.terminal_sequences()
+    cls.rule_count = len(compiler.rule_ids)
+    cls.memoized_rules = tuple(compiler.rule_ids)
+    return cls
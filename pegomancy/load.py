@@ -0,0 +1,189 @@
+import hashlib
+import importlib.metadata
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import types
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Type
+
+from .generate import ParserGenerator
+from .grammar import Grammar
+from .interpret import interpreter_class
+from .optimize import optimize_grammar
+from .parse import BaseParser
+
+# Number of parser classes load_parser keeps loaded, the least recently used ones being forgotten first
+LOADED_PARSERS_CAPACITY = 256
+
+# Environment variable naming the directory in which load_parser stores the generated modules, if not given
+CACHE_DIR_VARIABLE = "PEGOMANCY_CACHE_DIR"
+
+
+def _import_module(path: str, module_name: str) -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_parser_module(path: str, class_name: str = "Parser") -> Type[BaseParser]:
+    """
+    Import a parser class from a module generated by pegomant
+
+    :param path:                the path of the module
+    :param class_name:          the name of the parser class in the module
+    :return:                    the parser class
+    """
+    return getattr(_import_module(path, os.path.splitext(os.path.basename(path))[0]), class_name)
+
+
+@lru_cache(maxsize=None)
+def _generator_version() -> str:
+    """
+    Identify the code generating the parsers, so that the modules generated by another version are not reused
+    """
+    try:
+        return importlib.metadata.version("pegomancy")
+    except importlib.metadata.PackageNotFoundError:
+        # Not installed (e.g. imported from a checkout): identify the sources of the package instead
+        digest = hashlib.sha256()
+        directory = os.path.dirname(__file__)
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.endswith(".py"):
+                with open(os.path.join(directory, file_name), "rb") as f:
+                    digest.update(f.read())
+        return f"source-{digest.hexdigest()}"
+
+
+def _generate_source(grammar_text: str, class_name: str, options: dict) -> str:
+    grammar = Grammar.from_specification(grammar_text)
+    grammar = optimize_grammar(grammar, start_rule=options["start_rule"], disabled_passes=options["disabled_passes"])
+    generator = ParserGenerator(
+        use_exceptions=options["use_exceptions"],
+        prune_memo=options["prune_memo"],
+        iterable_rules=options["iterable_rules"],
+        instrument=options["instrument"],
+    )
+    source = io.StringIO()
+    generator.generate_parser(grammar, class_name=class_name, file=source)
+    return source.getvalue()
+
+
+def _interpreter_module(module_name: str, grammar_text: str, class_name: str, options: dict) -> types.ModuleType:
+    """
+    Create a module holding the class of a parser interpreting a grammar, as if it was generated
+    """
+    grammar = Grammar.from_specification(grammar_text)
+    grammar = optimize_grammar(grammar, start_rule=options["start_rule"], disabled_passes=options["disabled_passes"])
+    module = types.ModuleType(module_name)
+    # The prelude of the grammar defines the names used along with the parser (such as rule handlers)
+    for verbatim in grammar.prelude:
+        exec(compile(verbatim, f"<prelude of {module_name}>", "exec"), module.__dict__)
+    parser_class = interpreter_class(grammar, class_name=class_name, use_exceptions=options["use_exceptions"])
+    parser_class.__module__ = module_name
+    setattr(module, class_name, parser_class)
+    return module
+
+
+def _write_atomically(path: str, text: str):
+    """
+    Write a file so that other processes either see it complete or not at all
+    """
+    fd, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+# Modules loaded by load_parser, indexed by name from the least to the most recently used
+_loaded_modules: Dict[str, types.ModuleType] = {}
+
+
+def _load_module(module_name: str, grammar_text: str, class_name: str, options: dict, cache_dir: Optional[str]):
+    if options["interpret"]:
+        return _interpreter_module(module_name, grammar_text, class_name, options)
+    if cache_dir is None:
+        source = _generate_source(grammar_text, class_name, options)
+        module = types.ModuleType(module_name)
+        exec(compile(source, f"<{module_name}>", "exec"), module.__dict__)
+        return module
+    path = os.path.join(cache_dir, f"{module_name}.py")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_atomically(path, _generate_source(grammar_text, class_name, options))
+    # Importing the module compiles it to bytecode in the __pycache__ directory of the cache, or loads that bytecode
+    return _import_module(path, module_name)
+
+
+def load_parser(
+        grammar_text: str,
+        class_name: str = "Parser",
+        *,
+        use_exceptions: bool = True,
+        prune_memo: bool = False,
+        iterable_rules: Iterable[str] = (),
+        start_rule: Optional[str] = None,
+        disabled_passes: Iterable[str] = (),
+        cache_dir: Optional[str] = None,
+        interpret: bool = False,
+        instrument: bool = False,
+) -> Type[BaseParser]:
+    """
+    Create the class of the parser of a grammar, generating and loading its code in the current process instead of
+    running pegomant
+
+    The classes loaded are kept (up to LOADED_PARSERS_CAPACITY of them), so that loading the same grammar again with
+    the same options returns the same class. When a cache directory is used, the generated modules are also stored
+    there (along with their bytecode), under a name derived from the grammar, the options and the version of
+    pegomancy, so that other processes load them without parsing the grammar or generating its code again.
+
+    The grammar may also be run by an interpreter instead of generated code (see interpret.GrammarInterpreter), which
+    is slower, but parses text nested deeper than the recursion limit of Python allows generated parsers to.
+
+    :param grammar_text:        the specification of the grammar
+    :param class_name:          the name of the parser class
+    :param use_exceptions:      whether rules raise exceptions, or return FAILURE (see ParserGenerator)
+    :param prune_memo:          whether memo entries are freed on cuts (see ParserGenerator)
+    :param iterable_rules:      the rules for which the parser has an iter_<rule> method (see ParserGenerator)
+    :param start_rule:          the rule parsing starts from, if known (see optimize_grammar)
+    :param disabled_passes:     the optimization passes not to apply (see optimize_grammar)
+    :param cache_dir:           the directory in which generated modules are stored (by default, the directory named
+                                by the PEGOMANCY_CACHE_DIR environment variable, if set), or None not to store them
+    :param interpret:           whether the grammar is interpreted, rather than generated (interpreted parsers
+                                cannot prune their memo, iterate over rules nor be instrumented, and are not stored
+                                in the cache directory)
+    :param instrument:          whether the parser records the statistics of the applications of its rules (see
+                                ParserGenerator)
+    :return:                    the parser class
+    """
+    options = {
+        "use_exceptions": use_exceptions,
+        "prune_memo": prune_memo,
+        "iterable_rules": list(iterable_rules),
+        "start_rule": start_rule,
+        "disabled_passes": sorted(disabled_passes),
+        "interpret": interpret,
+        "instrument": instrument,
+    }
+    if interpret and (prune_memo or options["iterable_rules"] or instrument):
+        raise ValueError("interpreted parsers cannot prune their memo, iterate over rules nor be instrumented")
+    key = json.dumps([_generator_version(), grammar_text, class_name, options], sort_keys=True)
+    module_name = f"pegomancy_parser_{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+    module = _loaded_modules.pop(module_name, None)
+    if module is None:
+        cache_dir = cache_dir or os.environ.get(CACHE_DIR_VARIABLE)
+        module = _load_module(module_name, grammar_text, class_name, options, cache_dir)
+        if len(_loaded_modules) >= LOADED_PARSERS_CAPACITY:
+            sys.modules.pop(_loaded_modules.pop(next(iter(_loaded_modules))).__name__, None)
+        # Registering the module lets its parser class be pickled by reference (for example by parse_many)
+        sys.modules[module_name] = module
+    _loaded_modules[module_name] = module
+    return getattr(module, class_name)
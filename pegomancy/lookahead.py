@@ -0,0 +1,229 @@
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Pattern
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: r"\d",
+    sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+    sre_constants.CATEGORY_SPACE: r"\s",
+    sre_constants.CATEGORY_NOT_SPACE: r"\S",
+    sre_constants.CATEGORY_WORD: r"\w",
+    sre_constants.CATEGORY_NOT_WORD: r"\W",
+}
+
+_INLINE_FLAGS = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s", re.ASCII: "a"}
+
+# Anchors examining the character before the position where they are checked
+_ANCHORS_LOOKING_BEHIND = {sre_constants.AT_BEGINNING, sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY}
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, "POSSESSIVE_REPEAT", None)}
+
+
+class _PrefixBuilder:
+    """
+    Class building the regex pattern matching the prefixes of the text matched by a pattern, from its syntax tree
+
+    The patterns built only use non-capturing groups, and match a superset of the text (or of the prefixes) matched
+    by the original pattern: assertions are dropped from the text matched (while the text examined by lookaheads is
+    part of the prefixes), backreferences match what the group they refer to may match, and atomic groups and
+    possessive repeats may backtrack.
+    """
+
+    def __init__(self, groups: Dict[int, list]):
+        """
+        :param groups:              the items of the groups of the pattern, indexed by group number
+        """
+        self.groups = groups
+        # Number of characters examined before the position where the pattern is matched
+        self.lookbehind = 0
+
+    def escape(self, c: int) -> str:
+        return re.escape(chr(c))
+
+    def char_set(self, items) -> str:
+        parts = []
+        for op, av in items:
+            if op is sre_constants.NEGATE:
+                parts.insert(0, "^")
+            elif op is sre_constants.LITERAL:
+                parts.append(self.escape(av))
+            elif op is sre_constants.RANGE:
+                parts.append(f"{self.escape(av[0])}-{self.escape(av[1])}")
+            elif op is sre_constants.CATEGORY:
+                parts.append(_CATEGORIES[av])
+            else:
+                raise ValueError(f"unsupported character set item: {op}")
+        return f"[{''.join(parts)}]"
+
+    @staticmethod
+    def scoped(pattern: str, add_flags: int, del_flags: int) -> str:
+        add = "".join(letter for flag, letter in _INLINE_FLAGS.items() if add_flags & flag)
+        remove = "".join(letter for flag, letter in _INLINE_FLAGS.items() if del_flags & flag)
+        if not add and not remove:
+            return f"(?:{pattern})"
+        return f"(?{add}-{remove}:{pattern})" if remove else f"(?{add}:{pattern})"
+
+    def text(self, items) -> str:
+        """
+        Build a pattern matching (at least) the text matched by a sequence of items
+        """
+        return "".join(self.item_text(op, av) for op, av in items)
+
+    def item_text(self, op, av) -> str:
+        if op is sre_constants.LITERAL:
+            return self.escape(av)
+        if op is sre_constants.NOT_LITERAL:
+            return f"[^{self.escape(av)}]"
+        if op is sre_constants.IN:
+            return self.char_set(av)
+        if op is sre_constants.ANY:
+            return "."
+        if op is sre_constants.BRANCH:
+            return f"(?:{'|'.join(map(self.text, av[1]))})"
+        if op is sre_constants.SUBPATTERN:
+            return self.scoped(self.text(av[3]), av[1], av[2])
+        if op in _REPEATS:
+            maximum = "" if av[1] is sre_constants.MAXREPEAT else av[1]
+            return f"(?:{self.text(av[2])}){{{av[0]},{maximum}}}"
+        if op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            return f"(?:{self.text(av)})"
+        if op is sre_constants.GROUPREF:
+            return f"(?:{self.text(self.groups[av])})"
+        if op is sre_constants.GROUPREF_EXISTS:
+            return f"(?:{self.text(av[1])}|{self.text(av[2] or [])})"
+        if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if op is sre_constants.AT and av in _ANCHORS_LOOKING_BEHIND:
+                self.lookbehind = max(self.lookbehind, 1)
+            elif op is not sre_constants.AT and av[0] < 0:
+                self.lookbehind = max(self.lookbehind, av[1].getwidth()[1])
+            return ""
+        raise ValueError(f"unsupported regex item: {op}")
+
+    def prefixes(self, items) -> str:
+        """
+        Build a pattern matching (at least) the prefixes of the text matched by a sequence of items, and the text
+        examined by their lookaheads
+        """
+        pattern = ""
+        for op, av in reversed(list(items)):
+            text = self.item_text(op, av)
+            prefixes = self.item_prefixes(op, av)
+            if text and pattern:
+                pattern = f"(?:{text}{pattern}|{prefixes})"
+            elif text:
+                pattern = prefixes
+            elif prefixes:
+                pattern = f"(?:{pattern}|{prefixes})"
+        return pattern
+
+    def item_prefixes(self, op, av) -> str:
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.IN, sre_constants.ANY):
+            return f"{self.item_text(op, av)}?"
+        if op is sre_constants.BRANCH:
+            return f"(?:{'|'.join(map(self.prefixes, av[1]))})"
+        if op is sre_constants.SUBPATTERN:
+            return self.scoped(self.prefixes(av[3]), av[1], av[2])
+        if op in _REPEATS:
+            if av[1] == 0:
+                return ""
+            maximum = "" if av[1] is sre_constants.MAXREPEAT else av[1] - 1
+            return f"(?:{self.text(av[2])}){{0,{maximum}}}{self.prefixes(av[2])}"
+        if op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            return self.prefixes(av)
+        if op is sre_constants.GROUPREF:
+            return self.prefixes(self.groups[av])
+        if op is sre_constants.GROUPREF_EXISTS:
+            return f"(?:{self.prefixes(av[1])}|{self.prefixes(av[2] or [])})"
+        if op is sre_constants.AT:
+            # Outside of multiline mode, '$' also matches before a newline ending the text
+            return "\n?" if av is sre_constants.AT_END else ""
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            return self.prefixes(av[1]) if av[0] > 0 else ""
+        raise ValueError(f"unsupported regex item: {op}")
+
+
+def _collect_groups(items, groups: Dict[int, list]):
+    for op, av in items:
+        if op is sre_constants.SUBPATTERN:
+            if av[0] is not None:
+                groups[av[0]] = av[3]
+            _collect_groups(av[3], groups)
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                _collect_groups(branch, groups)
+        elif op in _REPEATS:
+            _collect_groups(av[2], groups)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            _collect_groups(av[1], groups)
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            _collect_groups(av, groups)
+        elif op is sre_constants.GROUPREF_EXISTS:
+            _collect_groups(av[1], groups)
+            _collect_groups(av[2] or [], groups)
+
+
+class PatternLookahead(NamedTuple):
+    """
+    Class describing the text a regex pattern may examine when it is matched (see pattern_lookahead)
+    """
+    prefixes: Pattern
+    lookbehind: int
+
+
+@lru_cache(maxsize=None)
+def pattern_lookahead(pattern: Pattern) -> PatternLookahead:
+    """
+    Analyze the text a compiled regex pattern may examine when it is matched at a given position
+
+    The regex engine only examines a character when the text between the position and the character can start a
+    match of the pattern (or of one of its lookaheads). The analysis builds a pattern matching such prefixes, so that
+    the farthest character the engine may have examined can be found from the text (see examined_length).
+
+    :param pattern:             the compiled pattern, matching either text or bytes
+    :return:                    the pattern matching the prefixes, compiled with the same flags, and the number of
+                                characters the pattern may examine before the position
+    """
+    tree = sre_parse.parse(pattern.pattern, pattern.flags)
+    groups = {}
+    _collect_groups(tree, groups)
+    builder = _PrefixBuilder(groups)
+    prefixes = builder.prefixes(tree)
+    flags = pattern.flags & ~re.VERBOSE
+    if isinstance(pattern.pattern, bytes):
+        # Bytes are parsed as the characters of the same code, which Latin-1 encodes back to the same bytes
+        return PatternLookahead(re.compile(prefixes.encode("latin-1"), flags), builder.lookbehind)
+    return PatternLookahead(re.compile(prefixes, flags), builder.lookbehind)
+
+
+def examined_length(prefixes: Pattern, text, pos: int, matched: int = 0) -> int:
+    """
+    Compute how many characters a regex engine may have examined when matching a pattern at a given position
+
+    :param prefixes:            the pattern matching the prefixes of the text matched by the pattern (see
+                                pattern_lookahead)
+    :param text:                the text the pattern was matched against
+    :param pos:                 the position at which the pattern was matched
+    :param matched:             the length of the text matched by the pattern, if it matched
+    :return:                    the number of characters from the position, including the character after the
+                                longest prefix (or the end of the text) which the engine examined to stop there
+    """
+    # Prefixes of prefixes are prefixes too: search for the longest one exponentially, then by bisection
+    available = len(text) - pos
+    longest, step = matched, 1
+    while longest + step <= available and prefixes.fullmatch(text, pos, pos + longest + step) is not None:
+        longest += step
+        step *= 2
+    shortest_invalid = min(longest + step, available + 1)
+    while shortest_invalid - longest > 1:
+        middle = (longest + shortest_invalid) // 2
+        if prefixes.fullmatch(text, pos, pos + middle) is not None:
+            longest = middle
+        else:
+            shortest_invalid = middle
+    return longest + 1
@@ -0,0 +1,857 @@
+import sys
+from bisect import bisect_right
+from typing import List
+
+
+class _Failure:
+    def __repr__(self):
+        return "FAILURE"
+
+
+# Value returned by rules of parsers generated without exceptions when they fail to match
+FAILURE = _Failure()
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+# Value returned by MemoTable.get when no entry exists for a rule at a position
+MISSING = _Missing()
+
+
+class _SparseBitmap(dict):
+    """
+    Bitmap only storing its non-zero bytes, indexed like a bytearray (without slices)
+    """
+
+    def __missing__(self, index: int) -> int:
+        return 0
+
+
+def _count_bits(bitmap) -> int:
+    """
+    Count the bits set in a bitmap
+    """
+    if isinstance(bitmap, _SparseBitmap):
+        return sum(bin(byte).count("1") for byte in bitmap.values())
+    return bin(int.from_bytes(bitmap, "little")).count("1")
+
+
+class MemoTable:
+    """
+    Class storing the memoized results of parsing rules
+
+    Each rule is identified by a small integer ID. Successful results are stored in per-rule dictionaries keyed by
+    position (one for the results, one for the end positions), so that no key or value tuple has to be allocated.
+    Failures are stored in a per-rule bitmap, holding one bit per position of the source text.
+    """
+
+    def __init__(self, rule_count: int, text_length: int):
+        """
+        :param rule_count:          the number of memoized rules of the parser
+        :param text_length:         the length of the source text
+        """
+        self.values = [{} for _ in range(rule_count)]
+        self.ends = [{} for _ in range(rule_count)]
+        self.failures = [self._new_bitmap(text_length) for _ in range(rule_count)]
+        self.errors = [{} for _ in range(rule_count)]
+
+    def _new_bitmap(self, text_length: int):
+        """
+        Create a bitmap holding one bit per position of the source text
+
+        :param text_length:         the length of the source text
+        :return:                    the bitmap
+        """
+        return bytearray((text_length >> 3) + 1)
+
+    def get(self, rule_id: int, pos: int):
+        """
+        Retrieve the memoized result of a rule at a given position
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        :return:                    the result, FAILURE if the rule failed, or MISSING if there is no entry
+        """
+        if self.failures[rule_id][pos >> 3] & (1 << (pos & 7)):
+            return FAILURE
+        return self.values[rule_id].get(pos, MISSING)
+
+    def get_end(self, rule_id: int, pos: int) -> int:
+        """
+        Retrieve the position at which a memoized successful application of a rule ended
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        :return:                    the end position
+        """
+        return self.ends[rule_id][pos]
+
+    def get_error(self, rule_id: int, pos: int):
+        """
+        Retrieve the error stored along a memoized failure of a rule, if any
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        :return:                    the error, or None
+        """
+        return self.errors[rule_id].get(pos)
+
+    def store(self, rule_id: int, pos: int, value, end: int):
+        """
+        Memoize a successful application of a rule, replacing any previous entry
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        :param value:               the result of the rule
+        :param end:                 the position at which the rule ended
+        """
+        failures = self.failures[rule_id]
+        if failures[pos >> 3] & (1 << (pos & 7)):
+            _clear_bits(failures, pos, pos + 1)
+            self.errors[rule_id].pop(pos, None)
+        self.values[rule_id][pos] = value
+        self.ends[rule_id][pos] = end
+
+    def store_failure(self, rule_id: int, pos: int, error=None):
+        """
+        Memoize a failed application of a rule
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        :param error:               the error to raise again when the failure is retrieved, if any
+        """
+        self.failures[rule_id][pos >> 3] |= 1 << (pos & 7)
+        if error is not None:
+            self.errors[rule_id][pos] = error
+
+    def hold(self, rule_id: int, pos: int):
+        """
+        Prevent the entry of a rule at a given position from being evicted, while the entry is being grown by a
+        left-recursive rule (see EvictingMemoTable)
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        """
+
+    def release(self, rule_id: int, pos: int):
+        """
+        Allow the entry of a rule at a given position to be evicted again once it is fully grown
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        """
+
+    def prune(self, pos: int):
+        """
+        Free the entries of the rules applied before a given position, once the parser knows it will never apply a rule
+        there again (see PrunableMemoTable)
+
+        Entries are kept by default.
+
+        :param pos:                 the position before which no rule will be applied again
+        """
+
+    def abandon(self):
+        """
+        Forget the rules being applied when parsing stops with an error that memoized rules do not catch (such as a
+        CutError), which thus did not store their results
+
+        Nothing is recorded about the rules being applied by default.
+        """
+
+    def entry_count(self, rule_id: int) -> int:
+        """
+        Count the memoized results of a rule
+
+        :param rule_id:             the ID of the rule
+        :return:                    the number of entries
+        """
+        return len(self.values[rule_id]) + _count_bits(self.failures[rule_id])
+
+    def __len__(self):
+        return sum(map(self.entry_count, range(len(self.values))))
+
+    def rule_memory_usage(self, rule_id: int) -> int:
+        """
+        Compute the memory used by the table to store the results of a rule, excluding the memoized values
+
+        :param rule_id:             the ID of the rule
+        :return:                    the size in bytes
+        """
+        containers = [self.values[rule_id], self.ends[rule_id], self.failures[rule_id], self.errors[rule_id]]
+        return sum(map(sys.getsizeof, containers))
+
+    def memory_usage(self) -> int:
+        """
+        Compute the memory used by the table itself, excluding the memoized values
+
+        :return:                    the size in bytes
+        """
+        containers = [self.values, self.ends, self.failures, self.errors]
+        return sum(map(sys.getsizeof, containers)) + sum(map(self.rule_memory_usage, range(len(self.values))))
+
+
+def _clear_bits(bitmap: bytearray, start: int, end: int):
+    """
+    Clear the bits of a bitmap from a start position (inclusive) to an end position (exclusive)
+    """
+    if isinstance(bitmap, _SparseBitmap):
+        _clear_sparse_bits(bitmap, start, end)
+        return
+    while start < end and start & 7:
+        bitmap[start >> 3] &= ~(1 << (start & 7))
+        start += 1
+    while start < end and end & 7:
+        end -= 1
+        bitmap[end >> 3] &= ~(1 << (end & 7))
+    if start < end:
+        bitmap[start >> 3:end >> 3] = bytes((end - start) >> 3)
+
+
+def _clear_sparse_bits(bitmap: _SparseBitmap, start: int, end: int):
+    """
+    Clear the bits of a sparse bitmap from a start position (inclusive) to an end position (exclusive), removing the
+    bytes left empty
+    """
+    if start >= end:
+        return
+    first, last = start >> 3, (end - 1) >> 3
+    if len(bitmap) <= last - first:
+        indices = [index for index in bitmap if first <= index <= last]
+    else:
+        indices = [index for index in range(first, last + 1) if index in bitmap]
+    for index in indices:
+        mask = 0xff
+        if index == first:
+            mask &= 0xff << (start & 7)
+        if index == last:
+            mask &= 0xff >> (7 - ((end - 1) & 7))
+        byte = bitmap[index] & ~mask
+        if byte:
+            bitmap[index] = byte
+        else:
+            del bitmap[index]
+
+
+def _prune_dict(entries: dict, start: int, end: int) -> dict:
+    """
+    Remove the entries of a dictionary keyed by position from a start position (inclusive) to an end position
+    (exclusive), scanning either the positions or the entries, whichever is fewer
+    """
+    if len(entries) < end - start:
+        for pos in [pos for pos in entries if start <= pos < end]:
+            del entries[pos]
+    else:
+        for pos in range(start, end):
+            entries.pop(pos, None)
+    return entries
+
+
+class PrunableMemoTable(MemoTable):
+    """
+    Memoization table whose entries before a given position can be freed once the parser knows it will never apply
+    a rule there again (see parse.MemoPruningMixin)
+
+    The table remembers up to which position it was pruned, so that each pruning only scans the positions that were
+    not pruned yet. Entries stored before that position afterwards (by rules applied there and ending after the table
+    was pruned) are tracked separately, to be freed by the next pruning. Since the table only holds the entries of the
+    part of the text being parsed, failures are stored in sparse bitmaps, whose size does not depend on the length of
+    the text either.
+    """
+
+    def __init__(self, rule_count: int, text_length: int):
+        """
+        :param rule_count:          the number of memoized rules of the parser
+        :param text_length:         the length of the source text
+        """
+        super().__init__(rule_count, text_length)
+        self.pruned_until = 0
+        self.late_entries = []
+
+    def _new_bitmap(self, text_length: int):
+        return _SparseBitmap()
+
+    def store(self, rule_id: int, pos: int, value, end: int):
+        if pos < self.pruned_until:
+            self.late_entries.append((rule_id, pos))
+        super().store(rule_id, pos, value, end)
+
+    def store_failure(self, rule_id: int, pos: int, error=None):
+        if pos < self.pruned_until:
+            self.late_entries.append((rule_id, pos))
+        super().store_failure(rule_id, pos, error)
+
+    def discard(self, rule_id: int, pos: int):
+        """
+        Remove the entry of a rule at a given position, if any
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        """
+        self.values[rule_id].pop(pos, None)
+        self.ends[rule_id].pop(pos, None)
+        self.errors[rule_id].pop(pos, None)
+        _clear_bits(self.failures[rule_id], pos, pos + 1)
+
+    def prune(self, pos: int):
+        """
+        Free the entries of the rules applied before a given position
+
+        :param pos:                 the position before which no rule will be applied again
+        """
+        late_entries = []
+        for rule_id, entry_pos in self.late_entries:
+            if entry_pos < pos:
+                self.discard(rule_id, entry_pos)
+            else:
+                late_entries.append((rule_id, entry_pos))
+        self.late_entries = late_entries
+        start = self.pruned_until
+        if pos <= start:
+            return
+        for rule_id in range(len(self.values)):
+            _prune_dict(self.values[rule_id], start, pos)
+            _prune_dict(self.ends[rule_id], start, pos)
+            _prune_dict(self.errors[rule_id], start, pos)
+            _clear_bits(self.failures[rule_id], start, pos)
+        self.pruned_until = pos
+
+
+class EvictingMemoTable(MemoTable):
+    """
+    Base class for memoization tables evicting entries to bound the memory they use
+
+    Evicted entries are simply missing from the table, so the parser applies the rules again when it needs them: the
+    table counts how many entries were evicted, and how many evicted entries were recomputed. The entries held by
+    left-recursive rules being grown are never evicted, since growing them relies on the table.
+
+    Failures and evicted entries are stored in sparse bitmaps, and evicted entries are only remembered for a while
+    (see forget_evicted), so that the memory used by the table does not depend on the length of the text: evicted
+    entries recomputed after they were forgotten are not counted.
+    """
+
+    def __init__(self, rule_count: int, text_length: int):
+        """
+        :param rule_count:          the number of memoized rules of the parser
+        :param text_length:         the length of the source text
+        """
+        super().__init__(rule_count, text_length)
+        self.evicted = [self._new_bitmap(text_length) for _ in range(rule_count)]
+        self.held = set()
+        # Number of entries evicted, and of evicted entries that were looked up again (and thus recomputed)
+        self.evictions = 0
+        self.recomputations = 0
+
+    def _new_bitmap(self, text_length: int):
+        return _SparseBitmap()
+
+    def get(self, rule_id: int, pos: int):
+        result = super().get(rule_id, pos)
+        if result is MISSING:
+            evicted = self.evicted[rule_id]
+            if evicted[pos >> 3] & (1 << (pos & 7)):
+                _clear_bits(evicted, pos, pos + 1)
+                self.recomputations += 1
+        return result
+
+    def hold(self, rule_id: int, pos: int):
+        self.held.add((rule_id, pos))
+
+    def release(self, rule_id: int, pos: int):
+        self.held.discard((rule_id, pos))
+
+    def evict(self, rule_id: int, pos: int) -> bool:
+        """
+        Evict the entry of a rule at a given position, unless it is held
+
+        :param rule_id:             the ID of the rule
+        :param pos:                 the position at which the rule was applied
+        :return:                    whether an entry was evicted
+        """
+        if (rule_id, pos) in self.held:
+            return False
+        failures = self.failures[rule_id]
+        index, bit = pos >> 3, 1 << (pos & 7)
+        if failures[index] & bit:
+            _clear_bits(failures, pos, pos + 1)
+            self.errors[rule_id].pop(pos, None)
+        elif self.values[rule_id].pop(pos, MISSING) is not MISSING:
+            del self.ends[rule_id][pos]
+        else:
+            return False
+        self.evicted[rule_id][index] |= bit
+        self.evictions += 1
+        self.forget_evicted(rule_id, pos)
+        return True
+
+    def forget_evicted(self, rule_id: int, pos: int):
+        """
+        Forget the entries evicted long enough ago, once an entry was evicted
+
+        :param rule_id:             the ID of the rule whose entry was evicted
+        :param pos:                 the position of the entry evicted
+        """
+
+    def rule_memory_usage(self, rule_id: int) -> int:
+        return super().rule_memory_usage(rule_id) + sys.getsizeof(self.evicted[rule_id])
+
+
+class WindowedMemoTable(EvictingMemoTable):
+    """
+    Memoization table only keeping the entries within a window behind the farthest position it saw
+
+    The farthest position is the farthest position at which a memoized rule ended. Entries before the window are
+    evicted as the window moves forward, by steps of a sixteenth of its size, and entries stored before it are
+    evicted right away. Evicted entries are remembered up to a window before the window.
+    """
+
+    def __init__(self, rule_count: int, text_length: int, window: int):
+        """
+        :param rule_count:          the number of memoized rules of the parser
+        :param text_length:         the length of the source text
+        :param window:              the size of the window, in characters
+        """
+        super().__init__(rule_count, text_length)
+        self.window = window
+        self.step = max(1, window >> 4)
+        # Position from which entries are kept
+        self.start = 0
+        # Position from which evicted entries are remembered
+        self.evicted_start = 0
+
+    def _advance(self, pos: int):
+        """
+        Move the window forward so that it starts at a given position, evicting the entries before it
+        """
+        start = self.start
+        for rule_id in range(len(self.values)):
+            values = self.values[rule_id]
+            if len(values) < pos - start:
+                positions = [p for p in values if start <= p < pos]
+            else:
+                positions = [p for p in range(start, pos) if p in values]
+            failures = self.failures[rule_id]
+            for index in range(start >> 3, (pos + 7) >> 3):
+                if failures[index]:
+                    positions.extend(p for p in range(max(start, index << 3), min(pos, (index + 1) << 3))
+                                     if failures[index] & (1 << (p & 7)))
+            for p in positions:
+                self.evict(rule_id, p)
+        self.start = pos
+        evicted_start = pos - self.window
+        if evicted_start > self.evicted_start:
+            for evicted in self.evicted:
+                _clear_bits(evicted, self.evicted_start, evicted_start)
+            self.evicted_start = evicted_start
+
+    def store(self, rule_id: int, pos: int, value, end: int):
+        super().store(rule_id, pos, value, end)
+        if end - self.window >= self.start + self.step:
+            self._advance(end - self.window)
+        if pos < self.start:
+            self.evict(rule_id, pos)
+
+    def store_failure(self, rule_id: int, pos: int, error=None):
+        super().store_failure(rule_id, pos, error)
+        if pos < self.start:
+            self.evict(rule_id, pos)
+
+    def release(self, rule_id: int, pos: int):
+        super().release(rule_id, pos)
+        if pos < self.start:
+            self.evict(rule_id, pos)
+
+    def prune(self, pos: int):
+        if pos > self.start:
+            self._advance(pos)
+
+
+class BoundedMemoTable(EvictingMemoTable):
+    """
+    Memoization table holding at most a given number of entries, evicting the oldest entries first
+
+    The last evicted entries are remembered, up to the same number.
+    """
+
+    def __init__(self, rule_count: int, text_length: int, capacity: int):
+        """
+        :param rule_count:          the number of memoized rules of the parser
+        :param text_length:         the length of the source text
+        :param capacity:            the maximum number of entries (successes and failures)
+        """
+        super().__init__(rule_count, text_length)
+        self.capacity = capacity
+        # Keys of the entries, from the oldest to the most recent one
+        self.order = {}
+        # Keys of the evicted entries remembered, from the first evicted to the last one
+        self.evicted_order = {}
+
+    def _add(self, rule_id: int, pos: int):
+        order = self.order
+        order[(rule_id, pos)] = None
+        # Held entries are moved to the end instead of being evicted, as long as other entries can be evicted
+        while len(order) > self.capacity and len(self.held) < len(order):
+            key = next(iter(order))
+            del order[key]
+            if not self.evict(*key) and key in self.held:
+                order[key] = None
+
+    def store(self, rule_id: int, pos: int, value, end: int):
+        super().store(rule_id, pos, value, end)
+        self._add(rule_id, pos)
+
+    def store_failure(self, rule_id: int, pos: int, error=None):
+        super().store_failure(rule_id, pos, error)
+        self._add(rule_id, pos)
+
+    def forget_evicted(self, rule_id: int, pos: int):
+        evicted_order = self.evicted_order
+        evicted_order.pop((rule_id, pos), None)
+        evicted_order[(rule_id, pos)] = None
+        if len(evicted_order) > self.capacity:
+            rule_id, pos = next(iter(evicted_order))
+            del evicted_order[(rule_id, pos)]
+            _clear_bits(self.evicted[rule_id], pos, pos + 1)
+
+    def __len__(self):
+        return len(self.order)
+
+
+# Numbers of low bits dropped from the keys of the entries of an IncrementalMemoTable to index how far the entries of
+# each block of keys examined the text, at each level of the index (each block holding 64 blocks of the level below)
+_REACH_LEVEL_SHIFTS = (6, 12, 18, 24)
+
+
+class _SegmentEntries:
+    """
+    Entries of an IncrementalMemoTable stored for a part of the text, keyed by their position relative to it (see
+    _MemoSegment)
+
+    The ends of the entries and the positions after the text they examined are stored relative to their positions,
+    since they move along with them as long as the entries are kept. The farthest position (as a key) that the entries
+    of each block of keys examined is indexed, so that the entries examining a given position can be found without
+    scanning the others: the index may overestimate it for blocks whose entries were discarded.
+    """
+
+    def __init__(self, rule_count: int):
+        """
+        :param rule_count:          the number of memoized rules of the parser
+        """
+        self.values = [{} for _ in range(rule_count)]
+        self.ends = [{} for _ in range(rule_count)]
+        # Errors of the failures, along with the offset of their segment when they were stored
+        self.errors = [{} for _ in range(rule_count)]
+        self.examined = [{} for _ in range(rule_count)]
+        self.reaches = [{} for _ in _REACH_LEVEL_SHIFTS]
+
+    def discard(self, rule_id: int, key: int):
+        self.values[rule_id].pop(key, None)
+        self.ends[rule_id].pop(key, None)
+        self.errors[rule_id].pop(key, None)
+        self.examined[rule_id].pop(key, None)
+
+    def discard_range(self, start: int, end: int):
+        """
+        Discard the entries from a start key (inclusive) to an end key (exclusive)
+        """
+        for entries in (self.values, self.ends, self.errors, self.examined):
+            for rule_entries in entries:
+                _prune_dict(rule_entries, start, end)
+
+    def discard_reaching(self, start: int, end: int, reach: int):
+        """
+        Discard the entries from a start key (inclusive) to an end key (exclusive) that examined the text after a key
+        """
+        level = len(_REACH_LEVEL_SHIFTS) - 1
+        shift = _REACH_LEVEL_SHIFTS[level]
+        blocks = [block for block, block_reach in self.reaches[level].items()
+                  if block_reach > reach and block << shift < end and (block + 1) << shift > start]
+        for block in blocks:
+            self._discard_reaching_in_block(level, block, start, end, reach)
+
+    def _discard_reaching_in_block(self, level: int, block: int, start: int, end: int, reach: int):
+        """
+        Discard the entries of a block that examined the text after a key, updating how far the block examined it
+        """
+        shift = _REACH_LEVEL_SHIFTS[level]
+        block_reach = -1
+        if level == 0:
+            for key in range(max(start, block << shift), min(end, (block + 1) << shift)):
+                for rule_id, examined in enumerate(self.examined):
+                    length = examined.get(key)
+                    if length is not None and key + length > reach:
+                        self.discard(rule_id, key)
+            # Blocks are recomputed in full, since they may hold the entries of other segments
+            for key in range(block << shift, (block + 1) << shift):
+                for examined in self.examined:
+                    length = examined.get(key)
+                    if length is not None and key + length > block_reach:
+                        block_reach = key + length
+        else:
+            children = self.reaches[level - 1]
+            child_shift = _REACH_LEVEL_SHIFTS[level - 1]
+            for child in range(block << (shift - child_shift), (block + 1) << (shift - child_shift)):
+                child_reach = children.get(child)
+                if child_reach is None:
+                    continue
+                if child_reach > reach and child << child_shift < end and (child + 1) << child_shift > start:
+                    self._discard_reaching_in_block(level - 1, child, start, end, reach)
+                    child_reach = children.get(child, -1)
+                if child_reach > block_reach:
+                    block_reach = child_reach
+        if block_reach < 0:
+            self.reaches[level].pop(block, None)
+        else:
+            self.reaches[level][block] = block_reach
+
+    def entry_count(self, rule_id: int) -> int:
+        return len(self.values[rule_id])
+
+    def rule_memory_usage(self, rule_id: int) -> int:
+        containers = [self.values[rule_id], self.ends[rule_id], self.errors[rule_id], self.examined[rule_id]]
+        return sum(map(sys.getsizeof, containers))
+
+
+class _MemoSegment:
+    """
+    Part of the text whose entries all moved by the same offset since they were stored, keyed by their position minus
+    that offset (see IncrementalMemoTable)
+    """
+
+    __slots__ = ("start", "end", "offset", "entries")
+
+    def __init__(self, start: int, end: int, offset: int, entries: _SegmentEntries):
+        """
+        :param start:               the position of the start of the part
+        :param end:                 the position of the end of the part (the last part extends indefinitely)
+        :param offset:              the offset to subtract from the positions of the entries to get their keys
+        :param entries:             the entries, which may be shared with the other parts of a part cut by an edit
+        """
+        self.start = start
+        self.end = end
+        self.offset = offset
+        self.entries = entries
+
+
+# End of the last segment of an IncrementalMemoTable
+_UNBOUNDED = sys.maxsize
+
+
+class IncrementalMemoTable(MemoTable):
+    """
+    Memoization table recording how far each rule examined the source text, so that its entries can be reused once
+    the text is edited (see incremental.IncrementalParsingMixin), or once more text is received (see
+    push.PushParsingMixin)
+
+    The reader tracks the position after the farthest character it examined (see reader.LookaheadTrackingMixin).
+    When a rule is applied, the table saves that position and resets it to the position of the rule: when the result
+    of the rule is stored, the position reached is stored along with it, and accounted for in the enclosing rule (as
+    it is when the result is retrieved afterwards). Failures are stored among the results, so that all the entries of
+    a rule are keyed by position, and can be moved when the text before them is edited.
+
+    The table is edited in place, in a time depending on the size of the edit and on the number of entries it
+    discards rather than on the size of the text: the text is cut into segments at the edits, the entries of each
+    segment being moved at once by changing the offset of the segment, and the entries that examined the edited text
+    are found using the index of how far they examined it (see _SegmentEntries). The errors of the failures moved are
+    relocated when they are retrieved.
+    """
+
+    def __init__(self, rule_count: int, text_length: int):
+        """
+        :param rule_count:          the number of memoized rules of the parser
+        :param text_length:         the length of the source text
+        """
+        self.rule_count = rule_count
+        self.text_length = text_length
+        self.segments = [_MemoSegment(0, _UNBOUNDED, 0, _SegmentEntries(rule_count))]
+        # Starts of the segments, to find the segment of a position
+        self.starts = [0]
+        # Segment of the last position looked up
+        self.segment = self.segments[0]
+        # Reader tracking the text examined, set by the parser
+        self.reader = None
+        # Positions examined by the rules being applied, before they were applied
+        self.applications = []
+        self.held = set()
+
+    def _segment(self, pos: int) -> _MemoSegment:
+        segment = self.segment
+        if not segment.start <= pos < segment.end:
+            segment = self.segment = self.segments[bisect_right(self.starts, pos) - 1]
+        return segment
+
+    def get(self, rule_id: int, pos: int):
+        segment = self._segment(pos)
+        key = pos - segment.offset
+        result = segment.entries.values[rule_id].get(key, MISSING)
+        reader = self.reader
+        if result is MISSING:
+            self.applications.append(reader.examined)
+            reader.examined = pos
+        else:
+            examined = pos + segment.entries.examined[rule_id][key]
+            if examined > reader.examined:
+                reader.examined = examined
+        return result
+
+    def get_end(self, rule_id: int, pos: int) -> int:
+        segment = self._segment(pos)
+        return pos + segment.entries.ends[rule_id][pos - segment.offset]
+
+    def get_error(self, rule_id: int, pos: int):
+        segment = self._segment(pos)
+        errors = segment.entries.errors[rule_id]
+        key = pos - segment.offset
+        stored = errors.get(key)
+        if stored is None:
+            return None
+        error, offset = stored
+        if offset != segment.offset:
+            error = error.moved(segment.offset - offset, self.reader.source_index)
+            errors[key] = (error, segment.offset)
+        return error
+
+    def _applied(self, rule_id: int, pos: int):
+        """
+        Record how far a rule examined the text, and account for it in the enclosing rule unless the entry is still
+        being grown
+        """
+        reader = self.reader
+        segment = self._segment(pos)
+        entries = segment.entries
+        key = pos - segment.offset
+        length = reader.examined - pos
+        entries.examined[rule_id][key] = length
+        reach = key + length
+        for reaches, shift in zip(entries.reaches, _REACH_LEVEL_SHIFTS):
+            block = key >> shift
+            # The blocks of the levels above reach at least as far as the blocks they hold
+            if reaches.get(block, -1) >= reach:
+                break
+            reaches[block] = reach
+        if (rule_id, pos) not in self.held:
+            examined = self.applications.pop()
+            if examined > reader.examined:
+                reader.examined = examined
+
+    def store(self, rule_id: int, pos: int, value, end: int):
+        segment = self._segment(pos)
+        entries = segment.entries
+        key = pos - segment.offset
+        entries.values[rule_id][key] = value
+        entries.ends[rule_id][key] = end - pos
+        entries.errors[rule_id].pop(key, None)
+        self._applied(rule_id, pos)
+
+    def store_failure(self, rule_id: int, pos: int, error=None):
+        segment = self._segment(pos)
+        entries = segment.entries
+        key = pos - segment.offset
+        entries.values[rule_id][key] = FAILURE
+        entries.ends[rule_id].pop(key, None)
+        if error is not None:
+            entries.errors[rule_id][key] = (error, segment.offset)
+        else:
+            entries.errors[rule_id].pop(key, None)
+        self._applied(rule_id, pos)
+
+    def hold(self, rule_id: int, pos: int):
+        self.held.add((rule_id, pos))
+
+    def release(self, rule_id: int, pos: int):
+        self.held.discard((rule_id, pos))
+        # The last attempt to grow the entry examined text as well
+        self._applied(rule_id, pos)
+
+    def abandon(self):
+        """
+        Forget the rules being applied when parsing stops with an error, discarding the entries still being grown
+        """
+        for rule_id, pos in self.held:
+            segment = self._segment(pos)
+            segment.entries.discard(rule_id, pos - segment.offset)
+        self.held.clear()
+        self.applications.clear()
+
+    def edit(self, start: int, end: int, length: int, lookbehind: int = 0):
+        """
+        Edit the table for the text resulting from an edit, discarding the entries whose rules examined the edited
+        text, and moving those after it
+
+        :param start:               the offset of the edit
+        :param end:                 the end of the text replaced by the edit
+        :param length:              the length of the text inserted by the edit
+        :param lookbehind:          the number of characters the rules may have examined before their position
+        """
+        for segment in self.segments:
+            if segment.start >= start:
+                break
+            segment.entries.discard_reaching(
+                segment.start - segment.offset,
+                min(segment.end, start) - segment.offset,
+                start - segment.offset,
+            )
+        # The entries of the edited text, and those which may have examined it from after it (or those at the end of
+        # the text, when the edit reaches it)
+        appended = end == self.text_length
+        discarded_end = end + 1 if appended else end + lookbehind
+        for segment in self.segments:
+            if segment.start < discarded_end and segment.end > start:
+                segment.entries.discard_range(
+                    max(segment.start, start) - segment.offset,
+                    min(segment.end, discarded_end) - segment.offset,
+                )
+        shift = length - (end - start)
+        self.text_length += shift
+        if appended:
+            # No entry is left from the start of the edit: the last segment before it goes on over the text inserted,
+            # so that appending text (as push parsers do) does not cut the table into more segments
+            segments = [segment for segment in self.segments if segment.start < start]
+            if segments:
+                segments[-1] = _MemoSegment(segments[-1].start, _UNBOUNDED, segments[-1].offset, segments[-1].entries)
+            else:
+                segments = [_MemoSegment(0, _UNBOUNDED, 0, _SegmentEntries(self.rule_count))]
+            self.segments = segments
+            self.starts = [segment.start for segment in segments]
+            self.segment = segments[0]
+            return
+        segments = []
+        for segment in self.segments:
+            if segment.start < start:
+                segments.append(_MemoSegment(segment.start, min(segment.end, start), segment.offset, segment.entries))
+            if length and segment.start <= start < segment.end:
+                segments.append(_MemoSegment(start, start + length, start, _SegmentEntries(self.rule_count)))
+            if segment.end > end:
+                segments.append(_MemoSegment(
+                    max(segment.start, end) + shift,
+                    segment.end + shift if segment.end != _UNBOUNDED else _UNBOUNDED,
+                    segment.offset + shift,
+                    segment.entries,
+                ))
+        self.segments = segments
+        self.starts = [segment.start for segment in segments]
+        self.segment = segments[0]
+
+    def _segment_entries(self) -> List[_SegmentEntries]:
+        """
+        List the entries of the segments, which segments cut by the same edit share
+        """
+        return list({id(segment.entries): segment.entries for segment in self.segments}.values())
+
+    def entry_count(self, rule_id: int) -> int:
+        return sum(entries.entry_count(rule_id) for entries in self._segment_entries())
+
+    def __len__(self):
+        return sum(map(self.entry_count, range(self.rule_count)))
+
+    def rule_memory_usage(self, rule_id: int) -> int:
+        return sum(entries.rule_memory_usage(rule_id) for entries in self._segment_entries())
+
+    def memory_usage(self) -> int:
+        containers = [self.segments, self.starts]
+        for entries in self._segment_entries():
+            containers.extend(entries.reaches)
+        return sum(map(sys.getsizeof, containers)) + sum(map(self.rule_memory_usage, range(self.rule_count)))
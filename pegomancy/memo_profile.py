@@ -0,0 +1,238 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field, replace
+from io import StringIO
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .generate import ParserGenerator
+from .grammar import Grammar
+from .memo import MISSING, MemoTable
+from .parse import BaseParseError
+
+
+@dataclass
+class RuleProfile:
+    """
+    Class gathering the memoization statistics of a rule
+    """
+    calls: int = 0
+    hits: int = 0
+    entries: int = 0
+    # Time spent applying the rule when its result was not memoized yet, including the rules it applied
+    time: float = 0.0
+    # Largest memory used by the memoization table to store the results of the rule while parsing a single input
+    memory: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.calls if self.calls else 0.0
+
+    @property
+    def average_time(self) -> float:
+        misses = self.calls - self.hits
+        return self.time / misses if misses else 0.0
+
+    def merge(self, other: 'RuleProfile'):
+        self.calls += other.calls
+        self.hits += other.hits
+        self.entries += other.entries
+        self.time += other.time
+        self.memory = max(self.memory, other.memory)
+
+
+class ProfilingMemoTable(MemoTable):
+    """
+    Memoization table recording how useful memoizing each rule is
+
+    The time spent applying a rule is measured between the lookup that misses and the store of its result.
+    """
+
+    def __init__(self, rule_count: int, text_length: int):
+        super().__init__(rule_count, text_length)
+        self.profiles = [RuleProfile() for _ in range(rule_count)]
+        self.pending = []
+
+    def get(self, rule_id: int, pos: int):
+        result = super().get(rule_id, pos)
+        profile = self.profiles[rule_id]
+        profile.calls += 1
+        if result is MISSING:
+            self.pending.append((rule_id, pos, perf_counter()))
+        else:
+            profile.hits += 1
+        return result
+
+    def _stop_timer(self, rule_id: int, pos: int):
+        if self.pending and self.pending[-1][:2] == (rule_id, pos):
+            _, _, start = self.pending.pop()
+            self.profiles[rule_id].time += perf_counter() - start
+
+    def store(self, rule_id: int, pos: int, value, end: int):
+        self._stop_timer(rule_id, pos)
+        super().store(rule_id, pos, value, end)
+
+    def store_failure(self, rule_id: int, pos: int, error=None):
+        self._stop_timer(rule_id, pos)
+        super().store_failure(rule_id, pos, error)
+
+
+def _measure_memo_costs(samples: int = 20000):
+    """
+    Measure the average time taken by a memoization table lookup and by storing a result
+    """
+    table = MemoTable(1, samples)
+    start = perf_counter()
+    for pos in range(samples):
+        table.get(0, pos)
+    lookup_cost = (perf_counter() - start) / samples
+    start = perf_counter()
+    for pos in range(samples):
+        table.store(0, pos, None, pos)
+    store_cost = (perf_counter() - start) / samples
+    return lookup_cost, store_cost
+
+
+@dataclass
+class MemoProfile:
+    """
+    Class gathering the memoization statistics of the rules of a grammar over a corpus of inputs
+    """
+    rules: Dict[str, RuleProfile] = field(default_factory=dict)
+    # Average time taken by a lookup in the memoization table
+    lookup_cost: float = 0.0
+    # Average time taken by storing a result in the memoization table
+    store_cost: float = 0.0
+
+    def saved_time(self, rule_name: str) -> float:
+        """
+        Estimate the time saved by memoizing a rule, that is the time it would take to apply it again instead of
+        retrieving its memoized results, minus the time taken by the lookups and stores
+
+        :param rule_name:           the name of the rule
+        :return:                    the saved time in seconds, negative if memoizing the rule costs more than it saves
+        """
+        profile = self.rules.get(rule_name)
+        if profile is None:
+            return 0.0
+        overhead = profile.calls * self.lookup_cost + profile.entries * self.store_cost
+        return profile.hits * profile.average_time - overhead
+
+    def should_memoize(self, rule_name: str) -> bool:
+        return self.saved_time(rule_name) > 0
+
+    def apply(self, grammar: Grammar) -> Grammar:
+        """
+        Mark the rules of a grammar as memoized or not according to the profile
+
+        Rules explicitly marked with (memo) or (nomemo) are left as is, and left-recursive rules stay memoized.
+
+        :param grammar:             the grammar
+        :return:                    a copy of the grammar whose rules are marked
+        """
+        rules = [
+            rule if rule.memoize is not None else replace(rule, memoize=self.should_memoize(rule.name))
+            for rule in grammar.rules
+        ]
+        return replace(grammar, rules=rules)
+
+    def report(self, file: TextIO):
+        """
+        Print a report of the expected savings of memoizing each rule
+
+        :param file:                the file to print the report to
+        """
+        header = f"{'rule':<24} {'calls':>9} {'hits':>9} {'hit rate':>8} {'entries':>9} {'time (s)':>9} " \
+                 f"{'saved (s)':>10} {'memory (KiB)':>12}  decision"
+        print(header, file=file)
+        print("-" * len(header), file=file)
+        for name, profile in sorted(self.rules.items(), key=lambda item: -self.saved_time(item[0])):
+            decision = "memoize" if self.should_memoize(name) else "do not memoize"
+            print(
+                f"{name:<24} {profile.calls:>9} {profile.hits:>9} {profile.hit_rate:>8.1%} {profile.entries:>9} "
+                f"{profile.time:>9.4f} {self.saved_time(name):>10.4f} {profile.memory / 1024:>12.1f}  {decision}",
+                file=file,
+            )
+        speedup = sum(max(0.0, -self.saved_time(name)) for name in self.rules)
+        memory = sum(profile.memory for name, profile in self.rules.items() if not self.should_memoize(name))
+        print(f"\nexpected time saved over the corpus compared to memoizing every rule: {speedup:.4f}s", file=file)
+        print(f"expected peak memory saved per input: {memory / 1024:.1f}KiB", file=file)
+
+    def save(self, file: TextIO):
+        data = {
+            "lookup_cost": self.lookup_cost,
+            "store_cost": self.store_cost,
+            "rules": {name: asdict(profile) for name, profile in self.rules.items()},
+        }
+        json.dump(data, file, indent=2)
+
+    @staticmethod
+    def load(file: TextIO) -> 'MemoProfile':
+        data = json.load(file)
+        return MemoProfile(
+            rules={name: RuleProfile(**profile) for name, profile in data["rules"].items()},
+            lookup_cost=data["lookup_cost"],
+            store_cost=data["store_cost"],
+        )
+
+
+def iter_corpus(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Iterate over the files of a corpus
+
+    :param paths:                   paths to files, or to directories whose files are read recursively
+    :return:                        an iterator over the paths of the files
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, file_names in sorted(os.walk(path)):
+                for file_name in sorted(file_names):
+                    yield os.path.join(directory, file_name)
+        else:
+            yield path
+
+
+def profile_grammar(
+        grammar: Grammar,
+        texts: Iterable[str],
+        rule_name: str,
+        *,
+        use_exceptions: bool = True,
+        errors: Optional[List[BaseParseError]] = None,
+        **parser_kwargs
+) -> MemoProfile:
+    """
+    Parse a corpus of inputs with a parser memoizing every rule of a grammar, recording how useful memoizing each
+    rule is
+
+    :param grammar:                 the grammar
+    :param texts:                   the inputs
+    :param rule_name:               the name of the rule to parse the inputs with
+    :param use_exceptions:          whether the parser should be generated with exceptions or not
+    :param errors:                  a list to which the errors raised while parsing are added, if any
+    :param parser_kwargs:           additional arguments given to the parser (such as whitespace_regex)
+    :return:                        the profile
+    """
+    source = StringIO()
+    profiled_grammar = replace(grammar, settings={**grammar.settings, "memoize_all": True})
+    ParserGenerator(use_exceptions=use_exceptions).generate_parser(profiled_grammar, file=source)
+    namespace = {}
+    exec(compile(source.getvalue(), "<profiled parser>", "exec"), namespace)
+    parser_class = type("ProfiledParser", (namespace["Parser"],), {"memo_table_class": ProfilingMemoTable})
+
+    lookup_cost, store_cost = _measure_memo_costs()
+    profile = MemoProfile(lookup_cost=lookup_cost, store_cost=store_cost)
+    for text in texts:
+        parser = parser_class(text, **parser_kwargs)
+        try:
+            parser.parse(rule_name)
+        except BaseParseError as e:
+            if errors is not None:
+                errors.append(e)
+        table = parser.memo
+        for rule_id, name in enumerate(parser.memoized_rules):
+            rule_profile = table.profiles[rule_id]
+            rule_profile.entries = table.entry_count(rule_id)
+            rule_profile.memory = table.rule_memory_usage(rule_id)
+            profile.rules.setdefault(name, RuleProfile()).merge(rule_profile)
+    return profile
@@ -0,0 +1,177 @@
+from dataclasses import fields, replace
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from .grammar import AbstractItem, CutItem, Grammar, InlinedRuleItem, RuleItem
+
+
+def _map_rule_items(item: AbstractItem, f: Callable[[RuleItem], AbstractItem]) -> AbstractItem:
+    """
+    Rebuild an item, replacing the rule items it contains (or is) with the result of a function
+    """
+    if isinstance(item, RuleItem):
+        return f(item)
+    changes = {}
+    for item_field in fields(item):
+        value = getattr(item, item_field.name)
+        if isinstance(value, AbstractItem):
+            changes[item_field.name] = _map_rule_items(value, f)
+    return replace(item, **changes) if changes else item
+
+
+def _map_grammar_rule_items(grammar: Grammar, f: Callable[[RuleItem], AbstractItem], before_cut: bool = False):
+    """
+    Rebuild a grammar, replacing the rule items of its alternatives with the result of a function
+
+    :param grammar:             the grammar
+    :param f:                   the function
+    :param before_cut:          whether to only replace the rule items found before the first cut of the alternatives
+    :return:                    the rebuilt grammar
+    """
+    rules = []
+    for rule in grammar.rules:
+        alternatives = []
+        for alt in rule.alternatives:
+            items = []
+            for item in alt.items:
+                if before_cut and isinstance(item, CutItem):
+                    items.extend(alt.items[len(items):])
+                    break
+                items.append(_map_rule_items(item, f))
+            alternatives.append(replace(alt, items=items))
+        rules.append(replace(rule, alternatives=alternatives))
+    return replace(grammar, rules=rules)
+
+
+def collapse_synthesized_rules(grammar: Grammar, start_rule: Optional[str]) -> Grammar:
+    """
+    Merge the rules synthesized from identical parenthesized groups of alternatives
+
+    :param grammar:             the grammar
+    :param start_rule:          the rule parsing starts from, if known
+    :return:                    the optimized grammar
+    """
+    while True:
+        canonical_names = {}
+        renames = {}
+        for rule in grammar.rules:
+            if not rule.synthesized:
+                continue
+            key = tuple(
+                tuple((item.generate_condition(), repr(item.attributes)) for item in alt.items)
+                for alt in rule.alternatives
+            )
+            if key in canonical_names:
+                renames[rule.name] = canonical_names[key]
+            else:
+                canonical_names[key] = rule.name
+        if not renames:
+            return grammar
+        grammar = _map_grammar_rule_items(
+            grammar,
+            lambda item: replace(item, rule_name=renames.get(item.rule_name, item.rule_name)),
+        )
+        grammar = replace(grammar, rules=[rule for rule in grammar.rules if rule.name not in renames])
+
+
+def _reachable_rules(grammar: Grammar, start_rules: Iterable[str]) -> Set[str]:
+    reachable = set()
+    pending = list(start_rules)
+    while pending:
+        for name in grammar.rule_by_name(pending.pop()).referenced_rules():
+            if name not in reachable:
+                reachable.add(name)
+                pending.append(name)
+    return reachable
+
+
+def inline_rules(grammar: Grammar, start_rule: Optional[str]) -> Grammar:
+    """
+    Inline the rules made of a single alternative holding a single item (such as `integer: r"[0-9]+"` or a
+    parenthesized group holding a single item), which saves a method call each time they are applied
+
+    The inlined item still builds the node of the rule (applying its handler, if any). Rules that are memoized or
+    recursive are not inlined, nor are the rules applied after a cut: the error raised when they fail is then
+    reported, and it would not name the rule anymore.
+
+    :param grammar:             the grammar
+    :param start_rule:          the rule parsing starts from, if known
+    :return:                    the optimized grammar
+    """
+    memoized = grammar.memoized_rules()
+    candidates = {}
+    for rule in grammar.rules:
+        if len(rule.alternatives) != 1 or len(rule.alternatives[0].items) != 1:
+            continue
+        if isinstance(rule.alternatives[0].items[0], CutItem) or rule.name in memoized or rule.memoize is True:
+            continue
+        if rule.name not in _reachable_rules(grammar, [rule.name]):
+            candidates[rule.name] = rule.alternatives[0].items[0]
+    inlined_items = {}
+
+    def inline(item: RuleItem) -> AbstractItem:
+        if item.rule_name not in candidates:
+            return item
+        if item.rule_name not in inlined_items:
+            inlined_items[item.rule_name] = _map_rule_items(candidates[item.rule_name], inline)
+        return InlinedRuleItem(item.rule_name, inlined_items[item.rule_name], item.attributes)
+
+    return _map_grammar_rule_items(grammar, inline, before_cut=True)
+
+
+def remove_dead_rules(grammar: Grammar, start_rule: Optional[str]) -> Grammar:
+    """
+    Remove the rules that cannot be reached from the start rule
+
+    :param grammar:             the grammar
+    :param start_rule:          the rule parsing starts from, or None to keep every rule
+    :return:                    the optimized grammar
+    """
+    if start_rule is None:
+        return grammar
+    reachable = _reachable_rules(grammar, [start_rule]) | {start_rule}
+    return replace(grammar, rules=[rule for rule in grammar.rules if rule.name in reachable])
+
+
+def left_factoring(grammar: Grammar, start_rule: Optional[str]) -> Grammar:
+    """
+    Match the prefixes shared by consecutive alternatives only once (see Grammar.left_factored)
+
+    :param grammar:             the grammar
+    :param start_rule:          the rule parsing starts from, if known
+    :return:                    the optimized grammar
+    """
+    return grammar.left_factored()
+
+
+# Optimization passes, in the order they are applied
+PASSES: Dict[str, Callable[[Grammar, Optional[str]], Grammar]] = {
+    "collapse-synthesized-rules": collapse_synthesized_rules,
+    "inline-rules": inline_rules,
+    "remove-dead-rules": remove_dead_rules,
+    "left-factoring": left_factoring,
+}
+
+
+def optimize_grammar(
+    grammar: Grammar,
+    start_rule: Optional[str] = None,
+    disabled_passes: Iterable[str] = (),
+) -> Grammar:
+    """
+    Apply the optimization passes to a grammar before generating its parser
+
+    :param grammar:             the grammar
+    :param start_rule:          the rule parsing starts from, or None if parsing may start from any rule (in which
+                                case no rule is removed)
+    :param disabled_passes:     the names of the passes not to apply (see PASSES), for example to measure the speedup
+                                of each of them
+    :return:                    the optimized grammar
+    """
+    disabled_passes = set(disabled_passes)
+    unknown_passes = disabled_passes - set(PASSES)
+    if unknown_passes:
+        raise ValueError(f"unknown optimization passes: {', '.join(sorted(unknown_passes))}")
+    for name, optimization_pass in PASSES.items():
+        if name not in disabled_passes:
+            grammar = optimization_pass(grammar, start_rule)
+    return grammar
@@ -1,54 +1,325 @@
-from typing import Callable, Dict, List, Optional
+import mmap
+import os
+import re
+from functools import lru_cache, wraps
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple, Union
 
-from .reader import Reader
-from .source_info import SourceLocation
+from .grammar_items import ItemAttributes
+from .memo import FAILURE, MISSING, BoundedMemoTable, MemoTable, PrunableMemoTable, WindowedMemoTable
+from .reader import \
+    BufferReader, \
+    Reader, \
+    compile_regex, \
+    embeddable_regex, \
+    literal_regex, \
+    non_significant_regex, \
+    repetition_regex, \
+    sequence_regex
+from .source_info import SourceIndex, SourceLocation
 
+EXPECTED_STRING_MESSAGE = "expected '{}'"
+EXPECTED_REGEX_MESSAGE = "expected text matching the '{}' pattern"
+EXPECTED_EOF_MESSAGE = "expected end of input"
+EXPECTED_REPETITIONS_MESSAGE = "expected at least {} repetitions of a {}"
+UNEXPECTED_MESSAGE = "unexpected {}"
+EXPECTED_ONE_OF_MESSAGE = "expected {}"
+UNEXPECTED_INPUT_MESSAGE = "unexpected input"
 
-class ParseError(Exception):
-    def __init__(self, message: str, location: SourceLocation):
-        self.message = message
-        self.location = location
 
+class _EndOfInput:
+    def __str__(self):
+        return "end of input"
+
+
+# Expected item recorded when the end of the input was expected
+END_OF_INPUT = _EndOfInput()
+
+
+class _Default:
     def __repr__(self):
-        return f"ParseError(message={self.message!r}, location={self.location!r})"
+        return "DEFAULT"
 
-    def __str__(self):
-        return f"parse error: {self.message} (at {self.location})"
 
+# Value of the whitespace and comments patterns of parsers standing for the patterns declared by their grammar
+DEFAULT = _Default()
+
+
+class BaseParseError(Exception):
+    """
+    Base class for parse errors
+
+    Errors are created (and most of them discarded) each time an alternative fails, so they only hold the offset
+    at which they occurred: the line and column are computed the first time the location is accessed. Similarly,
+    the message is only formatted with its arguments when it is accessed.
+    """
 
-class CutError(Exception):
-    def __init__(self, message: str, location: SourceLocation):
-        self.message = message
-        self.location = location
+    def __init__(
+            self,
+            message: str,
+            location: Optional[SourceLocation] = None,
+            *,
+            offset: Optional[int] = None,
+            source_index: Optional[SourceIndex] = None,
+            message_args: Tuple = (),
+    ):
+        """
+        :param message:             the error message, or a format string if message_args is given
+        :param location:            the location of the error, if already known
+        :param offset:              the offset of the error, used to compute its location lazily
+        :param source_index:        the index used to compute the location of the error from its offset
+        :param message_args:        the arguments used to format the message
+        """
+        self._message = message
+        self._location = location
+        self.message_args = message_args
+        self.offset = location.offset if location is not None else offset
+        self.source_index = source_index
+
+    @classmethod
+    def from_error(cls, error: 'BaseParseError'):
+        """
+        Create an error from another one, without resolving its message or location
+
+        :param error:               the original error
+        :return:                    the new error
+        """
+        return cls(
+            error._message,
+            error._location,
+            offset=error.offset,
+            source_index=error.source_index,
+            message_args=error.message_args,
+        )
+
+    def moved(self, offset: int, source_index: SourceIndex) -> 'BaseParseError':
+        """
+        Create the error of the same failure, once the text before it moved by an offset (as when the text is edited)
+
+        :param offset:              the offset by which the failure moved
+        :param source_index:        the index used to compute the location of the new error from its offset
+        :return:                    the new error
+        """
+        return type(self)(
+            self._message,
+            offset=self.offset + offset,
+            source_index=source_index,
+            message_args=self.message_args,
+        )
+
+    @property
+    def message(self) -> str:
+        if self.message_args:
+            return self._message.format(*self.message_args)
+        return self._message
+
+    @property
+    def location(self) -> SourceLocation:
+        if self._location is None:
+            self._location = self.source_index.location_from_offset(self.offset)
+        return self._location
 
     def __repr__(self):
-        return f"CutError(message={self.message!r}, location={self.location!r})"
+        return f"{type(self).__name__}(message={self.message!r}, location={self.location!r})"
 
     def __str__(self):
         return f"parse error: {self.message} (at {self.location})"
 
 
+class ParseError(BaseParseError):
+    pass
+
+
+class CutError(BaseParseError):
+    pass
+
+
 class BaseParser:
     """
     Base class for all parsers
     """
 
+    # Patterns matching the whitespace and comments skipped between items, unless given when creating the parser (the
+    # generated parsers use the patterns declared by the whitespace and comments settings of their grammar, if any)
     DEFAULT_WHITESPACE_REGEX = r"[ \t]+"
+    DEFAULT_COMMENTS_REGEX = None
+    # Pattern matching where the text may be cut to parse the elements of an iterable rule in parallel, as declared by
+    # the split setting of the grammar (see batch.parse_split)
+    SPLIT_REGEX = None
+
+    # Number of memoized rules, whose IDs index the memoization table
+    rule_count = 0
+    # Names of the memoized rules, indexed by their IDs
+    memoized_rules = ()
+    # Class of the memoization table
+    memo_table_class = MemoTable
+    # Classes of the readers of the source text, and of encoded source text
+    reader_class = Reader
+    buffer_reader_class = BufferReader
 
     def __init__(
             self,
-            text: str,
+            text: Union[str, bytes, mmap.mmap],
             rule_handler=None,
             *,
-            whitespace_regex: Optional[str] = DEFAULT_WHITESPACE_REGEX,
-            comments_regex: Optional[str] = None,
+            whitespace_regex: Optional[str] = DEFAULT,
+            comments_regex: Optional[str] = DEFAULT,
+            memo_window: Optional[int] = None,
+            memo_capacity: Optional[int] = None,
+            decode_tokens: bool = True,
     ):
-        self.cache = {}
-        self.reader = Reader(text, whitespace_regex=whitespace_regex, comments_regex=comments_regex)
+        """
+        :param text:                the source text, or a bytes-like object (such as bytes, a memoryview or a
+                                    memory map) holding it encoded in UTF-8 (see BufferReader)
+        :param rule_handler:        the object whose methods named after the rules transform their results, if any
+        :param whitespace_regex:    the pattern matching the whitespace skipped between items, None to skip none, or
+                                    DEFAULT for DEFAULT_WHITESPACE_REGEX
+        :param comments_regex:      the pattern matching the comments skipped between items, None to skip none, or
+                                    DEFAULT for DEFAULT_COMMENTS_REGEX
+        :param memo_window:         if given, only keep the memoized results within a window of this many characters
+                                    behind the farthest position reached (see WindowedMemoTable)
+        :param memo_capacity:       if given, keep at most this many memoized results, evicting the oldest ones
+                                    first (see BoundedMemoTable)
+        :param decode_tokens:       whether the text matched in a bytes-like source text is decoded, or returned as
+                                    bytes
+        """
+        if memo_window is not None and memo_capacity is not None:
+            raise ValueError("memo_window and memo_capacity cannot be used together")
+        if whitespace_regex is DEFAULT:
+            whitespace_regex = self.DEFAULT_WHITESPACE_REGEX
+        if comments_regex is DEFAULT:
+            comments_regex = self.DEFAULT_COMMENTS_REGEX
+        if memo_window is not None:
+            self.memo = WindowedMemoTable(self.rule_count, len(text), memo_window)
+        elif memo_capacity is not None:
+            self.memo = BoundedMemoTable(self.rule_count, len(text), memo_capacity)
+        else:
+            self.memo = self.memo_table_class(self.rule_count, len(text))
+        if isinstance(text, str):
+            self.reader = self.reader_class(text, whitespace_regex=whitespace_regex, comments_regex=comments_regex)
+        else:
+            self.reader = self.buffer_reader_class(
+                text,
+                whitespace_regex=whitespace_regex,
+                comments_regex=comments_regex,
+                decode_tokens=decode_tokens,
+            )
         self.rule_handler = rule_handler
+        self.farthest_failure_pos = 0
+        self.farthest_failure_expected = set()
+
+    @classmethod
+    def from_file(cls, path: str, *args, **kwargs):
+        """
+        Create a parser reading a file through a read-only memory map, instead of reading and decoding it at once
+
+        The file must be encoded in UTF-8, and positions are byte offsets (see BufferReader). The memory map is closed
+        by close(), which is called when the parser is used as a context manager.
+
+        :param path:                the path of the file
+        :param args:                the other arguments of the parser
+        :param kwargs:              the other keyword arguments of the parser
+        :return:                    the parser
+        """
+        with open(path, "rb") as f:
+            # Empty files cannot be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                buffer = b""
+            else:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, *args, **kwargs)
+
+    def close(self):
+        """
+        Close the memory map the parser reads from, if it was created using from_file
+
+        The location of the errors raised by the parser can then no longer be computed, unless it was accessed
+        before.
+        """
+        if isinstance(self.reader.text, mmap.mmap):
+            self.reader.text.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Errors compute their location lazily from the text, which is about to be unmapped
+        error = exc_val
+        while error is not None:
+            if isinstance(error, BaseParseError) and error.source_index is self.reader.source_index:
+                error.location
+            error = error.__context__
+        self.close()
+
+    def parse(self, rule_name: str):
+        """
+        Parse the source text using a given rule
+
+        This is the entry point for parsers generated without exceptions, whose rules return FAILURE when they do
+        not match: the failure is then reported as a single ParseError describing the farthest failure.
+
+        :param rule_name:   the name of the rule to use
+        :return:            the result of the rule
+        """
+        result = getattr(self, rule_name)()
+        if result is FAILURE:
+            raise self.make_farthest_error()
+        return result
+
+    def record_failure(self, pos: int, expected):
+        """
+        Record that an item was expected at a given position, keeping only the farthest failures
+
+        :param pos:         the position at which the item was expected
+        :param expected:    the expected item: a literal string, a compiled pattern, END_OF_INPUT or a ParseError
+        """
+        if pos > self.farthest_failure_pos:
+            self.farthest_failure_pos = pos
+            self.farthest_failure_expected = {expected}
+        elif pos == self.farthest_failure_pos:
+            self.farthest_failure_expected.add(expected)
 
-    def make_error(self, *, message: str, pos: int):
-        return ParseError(message=message, location=self.reader.source_index.location_from_offset(pos))
+    def record_failures(self, pos: int, expected: Iterable):
+        """
+        Record that any of several items was expected at a given position, keeping only the farthest failures
+
+        :param pos:         the position at which the items were expected
+        :param expected:    the expected items (see record_failure)
+        """
+        if pos > self.farthest_failure_pos:
+            self.farthest_failure_pos = pos
+            self.farthest_failure_expected = set(expected)
+        elif pos == self.farthest_failure_pos:
+            self.farthest_failure_expected.update(expected)
+
+    def make_farthest_error(self) -> ParseError:
+        """
+        Create an error describing the farthest failure recorded so far
+
+        :return:            the error
+        """
+        if not self.farthest_failure_expected:
+            return self.make_error(message=UNEXPECTED_INPUT_MESSAGE, pos=self.farthest_failure_pos)
+        expected = _describe_expected_items(self.farthest_failure_expected)
+        return self.make_error(message=EXPECTED_ONE_OF_MESSAGE, args=(expected,), pos=self.farthest_failure_pos)
+
+    def make_cut_error(self) -> CutError:
+        """
+        Create the error raised when an alternative fails after a cut, describing the farthest failure
+
+        :return:            the error
+        """
+        return CutError.from_error(self.make_farthest_error())
+
+    def make_error(self, *, message: str, pos: int, args: Tuple = ()):
+        """
+        Create an error occurring at a given position, whose location is only computed if needed
+
+        :param message:     the error message, or a format string if args are given
+        :param pos:         the position of the error
+        :param args:        the arguments used to format the message
+        :return:            the error
+        """
+        return ParseError(message, offset=pos, source_index=self.reader.source_index, message_args=args)
 
     def mark(self) -> int:
         """
@@ -70,58 +341,53 @@ class BaseParser:
         return self.reader.eof()
 
 
-def _handle_result(result):
-    success, value = result
-    if success:
-        return value
-    else:
-        raise value
+def _describe_expected(expected) -> str:
+    if isinstance(expected, str):
+        return repr(expected)
+    if isinstance(expected, Pattern):
+        return f"text matching the {expected.pattern!r} pattern"
+    if isinstance(expected, BaseParseError):
+        return expected.message
+    return str(expected)
 
 
-def _call_rule(f, self, *args):
-    try:
-        result = f(self, *args)
-        return True, result
-    except ParseError as e:
-        return False, e
+def _describe_expected_items(expected: Iterable) -> str:
+    descriptions = sorted(set(map(_describe_expected, expected)))
+    if len(descriptions) == 1:
+        return descriptions[0]
+    return f"one of {', '.join(descriptions[:-1])} or {descriptions[-1]}"
 
 
-def parsing_rule(f):
-    """
-    Wrap a parsing function to memoize its calls
-
-    :param f:                   the function to wrap
-    :return:                    the wrapped function
-    """
-
-    def wrapped_func(self: BaseParser, *args):
+def _parsing_rule(f, rule_id: int, raising: bool):
+    def wrapped_func(self: BaseParser):
         self.reader.consume_non_significant()
         pos = self.mark()
-        position_cache = self.cache.get(pos)
-        if position_cache is None:
-            position_cache = self.cache[pos] = {}
-        invocation_key = (f, args)
-        if invocation_key in position_cache:
-            result, end_position = position_cache[invocation_key]
-            self.rewind(end_position)
+        memo = self.memo
+        result = memo.get(rule_id, pos)
+        if result is MISSING:
+            try:
+                result = f(self)
+            except ParseError as e:
+                memo.store_failure(rule_id, pos, e)
+                raise
+            if result is FAILURE:
+                memo.store_failure(rule_id, pos)
+            else:
+                memo.store(rule_id, pos, result, self.mark())
+        elif result is FAILURE:
+            if raising:
+                raise memo.get_error(rule_id, pos)
         else:
-            result = _call_rule(f, self, *args)
-            end_position = self.mark()
-            position_cache[invocation_key] = result, end_position
-        return _handle_result(result)
+            self.rewind(memo.get_end(rule_id, pos))
+        return result
 
     return wrapped_func
 
 
-def left_recursive_parsing_rule(f):
-    """
-    Wrap a left-recursive parsing function to memoize its calls
-
-    :param f:                   the function to wrap
-    :return:                    the wrapped function
-    """
+def _left_recursive_parsing_rule(f, rule_id: int, raising: bool):
+    seed_message = f"expected a {f.__name__}"
 
-    def wrapped_func(self: BaseParser, *args):
+    def wrapped_func(self: BaseParser):
         """
         The approach used here allows writing left-recursive rules, which otherwise would recurse indefinitely.
         Note that it does not support indirect left recursion.
@@ -137,32 +403,203 @@ def left_recursive_parsing_rule(f):
         """
         self.reader.consume_non_significant()
         pos = self.mark()
-        position_cache = self.cache.get(pos)
-        if position_cache is None:
-            position_cache = self.cache[pos] = {}
-        invocation_key = (f, args)
-        if invocation_key in position_cache:
-            result, end_position = position_cache[invocation_key]
-            self.rewind(end_position)
-        else:
-            failing_seed = self.make_error(message=f"expected a {f.__name__}", pos=pos)
-            position_cache[invocation_key] = last_result, last_pos = (False, failing_seed), pos
+        memo = self.memo
+        result = memo.get(rule_id, pos)
+        if result is MISSING:
+            failing_seed = self.make_error(message=seed_message, pos=pos) if raising else None
+            memo.hold(rule_id, pos)
+            memo.store_failure(rule_id, pos, failing_seed)
+            result, last_pos = FAILURE, pos
             while True:
                 self.rewind(pos)
-                result = _call_rule(f, self, *args)
+                try:
+                    grown = f(self)
+                except ParseError:
+                    break
                 end_position = self.mark()
                 if end_position <= last_pos:
                     break
-                position_cache[invocation_key] = result, end_position
-                last_result, last_pos = result, end_position
-            result = last_result
+                memo.store(rule_id, pos, grown, end_position)
+                result, last_pos = grown, end_position
+            memo.release(rule_id, pos)
             self.rewind(last_pos)
-        return _handle_result(result)
+            # Releasing the seed may evict it (see WindowedMemoTable), so its error is raised rather than looked up
+            if result is FAILURE and raising:
+                raise failing_seed
+        elif result is FAILURE:
+            if raising:
+                raise memo.get_error(rule_id, pos)
+        else:
+            self.rewind(memo.get_end(rule_id, pos))
+        return result
+
+    return wrapped_func
+
+
+def _check_rule_id(rule_id: int):
+    """
+    Check the argument of a decorator memoizing a parsing function, which parsers generated before rules had IDs
+    decorated directly
+    """
+    if callable(rule_id):
+        raise TypeError(
+            f"rule {rule_id.__name__} is memoized without a rule ID: the parser was generated by an older version of "
+            f"pegomancy, and must be generated again"
+        )
+
+
+def parsing_rule(rule_id: int):
+    """
+    Wrap a parsing function to memoize its calls
+
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    _check_rule_id(rule_id)
+    return lambda f: _parsing_rule(f, rule_id, raising=True)
+
+
+def left_recursive_parsing_rule(rule_id: int):
+    """
+    Wrap a left-recursive parsing function to memoize its calls
+
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    _check_rule_id(rule_id)
+    return lambda f: _left_recursive_parsing_rule(f, rule_id, raising=True)
+
+
+def sentinel_parsing_rule(rule_id: int):
+    """
+    Wrap a parsing function returning FAILURE instead of raising a ParseError to memoize its calls
+
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    return lambda f: _parsing_rule(f, rule_id, raising=False)
+
+
+def sentinel_left_recursive_parsing_rule(rule_id: int):
+    """
+    Wrap a left-recursive parsing function returning FAILURE instead of raising a ParseError to memoize its calls
+
+    :param rule_id:             the ID of the rule in the memoization table of the parser
+    :return:                    the decorator wrapping the function
+    """
+    return lambda f: _left_recursive_parsing_rule(f, rule_id, raising=False)
+
+
+def choice_point(f):
+    """
+    Wrap a parsing function that may rewind the cursor to where it was applied to try another alternative, so that
+    the memo entries after this position are kept until it is done (see MemoPruningMixin)
+
+    :param f:                   the parsing function
+    :return:                    the wrapped function
+    """
+
+    @wraps(f)
+    def wrapped_func(self):
+        points = self.choice_points
+        depth = len(points)
+        points.append(self.mark())
+        try:
+            return f(self)
+        finally:
+            del points[depth:]
 
     return wrapped_func
 
 
+@lru_cache(maxsize=None)
+def _sequence_groups(length: int) -> Tuple[str, ...]:
+    """
+    Compute the names of the groups capturing the terminals of a sequence in the patterns built by sequence_regex
+    """
+    return tuple(f"__v{i}" for i in range(length))
+
+
 class RawTextParser(BaseParser):
+    # Regex patterns used by the grammar, compiled once when the parser class is generated
+    regexes: Dict[str, Pattern] = {}
+    # Sequences of terminals matched at once by expect_sequence and expect_repetition, each terminal being described
+    # by the name of the method matching it and its argument
+    terminal_sequences: Tuple[Tuple[Tuple[str, str], ...], ...] = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Patterns matching the terminal sequences, which depend on the whitespace and comments regexes of the reader
+        self.sequence_patterns = {}
+
+    def _sequence_pattern(self, index: int, minimum: Optional[int] = None) -> Optional[Pattern]:
+        """
+        Compile (once) the pattern matching a terminal sequence
+
+        :param index:               the index of the sequence in terminal_sequences
+        :param minimum:             the minimum number of repetitions if the pattern must match the repetitions of a
+                                    single terminal, or None to match the sequence once
+        :return:                    the pattern, or None if the sequence cannot be matched using a single pattern
+        """
+        key = (index, minimum)
+        if key in self.sequence_patterns:
+            return self.sequence_patterns[key]
+        pattern = None
+        skip_regex = non_significant_regex(self.reader.whitespace_regex, self.reader.comments_regex)
+        items = []
+        for method, argument in self.terminal_sequences[index]:
+            items.append(literal_regex(argument) if method == "expect_string" else embeddable_regex(argument))
+        if skip_regex is not None and None not in items:
+            try:
+                if minimum is None:
+                    pattern = compile_regex(sequence_regex(items, skip_regex))
+                else:
+                    pattern = compile_regex(repetition_regex(items[0], minimum, skip_regex))
+            except re.error:
+                pass
+        self.sequence_patterns[key] = pattern
+        return pattern
+
+    def expect_sequence(self, index: int) -> Tuple[str, ...]:
+        """
+        Expect a sequence of terminals, matching them using a single pattern when possible
+
+        Errors are reported by matching the terminals one after the other, as if they had not been fused.
+
+        :param index:               the index of the sequence in terminal_sequences
+        :return:                    the strings matched by the terminals
+        """
+        sequence = self.terminal_sequences[index]
+        pattern = self._sequence_pattern(index)
+        if pattern is not None:
+            values = self.reader.expect_groups(pattern, _sequence_groups(len(sequence)))
+            if values is not None:
+                return values
+        values = []
+        for method, argument in sequence:
+            value = getattr(self, method)(argument)
+            # Only returned by SentinelTextParser, the other parsers raising a ParseError instead
+            if value is FAILURE:
+                return FAILURE
+            values.append(value)
+        return tuple(values)
+
+    def expect_repetition(self, index: int, minimum: int) -> List[str]:
+        """
+        Expect a terminal repeated multiple times, matching the repetitions using a single pattern when possible
+
+        :param index:               the index of the terminal, as a sequence of one terminal in terminal_sequences
+        :param minimum:             the minimum number of repetitions
+        :return:                    the strings matched by the repetitions
+        """
+        (method, argument), = self.terminal_sequences[index]
+        pattern = self._sequence_pattern(index, minimum)
+        if pattern is not None:
+            values = self.reader.expect_repetitions(pattern, self._sequence_pattern(index), "__v0")
+            if values is not None:
+                return values
+        return self._repeat(minimum, lambda: getattr(self, method)(argument))
+
     def _wrap_node(self, rule_name, values, attributes):
         named = {}
         values, attributes = [list(t) for t in zip(*filter(lambda va: not va[1].ignore, zip(values, attributes)))]
@@ -178,6 +615,16 @@ class RawTextParser(BaseParser):
             values = getattr(self.rule_handler, rule_name)(values)
         return values
 
+    def _inlined_node(self, rule_name, value, attributes=ItemAttributes()):
+        """
+        Build the node of a rule made of a single item, whose item was matched in place of the rule
+
+        :param rule_name:           the name of the rule
+        :param value:               the value of the item
+        :param attributes:          the attributes of the item, if it is named or ignored
+        """
+        return self._wrap_node(rule_name, [value], [attributes])
+
     def _lookahead(self, f):
         """
         Apply a rule without consuming any input, succeeding if the rule succeeds
@@ -200,7 +647,7 @@ class RawTextParser(BaseParser):
         except ParseError:
             pass
         else:
-            raise self.make_error(message=f"unexpected {f.__name__}", pos=self.mark())
+            raise self.make_error(message=UNEXPECTED_MESSAGE, args=(f.__name__,), pos=self.mark())
 
     def _maybe(self, f):
         """
@@ -235,7 +682,8 @@ class RawTextParser(BaseParser):
             return matches
         self.rewind(pos)
         raise self.make_error(
-            message=f"expected at least {minimum} repetitions of a {f.__name__}",
+            message=EXPECTED_REPETITIONS_MESSAGE,
+            args=(minimum, f.__name__),
             pos=self.mark()
         )
 
@@ -263,7 +711,62 @@ class RawTextParser(BaseParser):
         except ParseError:
             return []
 
-    @parsing_rule
+    def _iter_repeat(self, minimum, f):
+        """
+        Repeat a rule multiple times, yielding its results one at a time
+
+        The cursor is never rewound before the end of a result once it is yielded, so the memo entries before it are
+        freed (if the memo supports it, see MemoTable.prune) before yielding it.
+
+        :param minimum:             the minimum number of times the rule must succeed
+        :param f:                   the rule
+        """
+        count = 0
+        while True:
+            last = self.mark()
+            try:
+                result = f()
+            except ParseError:
+                self.rewind(last)
+                break
+            count += 1
+            self.memo.prune(self.mark())
+            yield result
+        if count < minimum:
+            raise self.make_error(
+                message=EXPECTED_REPETITIONS_MESSAGE,
+                args=(minimum, f.__name__),
+                pos=self.mark()
+            )
+
+    def _iter_sep_by(self, f, sep, minimum):
+        """
+        Repeat a rule multiple times, separated by another rule, yielding the results of the former one at a time
+        (see _iter_repeat)
+
+        :param f:                   the rule
+        :param sep:                 the separator rule
+        :param minimum:             the minimum number of times the rule must succeed, 0 or 1
+        """
+        pos = self.mark()
+        try:
+            result = f()
+        except ParseError:
+            self.rewind(pos)
+            if minimum > 0:
+                raise
+            return
+        while True:
+            self.memo.prune(self.mark())
+            yield result
+            last = self.mark()
+            try:
+                sep()
+            except ParseError:
+                self.rewind(last)
+                return
+            result = f()
+
     def expect_string(self, expected: str) -> str:
         """
         Expect an exact string
@@ -271,12 +774,12 @@ class RawTextParser(BaseParser):
         :param expected:            the expected string
         :return:                    the matched string if any, otherwise None
         """
+        self.reader.consume_non_significant()
         s = self.reader.expect_string(expected)
         if s is None:
-            raise self.make_error(message=f"expected '{expected}'", pos=self.mark())
+            raise self.make_error(message=EXPECTED_STRING_MESSAGE, args=(expected,), pos=self.mark())
         return s
 
-    @parsing_rule
     def expect_regex(self, regex: str) -> str:
         """
         Expect a string matching a regular expression
@@ -284,15 +787,352 @@ class RawTextParser(BaseParser):
         :param regex:               the regular expression to match
         :return:                    the matched string if any, otherwise None
         """
-        s = self.reader.expect_regex(regex)
+        self.reader.consume_non_significant()
+        s = self.reader.expect_regex(self.regexes.get(regex, regex))
         if s is None:
-            raise self.make_error(message=f"expected text matching the '{regex}' pattern", pos=self.mark())
+            raise self.make_error(message=EXPECTED_REGEX_MESSAGE, args=(regex,), pos=self.mark())
         return s
 
-    @parsing_rule
+    def expect_literals(self, pattern: str, literals: Tuple[str, ...]) -> Tuple[int, str]:
+        """
+        Expect any of several exact strings, trying them in order
+
+        :param pattern:             the pattern built from the strings by literal_choice_regex, which must be
+                                    compiled in the regexes table
+        :param literals:            the expected strings
+        :return:                    the index of the matched string and the string itself
+        """
+        self.reader.consume_non_significant()
+        choice = self.reader.expect_choice(self.regexes[pattern])
+        if choice is None:
+            expected = _describe_expected_items(literals)
+            raise self.make_error(message=EXPECTED_ONE_OF_MESSAGE, args=(expected,), pos=self.mark())
+        return choice
+
     def expect_eof(self):
         """
         Expect the cursor to have reached the end of the source text
         """
+        self.reader.consume_non_significant()
         if not self.eof():
-            raise self.make_error(message=f"expected end of input", pos=self.mark())
+            raise self.make_error(message=EXPECTED_EOF_MESSAGE, pos=self.mark())
+
+
+class SentinelTextParser(RawTextParser):
+    """
+    Base class for parsers generated without exceptions
+
+    Rules and helpers return FAILURE instead of raising a ParseError, and failing terminals only record what was
+    expected at the farthest position reached: use parse() to obtain a ParseError describing it.
+    """
+
+    def _wrap_node(self, rule_name, values, attributes):
+        try:
+            return super()._wrap_node(rule_name, values, attributes)
+        except ParseError as e:
+            self.record_failure(e.offset if e.offset is not None else self.mark(), e)
+            return FAILURE
+
+    def _inlined_node(self, rule_name, value, attributes=ItemAttributes()):
+        if value is FAILURE:
+            return FAILURE
+        return self._wrap_node(rule_name, [value], [attributes])
+
+    def _not_lookahead(self, f):
+        """
+        Apply a rule without consuming any input, succeeding if the rule fails
+
+        :param f:                   the rule
+        """
+        if self._lookahead(f) is FAILURE:
+            return None
+        return FAILURE
+
+    def _maybe(self, f):
+        """
+        Apply a parsing rule, succeeding even if the rule fails
+
+        :param f:                   the rule
+        """
+        pos = self.mark()
+        result = f()
+        if result is FAILURE:
+            self.rewind(pos)
+            return None
+        return result
+
+    def _repeat(self, minimum, f):
+        """
+        Repeat a rule multiple times
+
+        :param minimum:             the minimum number of times the rule must succeed
+        :param f:                   the rule
+        """
+        pos = self.mark()
+        matches = []
+        while True:
+            last = self.mark()
+            result = f()
+            if result is FAILURE:
+                self.rewind(last)
+                break
+            matches.append(result)
+        if len(matches) >= minimum:
+            return matches
+        self.rewind(pos)
+        return FAILURE
+
+    def _sep_by(self, f, sep):
+        pos = self.mark()
+        result = f()
+        if result is FAILURE:
+            self.rewind(pos)
+            return FAILURE
+        matches = [result]
+        last = self.mark()
+        while True:
+            separator = sep()
+            if separator is FAILURE:
+                self.rewind(last)
+                return matches
+            result = f()
+            if result is FAILURE:
+                self.rewind(pos)
+                return FAILURE
+            matches.append(separator)
+            matches.append(result)
+            last = self.mark()
+
+    def _maybe_sep_by(self, f, sep):
+        result = self._sep_by(f, sep)
+        if result is FAILURE:
+            return []
+        return result
+
+    def _iter_repeat(self, minimum, f):
+        """
+        Repeat a rule multiple times, yielding its results one at a time (see RawTextParser._iter_repeat)
+
+        Since the results already yielded cannot be taken back, failures raise a ParseError describing the farthest
+        failure.
+
+        :param minimum:             the minimum number of times the rule must succeed
+        :param f:                   the rule
+        """
+        count = 0
+        while True:
+            last = self.mark()
+            result = f()
+            if result is FAILURE:
+                self.rewind(last)
+                break
+            count += 1
+            self.memo.prune(self.mark())
+            yield result
+        if count < minimum:
+            raise self.make_farthest_error()
+
+    def _iter_sep_by(self, f, sep, minimum):
+        pos = self.mark()
+        result = f()
+        if result is FAILURE:
+            self.rewind(pos)
+            if minimum > 0:
+                raise self.make_farthest_error()
+            return
+        while True:
+            self.memo.prune(self.mark())
+            yield result
+            last = self.mark()
+            if sep() is FAILURE:
+                self.rewind(last)
+                return
+            result = f()
+            if result is FAILURE:
+                raise self.make_farthest_error()
+
+    def expect_string(self, expected: str) -> str:
+        """
+        Expect an exact string
+
+        :param expected:            the expected string
+        :return:                    the matched string if any, otherwise FAILURE
+        """
+        self.reader.consume_non_significant()
+        s = self.reader.expect_string(expected)
+        if s is None:
+            self.record_failure(self.mark(), expected)
+            return FAILURE
+        return s
+
+    def expect_regex(self, regex: str) -> str:
+        """
+        Expect a string matching a regular expression
+
+        :param regex:               the regular expression to match
+        :return:                    the matched string if any, otherwise FAILURE
+        """
+        self.reader.consume_non_significant()
+        pattern = self.regexes.get(regex)
+        if pattern is None:
+            pattern = compile_regex(regex)
+        s = self.reader.expect_regex(pattern)
+        if s is None:
+            self.record_failure(self.mark(), pattern)
+            return FAILURE
+        return s
+
+    def expect_repetition(self, index: int, minimum: int) -> List[str]:
+        """
+        Expect a terminal repeated multiple times, matching the repetitions using a single pattern when possible
+
+        :param index:               the index of the terminal, as a sequence of one terminal in terminal_sequences
+        :param minimum:             the minimum number of repetitions
+        :return:                    the strings matched by the repetitions if any, otherwise FAILURE
+        """
+        matches = super().expect_repetition(index, minimum)
+        if matches is not FAILURE:
+            # Record the failure of the terminal that stopped the repetition, as _repeat does
+            end = self.mark()
+            (method, argument), = self.terminal_sequences[index]
+            getattr(self, method)(argument)
+            self.rewind(end)
+        return matches
+
+    def expect_literals(self, pattern: str, literals: Tuple[str, ...]) -> Tuple[int, str]:
+        """
+        Expect any of several exact strings, trying them in order
+
+        :param pattern:             the pattern built from the strings by literal_choice_regex, which must be
+                                    compiled in the regexes table
+        :param literals:            the expected strings
+        :return:                    the index of the matched string and the string itself if any, otherwise FAILURE
+        """
+        self.reader.consume_non_significant()
+        choice = self.reader.expect_choice(self.regexes[pattern])
+        if choice is None:
+            self.record_failures(self.mark(), literals)
+            return FAILURE
+        return choice
+
+    def expect_eof(self):
+        """
+        Expect the cursor to have reached the end of the source text
+        """
+        self.reader.consume_non_significant()
+        if not self.eof():
+            self.record_failure(self.mark(), END_OF_INPUT)
+            return FAILURE
+
+
+class MemoPruningMixin:
+    """
+    Mixin for parsers freeing the memo entries that can no longer be used when a cut is reached
+
+    The positions the cursor may still be rewound to, before going forward again, are tracked as choice points: the
+    positions of the rules with several alternatives left to try (see choice_point), of lookaheads and optional items,
+    and of the latest repetition of repeated items. Once a cut commits to an alternative, the cursor can no longer be
+    rewound before the first choice point left, so the entries of the rules applied before it are freed: the size of
+    the memoization table then depends on the longest part of the input that was not committed to, rather than on
+    the length of the input.
+    """
+
+    memo_table_class = PrunableMemoTable
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Positions the cursor may be rewound to, in increasing order
+        self.choice_points = []
+
+    def _commit(self, choice: Optional[int] = None) -> bool:
+        """
+        Commit to the current alternative when a cut is reached, freeing the memo entries that can no longer be used
+
+        :param choice:              the index of the choice point of the rule being applied, if it has one
+        :return:                    True, as the value of the cut
+        """
+        points = self.choice_points
+        if choice is not None:
+            del points[choice:]
+        self.memo.prune(points[0] if points else self.mark())
+        return True
+
+    def _with_choice_point(self, f, *args):
+        points = self.choice_points
+        depth = len(points)
+        points.append(self.mark())
+        try:
+            return f(*args)
+        finally:
+            del points[depth:]
+
+    def _lookahead(self, f):
+        return self._with_choice_point(super()._lookahead, f)
+
+    def _maybe(self, f):
+        return self._with_choice_point(super()._maybe, f)
+
+    def _maybe_sep_by(self, f, sep):
+        return self._with_choice_point(super()._maybe_sep_by, f, sep)
+
+    def _repeat(self, minimum, f):
+        points = self.choice_points
+        depth = len(points)
+        points.append(self.mark())
+
+        @wraps(f)
+        def repetition():
+            # A failing repetition only rewinds the cursor to where it started
+            points[depth] = self.mark()
+            return f()
+
+        try:
+            return super()._repeat(minimum, repetition)
+        finally:
+            del points[depth:]
+
+    def _sep_by(self, f, sep):
+        points = self.choice_points
+        depth = len(points)
+        points.append(self.mark())
+
+        @wraps(sep)
+        def separator():
+            # A failing separator only rewinds the cursor to where it started
+            points[depth] = self.mark()
+            return sep()
+
+        try:
+            return super()._sep_by(f, separator)
+        finally:
+            del points[depth:]
+
+    def _iter_repeat(self, minimum, f):
+        points = self.choice_points
+        depth = len(points)
+        points.append(self.mark())
+
+        @wraps(f)
+        def repetition():
+            points[depth] = self.mark()
+            return f()
+
+        try:
+            yield from super()._iter_repeat(minimum, repetition)
+        finally:
+            del points[depth:]
+
+    def _iter_sep_by(self, f, sep, minimum):
+        points = self.choice_points
+        depth = len(points)
+        points.append(self.mark())
+
+        @wraps(sep)
+        def separator():
+            points[depth] = self.mark()
+            return sep()
+
+        try:
+            yield from super()._iter_sep_by(f, separator, minimum)
+        finally:
+            del points[depth:]
@@ -0,0 +1,274 @@
+from functools import lru_cache
+from typing import List, Type, Union
+
+from .memo import FAILURE, MISSING, BoundedMemoTable, IncrementalMemoTable, WindowedMemoTable
+from .parse import EXPECTED_EOF_MESSAGE, BaseParseError, CutError, ParseError, RawTextParser, SentinelTextParser
+from .reader import TrackingBufferReader, TrackingReader
+
+
+class _NeedInput:
+    def __repr__(self):
+        return "NEED_INPUT"
+
+
+# Value yielded by the iterators of push parsers when they need more text to go on
+NEED_INPUT = _NeedInput()
+
+
+class PushParsingMixin:
+    """
+    Mixin for parsers whose source text is received in chunks (see PushParser)
+
+    The iterators of the rules (see ParserGenerator.iterable_rules) match the elements of their repetition as far as
+    the text received allows, yielding NEED_INPUT when they need more text, and matching the elements that were not
+    yielded yet again once it was received. Since the end of the text received so far may cut an element short, or
+    make it fail, an element is only yielded once the element following it was matched as well, and failing to match
+    an element (or a separator) is only final once the whole text was received. The text of the elements yielded is
+    removed from the source text when more text is needed, so that positions are counted from the end of the last
+    element yielded (see BufferReader.discard).
+
+    As with incremental parsers (see incremental.IncrementalParsingMixin), the memoized results record how far their
+    rules examined the text: when text is received, only the results that examined the end of the text are discarded,
+    so that matching an element again only applies rules again around the end of the text it was cut at, rather than
+    over the whole element. Only the results of memoized rules are reused, so grammars whose elements may be large
+    benefit from memoizing most of their rules (using @set memoize_all). Memoization tables evicting results cannot
+    be edited this way, and forget all their results instead.
+    """
+
+    reader_class = TrackingReader
+    buffer_reader_class = TrackingBufferReader
+    memo_table_class = IncrementalMemoTable
+
+    def __init__(self, text, *args, **kwargs):
+        super().__init__(text, *args, **kwargs)
+        if isinstance(self.memo, IncrementalMemoTable):
+            self.memo.reader = self.reader
+
+    def forget_memo(self):
+        """
+        Forget the results memoized so far, creating a new memoization table of the same kind
+        """
+        memo = self.memo
+        text_length = len(self.reader.text)
+        if isinstance(memo, WindowedMemoTable):
+            self.memo = WindowedMemoTable(self.rule_count, text_length, memo.window)
+        elif isinstance(memo, BoundedMemoTable):
+            self.memo = BoundedMemoTable(self.rule_count, text_length, memo.capacity)
+        else:
+            self.memo = self.memo_table_class(self.rule_count, text_length)
+            self.memo.reader = self.reader
+
+    def extend(self, data: bytes):
+        """
+        Append encoded text to the source text, discarding the results memoized so far that examined the end of the
+        text, and the failures recorded so far since they may be due to the end of the text
+
+        :param data:                the encoded text
+        """
+        length = len(self.reader.text)
+        self.reader.extend(data)
+        if isinstance(self.memo, IncrementalMemoTable):
+            self.memo.edit(length, length, len(data))
+        else:
+            self.forget_memo()
+        self.farthest_failure_pos = 0
+        self.farthest_failure_expected = set()
+
+    def discard(self, length: int):
+        """
+        Remove the start of the source text, once it no longer needs to be matched, moving the results memoized after
+        it and forgetting the failures recorded so far since their positions change
+
+        :param length:              the length of the text removed
+        """
+        self.reader.discard(length)
+        if isinstance(self.memo, IncrementalMemoTable):
+            self.memo.edit(0, length, 0, lookbehind=self.reader.lookbehind)
+        else:
+            self.forget_memo()
+        self.farthest_failure_pos = 0
+        self.farthest_failure_expected = set()
+
+    def _attempt(self, f):
+        """
+        Apply a rule, whether it raises a ParseError or returns FAILURE when it fails
+
+        A CutError is also a failure while more text may be received, since the end of the text may be the reason why
+        the alternative failed after its cut.
+
+        :param f:                   the rule
+        :return:                    the result of the rule or FAILURE, and the error raised by the rule if any
+        """
+        try:
+            return f(), None
+        except ParseError as e:
+            return FAILURE, e
+        except CutError as e:
+            if self.reader.partial:
+                # The memoized rules the error went through did not store their results
+                self.memo.abandon()
+                return FAILURE, e
+            raise
+
+    def _iter_elements(self, f, sep, minimum):
+        yielded = 0
+        # End of the last element yielded, from which the following elements (and separators) are matched
+        resume = self.mark()
+        while True:
+            self.rewind(resume)
+            held = MISSING
+            held_end = resume
+            while True:
+                start = self.mark()
+                separated = False
+                if sep is not None and (yielded > 0 or held is not MISSING):
+                    separator, error = self._attempt(sep)
+                    if separator is FAILURE:
+                        break
+                    separated = True
+                element, error = self._attempt(f)
+                if element is FAILURE:
+                    break
+                if held is not MISSING:
+                    resume = held_end
+                    self.memo.prune(resume)
+                    yielded += 1
+                    yield held
+                held, held_end = element, self.mark()
+            if self.reader.partial:
+                # The elements yielded are not matched again, unlike the items before the repetition while no element
+                # was yielded (see PushParser.feed)
+                if yielded > 0 and resume > 0:
+                    self.discard(resume)
+                    resume = 0
+                yield NEED_INPUT
+                continue
+            if held is not MISSING:
+                self.memo.prune(held_end)
+                yielded += 1
+                yield held
+            # A separator must be followed by an element, and the element must repeat enough times
+            if separated or yielded < minimum:
+                raise error if error is not None else self.make_farthest_error()
+            self.rewind(start)
+            return
+
+    def _iter_repeat(self, minimum, f):
+        return self._iter_elements(f, None, minimum)
+
+    def _iter_sep_by(self, f, sep, minimum):
+        return self._iter_elements(f, sep, minimum)
+
+
+def _complete_utf8_length(data: bytes) -> int:
+    """
+    Compute the length of the longest prefix of UTF-8 encoded text that does not end with a truncated character
+    """
+    for i in range(1, min(4, len(data)) + 1):
+        byte = data[-i]
+        # Skip continuation bytes until the lead byte of the last character
+        if byte & 0xc0 != 0x80:
+            length = 1 if byte < 0x80 else 2 if byte < 0xe0 else 3 if byte < 0xf0 else 4
+            return len(data) - i if length > i else len(data)
+    return len(data)
+
+
+@lru_cache(maxsize=None)
+def _push_parser_class(parser_class: Type[RawTextParser]) -> Type[RawTextParser]:
+    return type(f"Push{parser_class.__name__}", (PushParsingMixin, parser_class), {})
+
+
+class PushParser:
+    """
+    Class parsing a source text received in chunks, such as a request body read from a socket, yielding the elements
+    of a rule as soon as they are known (see PushParsingMixin)
+
+    The parser is created from a parser class generated with the rule as an iterable rule, and the text is encoded in
+    UTF-8: as with BaseParser.from_file, positions are byte offsets. Only the text following the last element
+    returned is kept, so that the text buffered is bounded by the size of an element (and the chunks received after
+    it) rather than by the size of the whole text. Positions within the parser are thus relative to the text kept, but
+    the offsets and locations of the errors raised refer to the whole text.
+    """
+
+    def __init__(self, parser_class: Type[RawTextParser], rule_name: str, *args, **kwargs):
+        """
+        :param parser_class:        the class of the parser, which must have an iter_<rule> method
+        :param rule_name:           the name of the rule whose elements are returned
+        :param args:                the other arguments of the parser
+        :param kwargs:              the other keyword arguments of the parser
+        """
+        self.parser = _push_parser_class(parser_class)(bytearray(), *args, **kwargs)
+        self.parser.reader.partial = True
+        self.iterate = getattr(self.parser, f"iter_{rule_name}")
+        self.elements = self.iterate()
+        self.returned = 0
+        self.closed = False
+        # End of the text received, held back while it is a truncated character
+        self.truncated = b""
+
+    @staticmethod
+    def _located(error: BaseParseError) -> BaseParseError:
+        """
+        Locate an error before the text it occurred in is removed, its offset then referring to the whole text
+        """
+        error.offset = error.location.offset
+        return error
+
+    def _parse(self) -> List:
+        results = []
+        try:
+            for element in self.elements:
+                if element is NEED_INPUT:
+                    break
+                results.append(element)
+        except BaseParseError as e:
+            # The items before the repetition may fail because the text ends too early: match them again next time
+            if not self.parser.reader.partial or self.returned > 0:
+                raise self._located(e)
+            self.parser.memo.abandon()
+            self.parser.rewind(0)
+            self.elements = self.iterate()
+        self.returned += len(results)
+        return results
+
+    def feed(self, data: Union[str, bytes]) -> List:
+        """
+        Parse a chunk of the source text
+
+        :param data:                the chunk, as text or UTF-8 encoded bytes (a character may then be split over two
+                                    chunks)
+        :return:                    the elements that were completely matched thanks to the chunk
+        """
+        if self.closed:
+            raise ValueError("cannot feed a closed parser")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        data = self.truncated + data
+        length = _complete_utf8_length(data)
+        self.truncated = data[length:]
+        self.parser.extend(data[:length])
+        if self.returned == 0:
+            # Until an element was returned, the items before the repetition may also have been cut short
+            self.parser.rewind(0)
+            self.elements = self.iterate()
+        return self._parse()
+
+    def close(self) -> List:
+        """
+        Parse the end of the source text, once all of it was received
+
+        :return:                    the elements that were not returned yet
+        """
+        self.closed = True
+        self.parser.reader.partial = False
+        if isinstance(self.parser, SentinelTextParser):
+            # The failures recorded when the results reused were stored were forgotten since, while the farthest ones
+            # are described when parsing fails: match the text buffered again from scratch
+            self.parser.forget_memo()
+        if self.truncated:
+            self.parser.extend(self.truncated)
+        results = self._parse()
+        self.parser.reader.consume_non_significant()
+        if not self.parser.eof():
+            raise self._located(self.parser.make_error(message=EXPECTED_EOF_MESSAGE, pos=self.parser.mark()))
+        return results
@@ -1,8 +1,143 @@
 import re
-from typing import Optional
+from typing import Dict, Iterable, List, Match, Optional, Pattern, Tuple, Union
 
+from .lookahead import examined_length, pattern_lookahead
 from .source_info import SourceIndex
 
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+REGEX_FLAGS = re.DOTALL | re.MULTILINE
+
+# Number of positions after which Reader.consume_non_significant forgets the positions it cached (parsing mostly moves
+# forward, so the positions cached long ago are rarely needed again)
+SKIP_CACHE_SIZE = 4096
+
+
+def compile_regex(regex: Union[str, bytes]) -> Pattern:
+    """
+    Compile a regex pattern so that it can be matched in place by a Reader
+
+    Patterns are matched at the cursor position rather than against a slice of the text starting at the cursor,
+    so a leading '^' anchor (which would otherwise only match at the start of a line) is dropped: matches are
+    always anchored at the cursor anyway.
+
+    :param regex:               the pattern to compile, as bytes to match bytes (see BufferReader)
+    :return:                    the compiled pattern
+    """
+    if regex.startswith("^" if isinstance(regex, str) else b"^"):
+        regex = regex[1:]
+    return re.compile(regex, flags=REGEX_FLAGS)
+
+
+def literal_regex(literal: str) -> str:
+    """
+    Build a regex pattern matching a literal the way Reader.expect_string does
+
+    Alphanumeric literals are followed by a negative lookahead implementing the full-token rule of
+    Reader.expect_string ('[^\\W_]' matches exactly the characters for which str.isalnum is true).
+
+    :param literal:             the literal
+    :return:                    the pattern
+    """
+    if literal.isalnum():
+        return re.escape(literal) + r"(?![^\W_])"
+    return re.escape(literal)
+
+
+def literal_choice_regex(literals: Iterable[str]) -> str:
+    """
+    Build a regex pattern matching the first of several literals that Reader.expect_string would match
+
+    Each literal is captured by its own group, in order. Since regex alternatives are tried in order, the pattern
+    keeps the ordered choice semantics of trying each literal in turn.
+
+    :param literals:            the literals, in the order they must be tried
+    :return:                    the pattern, to be used with Reader.expect_choice
+    """
+    return "|".join(f"({literal_regex(literal)})" for literal in literals)
+
+
+def embeddable_regex(regex: str) -> Optional[str]:
+    """
+    Prepare a regex pattern to be embedded in a larger pattern, matching what it matches when compiled using
+    compile_regex
+
+    :param regex:               the pattern
+    :return:                    the pattern without its leading '^' anchor, or None if it cannot be embedded because
+                                it uses backreferences (whose group numbers would change) or global inline flags
+    """
+    if regex.startswith("^"):
+        regex = regex[1:]
+    if re.search(r"\\[0-9]|\(\?P=", regex) or re.match(r"\(\?[aiLmsux]+\)", regex):
+        return None
+    return regex
+
+
+def atomic_group(regex: str, name: str) -> str:
+    """
+    Build a regex pattern matching the same text as another one, without backtracking into it once it matched (like
+    an atomic group, which Python only supports since 3.11)
+
+    :param regex:               the pattern
+    :param name:                the name of the group capturing the text matched by the pattern
+    :return:                    the pattern
+    """
+    return f"(?=(?P<{name}>{regex}))(?P={name})"
+
+
+def non_significant_regex(whitespace_regex: Optional[str], comments_regex: Optional[str]) -> Optional[str]:
+    """
+    Build a regex pattern matching the non-significant text consumed by Reader.consume_non_significant
+
+    :param whitespace_regex:    the regex pattern matching whitespace, or None
+    :param comments_regex:      the regex pattern matching comments, or None
+    :return:                    the pattern, or None if one of the patterns cannot be embedded (see embeddable_regex)
+    """
+    parts = []
+    for regex in (comments_regex, whitespace_regex):
+        if regex is not None:
+            regex = embeddable_regex(regex)
+            if regex is None:
+                return None
+            parts.append(f"(?:{regex})?")
+    return f"(?:{''.join(parts)})*" if parts else ""
+
+
+def sequence_regex(items: Iterable[str], skip_regex: str) -> str:
+    """
+    Build a regex pattern matching a sequence of terminals the way a Reader would match them one after the other,
+    consuming non-significant text before each of them
+
+    The text matched by the i-th terminal is captured by the group named '__vi'.
+
+    :param items:               the embeddable patterns of the terminals (see literal_regex and embeddable_regex)
+    :param skip_regex:          the pattern matching non-significant text (see non_significant_regex)
+    :return:                    the pattern
+    """
+    parts = []
+    for i, item in enumerate(items):
+        if skip_regex:
+            parts.append(atomic_group(skip_regex, f"__s{i}"))
+        parts.append(atomic_group(item, f"__v{i}"))
+    return "".join(parts)
+
+
+def repetition_regex(item: str, minimum: int, skip_regex: str) -> str:
+    """
+    Build a regex pattern matching a repeated terminal the way a Reader would match it again and again, consuming
+    non-significant text before each repetition
+
+    :param item:                the embeddable pattern of the terminal, which must not match an empty string
+    :param minimum:             the minimum number of repetitions
+    :param skip_regex:          the pattern matching non-significant text (see non_significant_regex)
+    :return:                    the pattern
+    """
+    return f"(?:{sequence_regex([item], skip_regex)}){{{minimum},}}"
+
 
 class Reader:
     """
@@ -23,6 +158,13 @@ class Reader:
         """
         self.whitespace_regex = whitespace_regex
         self.comments_regex = comments_regex
+        self.whitespace_pattern = compile_regex(whitespace_regex) if whitespace_regex is not None else None
+        self.comments_pattern = compile_regex(comments_regex) if comments_regex is not None else None
+        skip_regex = non_significant_regex(whitespace_regex, comments_regex)
+        # Pattern matching the comments and whitespace at once, unless their patterns cannot be combined
+        self.skip_pattern = compile_regex(skip_regex) if skip_regex else None
+        # Positions reached by consume_non_significant, indexed by the positions it started from
+        self.skip_cache = {}
         self.text = text
         self.cursor = 0
         self.source_index = SourceIndex(self.text, build_lazily=True)
@@ -61,19 +203,79 @@ class Reader:
         self.advance(1)
         return c
 
-    def expect_regex(self, regex):
+    def expect_regex(self, regex: Union[str, Pattern]):
         """
         Match text with a regex pattern and consume it
 
-        :param regex:               the pattern to match with
+        :param regex:               the pattern to match with, preferably compiled using compile_regex
         :return:                    the consumed text
         """
-        result = re.match(regex, self.text[self.cursor:], flags=re.DOTALL | re.MULTILINE)
+        if isinstance(regex, str):
+            regex = compile_regex(regex)
+        result = regex.match(self.text, self.cursor)
         if result is None:
             return None
-        self.advance(result.end(0))
+        self.cursor = result.end(0)
         return result.group(0)
 
+    def expect_choice(self, pattern: Pattern) -> Optional[Tuple[int, str]]:
+        """
+        Match text with a pattern built by literal_choice_regex and consume it
+
+        :param pattern:             the compiled pattern to match with
+        :return:                    the index of the matched literal and the consumed text, or None if no match
+                                    was found
+        """
+        result = pattern.match(self.text, self.cursor)
+        if result is None:
+            return None
+        self.cursor = result.end(0)
+        return result.lastindex - 1, result.group(0)
+
+    def expect_match(self, pattern: Pattern) -> Optional[Match]:
+        """
+        Match text with a compiled regex pattern and consume it
+
+        :param pattern:             the compiled pattern to match with
+        :return:                    the match object, or None if no match was found
+        """
+        result = pattern.match(self.text, self.cursor)
+        if result is None:
+            return None
+        self.cursor = result.end(0)
+        return result
+
+    def expect_groups(self, pattern: Pattern, groups: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+        """
+        Match text with a compiled regex pattern and consume it
+
+        :param pattern:             the compiled pattern to match with
+        :param groups:              the names of the groups to retrieve, at least two
+        :return:                    the text captured by each group, or None if no match was found
+        """
+        result = pattern.match(self.text, self.cursor)
+        if result is None:
+            return None
+        self.cursor = result.end(0)
+        return result.group(*groups)
+
+    def expect_repetitions(self, pattern: Pattern, repetition: Pattern, group: str) -> Optional[List[str]]:
+        """
+        Match text with a compiled regex pattern matching repetitions and consume it
+
+        :param pattern:             the compiled pattern matching all the repetitions
+        :param repetition:          the compiled pattern matching a single repetition
+        :param group:               the name of the group capturing the text of a repetition
+        :return:                    the text captured by the group for each repetition, or None if no match was found
+        """
+        start = self.cursor
+        result = pattern.match(self.text, start)
+        if result is None:
+            return None
+        self.cursor = result.end(0)
+        # Split the repetitions by matching them again one by one (within the text they are known to span)
+        return [match.group(group) for match in repetition.finditer(self.text, start, self.cursor)]
+
     def expect_string(self, literal: str, match_full_token: bool = True):
         """
         Match text with a literal string and consume it
@@ -82,15 +284,15 @@ class Reader:
         :param match_full_token:    whether or not the match must consume a full token
         :return:                    the consumed text
         """
-        pos = self.mark()
-        if self.text[self.cursor:].startswith(literal):
-            self.advance(len(literal))
-            if not match_full_token or self.eof():
+        pos = self.cursor
+        if self.text.startswith(literal, pos):
+            end = pos + len(literal)
+            if not match_full_token or end == len(self.text):
+                self.cursor = end
                 return literal
-            p = self.peek()
-            if not (p.isalnum() and all(map(str.isalnum, literal))):
+            if not (self.text[end].isalnum() and (not literal or literal.isalnum())):
+                self.cursor = end
                 return literal
-        self.rewind(pos)
         return None
 
     def consume_whitespace(self):
@@ -99,8 +301,8 @@ class Reader:
 
         :return:                    the consumed text, or None if no match was found
         """
-        if self.whitespace_regex is not None:
-            return self.expect_regex(self.whitespace_regex)
+        if self.whitespace_pattern is not None:
+            return self.expect_regex(self.whitespace_pattern)
         return None
 
     def consume_comment(self):
@@ -109,20 +311,43 @@ class Reader:
 
         :return:                    the consumed text, or None if no match was found
         """
-        if self.comments_regex is not None:
-            return self.expect_regex(self.comments_regex)
+        if self.comments_pattern is not None:
+            return self.expect_regex(self.comments_pattern)
         return None
 
     def consume_non_significant(self):
         """
         Consume non-significant text, that is comments and whitespace
+
+        Since every rule consumes the non-significant text before it, the same text is often consumed again from the
+        same position: the position reached is cached for each position the reader consumed from.
+        """
+        start = self.cursor
+        end = self.skip_cache.get(start)
+        if end is None:
+            if self.skip_pattern is not None:
+                end = self.skip_pattern.match(self.text, start).end()
+            else:
+                while True:
+                    pos = self.mark()
+                    self.consume_comment()
+                    self.consume_whitespace()
+                    if pos == self.mark():
+                        break
+                end = self.cursor
+            if len(self.skip_cache) >= SKIP_CACHE_SIZE:
+                self.skip_cache.clear()
+            self.skip_cache[start] = end
+        self.cursor = end
+
+    def next_significant_char(self) -> str:
         """
-        while True:
-            pos = self.mark()
-            self.consume_comment()
-            self.consume_whitespace()
-            if pos == self.mark():
-                break
+        Consume non-significant text and retrieve the next character without consuming it
+
+        :return:                    the retrieved character, or an empty string at the end of the source text
+        """
+        self.consume_non_significant()
+        return self.text[self.cursor:self.cursor + 1]
 
     def advance(self, offset: int):
         """
@@ -147,3 +372,423 @@ class Reader:
         :param position:            the position at which to rewind
         """
         self.cursor = position
+
+
+# Patterns matching encoded text, indexed by encoding and by the patterns matching text they were compiled from,
+# shared by all readers so that the patterns of a grammar are only encoded once
+_BYTE_PATTERNS: Dict[str, Dict[Pattern, Pattern]] = {}
+# Bytes for which bytes.isalnum is true
+_ALNUM_BYTES = frozenset(b for b in range(128) if chr(b).isalnum())
+# Anchors depending on the start or the end of the text or of its lines, which the encoded patterns cannot preserve
+_UNENCODABLE_ANCHORS = {
+    sre_constants.AT_BEGINNING,
+    sre_constants.AT_BEGINNING_STRING,
+    sre_constants.AT_END,
+    sre_constants.AT_END_STRING,
+}
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, "POSSESSIVE_REPEAT", None)}
+# Categories matching any byte of an encoded non-ASCII character
+_NEGATED_CATEGORIES = {
+    sre_constants.CATEGORY_NOT_DIGIT,
+    sre_constants.CATEGORY_NOT_SPACE,
+    sre_constants.CATEGORY_NOT_WORD,
+}
+
+
+def _matches_non_ascii_bytes(op, av) -> bool:
+    """
+    Tell whether an item of the syntax tree of an encoded pattern matches a single byte of any non-ASCII character
+    """
+    if op is sre_constants.ANY or op is sre_constants.NOT_LITERAL:
+        return True
+    if op is not sre_constants.IN:
+        return False
+    negated = any(item_op is sre_constants.NEGATE for item_op, _ in av)
+    # Sets of ASCII characters match non-ASCII bytes when they are negated, or hold a negated category (as in
+    # '[^\\W_]', matching ASCII alphanumeric characters only)
+    return negated != any(
+        item_op is sre_constants.CATEGORY and item_av in _NEGATED_CATEGORIES for item_op, item_av in av
+    )
+
+
+def _unencodable_item(items) -> Optional[str]:
+    """
+    Find the first item of the syntax tree of an encoded pattern that does not match the encoded text matched by the
+    original pattern exactly, if any
+
+    :param items:               the items of the syntax tree
+    :return:                    the description of the item, or None if all the items can be encoded
+    """
+    for op, av in items:
+        if op is sre_constants.AT:
+            if av in _UNENCODABLE_ANCHORS:
+                return "anchors"
+            continue
+        elif op is sre_constants.NOT_LITERAL and av > 127:
+            return "sets of non-ASCII characters"
+        elif op is sre_constants.IN and any(
+                (item_op is sre_constants.LITERAL and item_av > 127) or
+                (item_op is sre_constants.RANGE and item_av[1] > 127) for item_op, item_av in av):
+            return "sets of non-ASCII characters"
+        elif _matches_non_ascii_bytes(op, av):
+            return "sets matching any non-ASCII character, unless repeated without bound"
+        elif op in _REPEATS:
+            if len(av[2]) == 1:
+                repeated_op, repeated_av = av[2][0]
+                # Only the last byte of an encoded non-ASCII character is repeated
+                if repeated_op is sre_constants.LITERAL and repeated_av > 127:
+                    return "repeated non-ASCII characters"
+                # Unbounded repetitions can only stop before an ASCII character (or at the end of the text), and so
+                # match whole characters
+                if av[1] is sre_constants.MAXREPEAT and _matches_non_ascii_bytes(repeated_op, repeated_av):
+                    continue
+            sub_patterns = [av[2]]
+        elif op is sre_constants.SUBPATTERN:
+            sub_patterns = [av[-1]]
+        elif op is sre_constants.BRANCH:
+            sub_patterns = av[1]
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            sub_patterns = [av[1]]
+        elif op is sre_constants.GROUPREF_EXISTS:
+            sub_patterns = [sub_pattern for sub_pattern in av[1:] if sub_pattern is not None]
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            sub_patterns = [av]
+        else:
+            continue
+        for sub_pattern in sub_patterns:
+            description = _unencodable_item(sub_pattern)
+            if description is not None:
+                return description
+    return None
+
+
+def encoded_pattern(pattern: Union[str, Pattern], encoding: str = "utf-8") -> Pattern:
+    """
+    Compile (once) the pattern matching the encoded text matched by a pattern (see BufferReader)
+
+    Patterns that cannot be translated exactly are rejected with a ValueError rather than approximated: sets of
+    non-ASCII characters (which would match single bytes of their encodings), sets matching any non-ASCII character
+    such as '.', '[^a]' or '\\W' (which would match a single byte of one) unless they are repeated without bound,
+    repeated non-ASCII characters, and anchors (since the encoded text may be cut or only partially received, see
+    PushParser and parse_split).
+
+    :param pattern:             the pattern, preferably compiled using compile_regex (or already matching bytes)
+    :param encoding:            the encoding of the text
+    :return:                    the compiled pattern
+    """
+    if isinstance(pattern, str):
+        pattern = compile_regex(pattern)
+    if isinstance(pattern.pattern, bytes):
+        return pattern
+    byte_patterns = _BYTE_PATTERNS.setdefault(encoding, {})
+    byte_pattern = byte_patterns.get(pattern)
+    if byte_pattern is None:
+        encoded = pattern.pattern.encode(encoding)
+        flags = pattern.flags & ~re.UNICODE
+        description = _unencodable_item(sre_parse.parse(encoded, flags))
+        if description is not None:
+            raise ValueError(f"cannot match {description} against encoded text: {pattern.pattern!r}")
+        byte_pattern = re.compile(encoded, flags)
+        byte_patterns[pattern] = byte_pattern
+    return byte_pattern
+
+
+class BufferReader(Reader):
+    """
+    Class managing basic operations on encoded source text, such as a memory-mapped file, without decoding it
+
+    The text is a bytes-like object (bytes, a bytearray, a memoryview or a memory map) encoded in UTF-8 (or another
+    encoding compatible with ASCII), and positions are byte offsets. Regex patterns and literals are encoded to be
+    matched against the text, and the text they match is either decoded or returned as bytes. Since patterns then
+    match bytes, character classes such as \\w only match ASCII characters, literals only form full tokens with ASCII
+    alphanumeric characters, and patterns that cannot match whole characters or that use anchors are rejected
+    (see encoded_pattern).
+    """
+
+    def __init__(
+            self,
+            text,
+            *,
+            whitespace_regex: Optional[str] = r"[ \t]+",
+            comments_regex: Optional[str] = None,
+            encoding: str = "utf-8",
+            decode_tokens: bool = True,
+    ):
+        """
+        :param text:                the encoded text to process
+        :param whitespace_regex:    the regex pattern to use to match whitespace, or None for no whitespace support
+        :param comments_regex:      the regex pattern to use to match comments, or None for no comments support
+        :param encoding:            the encoding of the text
+        :param decode_tokens:       whether the matched text is decoded, or returned as bytes (literals then being
+                                    returned encoded as well)
+        """
+        if isinstance(text, memoryview) and text.format != "B":
+            text = text.cast("B")
+        self.encoding = encoding
+        self.decode_tokens = decode_tokens
+        self.byte_patterns = _BYTE_PATTERNS.setdefault(encoding, {})
+        # Encoded literals, indexed by the literals
+        self.byte_literals: Dict[str, bytes] = {}
+        super().__init__(text, whitespace_regex=whitespace_regex, comments_regex=comments_regex)
+        self.source_index = SourceIndex(self.text, build_lazily=True, encoding=encoding)
+        # Whether more text may still be appended to the source text (see extend)
+        self.partial = False
+        if self.skip_pattern is not None:
+            self.skip_pattern = self.byte_pattern(self.skip_pattern)
+
+    def extend(self, data: bytes):
+        """
+        Append encoded text to the source text, which must be a bytearray, as it is received
+
+        :param data:                the encoded text
+        """
+        self.text.extend(data)
+        # More non-significant text may follow the end of the text
+        self.skip_cache.clear()
+
+    def discard(self, length: int):
+        """
+        Remove the start of the source text, which must be a bytearray, once it no longer needs to be matched
+
+        Positions are then counted from the end of the text removed, while the locations computed by the source index
+        still account for it.
+
+        :param length:              the length of the text removed, which must not be after the cursor
+        """
+        self.source_index.discard(length)
+        del self.text[:length]
+        self.cursor -= length
+        self.skip_cache.clear()
+
+    def byte_pattern(self, pattern: Union[str, Pattern]) -> Pattern:
+        """
+        Compile (once) the pattern matching the encoded text matched by a pattern (see encoded_pattern)
+
+        :param pattern:             the pattern, preferably compiled using compile_regex (or already matching bytes)
+        :return:                    the compiled pattern
+        """
+        if isinstance(pattern, str):
+            pattern = compile_regex(pattern)
+        if isinstance(pattern.pattern, bytes):
+            return pattern
+        byte_pattern = self.byte_patterns.get(pattern)
+        if byte_pattern is None:
+            byte_pattern = encoded_pattern(pattern, self.encoding)
+        return byte_pattern
+
+    def token(self, value: bytes) -> Union[str, bytes]:
+        """
+        Convert matched text to a token value
+
+        :param value:               the matched text
+        :return:                    the text decoded if decode_tokens is set, otherwise the text itself
+        """
+        return value.decode(self.encoding) if self.decode_tokens else value
+
+    def _char_at(self, pos: int) -> str:
+        """
+        Decode the character starting at a given position, or return an empty string at the end of the text
+        """
+        if pos >= len(self.text):
+            return ""
+        lead = self.text[pos]
+        if lead < 0x80:
+            return chr(lead)
+        # Lead bytes of multi-byte UTF-8 characters tell how many bytes follow
+        length = 2 if lead < 0xe0 else 3 if lead < 0xf0 else 4
+        return str(self.text[pos:pos + length], self.encoding, "replace")[:1]
+
+    def debug(self, lookahead: int = 10):
+        text = str(self.text[self.cursor:self.cursor + lookahead], self.encoding, "replace")
+        print(f"DEBUG: cursor: {self.cursor}, text: {text!r}")
+
+    def peek(self):
+        return self._char_at(self.cursor)
+
+    def get(self):
+        c = self.peek()
+        self.advance(len(c.encode(self.encoding)))
+        return c
+
+    def expect_regex(self, regex: Union[str, Pattern]):
+        result = self.byte_pattern(regex).match(self.text, self.cursor)
+        if result is None:
+            return None
+        self.cursor = result.end(0)
+        return self.token(result.group(0))
+
+    def expect_choice(self, pattern: Pattern) -> Optional[Tuple[int, str]]:
+        result = self.byte_pattern(pattern).match(self.text, self.cursor)
+        if result is None:
+            return None
+        self.cursor = result.end(0)
+        return result.lastindex - 1, self.token(result.group(0))
+
+    def expect_match(self, pattern: Pattern) -> Optional[Match]:
+        """
+        Match text with a compiled regex pattern and consume it
+
+        :param pattern:             the compiled pattern to match with
+        :return:                    the match object, whose groups are encoded, or None if no match was found
+        """
+        return super().expect_match(self.byte_pattern(pattern))
+
+    def expect_groups(self, pattern: Pattern, groups: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+        values = super().expect_groups(self.byte_pattern(pattern), groups)
+        if values is None or not self.decode_tokens:
+            return values
+        return tuple(value.decode(self.encoding) for value in values)
+
+    def expect_repetitions(self, pattern: Pattern, repetition: Pattern, group: str) -> Optional[List[str]]:
+        values = super().expect_repetitions(self.byte_pattern(pattern), self.byte_pattern(repetition), group)
+        if values is None or not self.decode_tokens:
+            return values
+        return [value.decode(self.encoding) for value in values]
+
+    def expect_string(self, literal: str, match_full_token: bool = True):
+        encoded = self.byte_literals.get(literal)
+        if encoded is None:
+            encoded = self.byte_literals[literal] = literal.encode(self.encoding)
+        pos = self.cursor
+        end = pos + len(encoded)
+        if self.text[pos:end] == encoded:
+            if not (match_full_token and end < len(self.text) and self.text[end] in _ALNUM_BYTES
+                    and (not literal or literal.isalnum())):
+                self.cursor = end
+                return literal if self.decode_tokens else encoded
+        return None
+
+    def next_significant_char(self) -> str:
+        self.consume_non_significant()
+        return self._char_at(self.cursor)
+
+
+class LookaheadTrackingMixin:
+    """
+    Mixin for readers tracking how far they examined the source text, so that the results of the rules can be reused
+    as long as the text they examined is left unchanged (see incremental.IncrementalParsingMixin)
+
+    Each operation records the position after the farthest character whose value (or absence, at the end of the text)
+    may have changed its result: for regex patterns, this is found from the text using the pattern matching the
+    prefixes of their matches (see lookahead.pattern_lookahead).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Position after the farthest character examined (the parser resets it while it applies a memoized rule)
+        self.examined = 0
+        # Number of characters the patterns matched so far may have examined before the cursor
+        self.lookbehind = 0
+
+    def _examine(self, end: int):
+        if end > self.examined:
+            self.examined = end
+
+    def _examine_match(self, pattern: Union[str, Pattern], pos: int, matched: bool):
+        """
+        Record the text examined when matching a pattern from a given position, the cursor being at the end of the
+        match if it matched
+        """
+        if isinstance(pattern, str):
+            pattern = compile_regex(pattern)
+        if isinstance(self, BufferReader):
+            pattern = self.byte_pattern(pattern)
+        lookahead = pattern_lookahead(pattern)
+        if lookahead.lookbehind > self.lookbehind:
+            self.lookbehind = lookahead.lookbehind
+        self._examine(pos + examined_length(lookahead.prefixes, self.text, pos, self.cursor - pos if matched else 0))
+
+    def _examine_char(self, c: str):
+        """
+        Record the text examined when reading the character at the cursor (or the end of the text)
+        """
+        if c < "\x80" or not isinstance(self, BufferReader):
+            self._examine(self.cursor + 1)
+        else:
+            # Up to 4 bytes are read to decode the character
+            self._examine(self.cursor + 4)
+
+    def eof(self) -> bool:
+        self._examine(self.cursor + 1)
+        return super().eof()
+
+    def peek(self):
+        c = super().peek()
+        self._examine_char(c)
+        return c
+
+    def expect_regex(self, regex: Union[str, Pattern]):
+        pos = self.cursor
+        result = super().expect_regex(regex)
+        self._examine_match(regex, pos, result is not None)
+        return result
+
+    def expect_choice(self, pattern: Pattern) -> Optional[Tuple[int, str]]:
+        pos = self.cursor
+        result = super().expect_choice(pattern)
+        self._examine_match(pattern, pos, result is not None)
+        return result
+
+    def expect_match(self, pattern: Pattern) -> Optional[Match]:
+        pos = self.cursor
+        result = super().expect_match(pattern)
+        self._examine_match(pattern, pos, result is not None)
+        return result
+
+    def expect_groups(self, pattern: Pattern, groups: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+        pos = self.cursor
+        result = super().expect_groups(pattern, groups)
+        self._examine_match(pattern, pos, result is not None)
+        return result
+
+    def expect_repetitions(self, pattern: Pattern, repetition: Pattern, group: str) -> Optional[List[str]]:
+        pos = self.cursor
+        result = super().expect_repetitions(pattern, repetition, group)
+        self._examine_match(pattern, pos, result is not None)
+        return result
+
+    def expect_string(self, literal: str, match_full_token: bool = True):
+        pos = self.cursor
+        result = super().expect_string(literal, match_full_token)
+        if result is not None:
+            # The character after the literal is examined to check whether it ends a token
+            self._examine(self.cursor + 1)
+            return result
+        if isinstance(self, BufferReader):
+            literal = literal.encode(self.encoding)
+        end = pos + len(literal)
+        if self.text[pos:end] == literal:
+            # The literal was rejected by the character after it, since it does not end a token
+            end += 1
+        self._examine(end)
+        return result
+
+    def consume_non_significant(self):
+        if self.skip_pattern is None:
+            if self.whitespace_pattern is not None or self.comments_pattern is not None:
+                # Patterns that cannot be combined may examine anything
+                self._examine(len(self.text) + 1)
+            super().consume_non_significant()
+            return
+        # The pattern matching the comments and whitespace at once also tells how far their repeated attempts
+        # examined (the skip cache is bypassed, since it would not)
+        pos = self.cursor
+        self.cursor = self.skip_pattern.match(self.text, pos).end()
+        self._examine_match(self.skip_pattern, pos, True)
+
+    def next_significant_char(self) -> str:
+        c = super().next_significant_char()
+        self._examine_char(c)
+        return c
+
+
+class TrackingReader(LookaheadTrackingMixin, Reader):
+    """
+    Reader tracking how far it examined the source text (see LookaheadTrackingMixin)
+    """
+
+
+class TrackingBufferReader(LookaheadTrackingMixin, BufferReader):
+    """
+    Reader of encoded text tracking how far it examined the source text (see LookaheadTrackingMixin)
+    """
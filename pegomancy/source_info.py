@@ -1,5 +1,6 @@
-from typing import NamedTuple
-from itertools import islice
+import re
+from array import array
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 from bisect import bisect_right
 
 
@@ -29,67 +30,127 @@ class SourceRange(NamedTuple):
         return f"SourceRange(start={self.start!r}, end={self.end!r})"
 
 
-class _LineCache:
+class _LineTable:
     """
-    Class maintaining a cache of the locations for each line inside the source text
+    Class maintaining the offsets at which the lines of the source text start
     """
 
-    def __init__(self, text: str, *, build_lazily=True):
+    def __init__(self, text: str, *, build_lazily=True, encoding: Optional[str] = None):
         self.text = text
-        self.line_offsets = []
-        self.line_ranges = []
-        self.fully_built = False
+        self.encoding = encoding
+        # Searching with a pattern works for every kind of text, including memory views
+        self.newline_pattern = re.compile("\n" if isinstance(text, str) else b"\n")
+        # Offsets of the starts of the lines, as 64-bit integers rather than a list of Python ints
+        self.line_starts = array("q", [0])
+        # Offset up to which the newlines of the text were found
+        self.built_up_to = 0
+        # Offset, number of lines and number of characters of the last line of the start of the text removed from it
+        # (see discard), which locations account for
+        self.base_offset = 0
+        self.base_line = 0
+        self.base_column = 0
         if build_lazily is False:
-            self._build_cache(up_to=len(self.text))
+            self.build(up_to=len(self.text))
 
-    def _build_cache(self, up_to: int):
-        if self.fully_built is True:
+    def build(self, up_to: int):
+        """
+        Find the lines starting up to a given offset, if they were not found yet
+
+        Text appended to the source text (see SourceIndex) only continues its last line, so that the lines found so
+        far remain valid.
+        """
+        up_to = min(up_to, len(self.text))
+        if up_to <= self.built_up_to:
             return
-        if not self.line_ranges:
-            start = SourceLocation(0, line=1, column=1)
-        else:
-            prev_end = self.line_ranges[-1].end
-            start = SourceLocation(prev_end.offset + 1, line=prev_end.line + 1, column=1)
-        for i, c in islice(enumerate(self.text), start.offset, up_to):
-            if c == "\n":
-                end = SourceLocation(i, line=start.line, column=i - start.offset)
-                self.line_offsets.append(start.offset)
-                self.line_ranges.append(SourceRange(start, end))
-                start = SourceLocation(end.offset + 1, line=end.line + 1, column=1)
-        if up_to >= len(self.text):
-            end = SourceLocation(up_to, line=start.line, column=up_to - start.offset)
-            self.line_offsets.append(start.offset)
-            self.line_ranges.append(SourceRange(start, end))
-            self.fully_built = True
+        newlines = self.newline_pattern.finditer(self.text, self.built_up_to, up_to)
+        self.line_starts.extend(match.end() for match in newlines)
+        self.built_up_to = up_to
 
-    def line_range_from_offset(self, offset: int) -> SourceRange:
-        up_to = offset + 1
-        while up_to < len(self.text) and self.text[up_to] != "\n":
-            up_to += 1
-        self._build_cache(up_to=up_to + 1)
-        index = bisect_right(self.line_offsets, offset)
-        if index > 0:
-            index -= 1
-        return self.line_ranges[index]
+    def length(self, start: int, end: int) -> int:
+        """
+        Count the characters between two offsets, decoding the text between them if it is encoded
+
+        Offsets after the end of the text count one character each, so that the lengths of consecutive ranges add up.
+        """
+        if self.encoding is None:
+            return end - start
+        text_length = len(self.text)
+        return len(str(self.text[start:end], self.encoding, "replace")) + max(end - text_length, 0) - \
+            max(start - text_length, 0)
+
+    def line_index(self, offset: int, lo: int = 0) -> int:
+        """
+        Find the index of the line containing an offset, the lines up to it being already found
+
+        :param offset:              the offset
+        :param lo:                  the index of a line starting at or before the offset, to narrow the search
+        :return:                    the index of the line (the newline ending a line being part of it)
+        """
+        return bisect_right(self.line_starts, offset, lo) - 1
+
+    def location(self, offset: int, index: int) -> SourceLocation:
+        """
+        Build the location of an offset, given the index of the line containing it
+        """
+        column = self.length(self.line_starts[index], offset) + 1
+        if index == 0:
+            column += self.base_column
+        return SourceLocation(offset + self.base_offset, line=index + self.base_line + 1, column=column)
+
+    def discard(self, length: int):
+        """
+        Forget the lines before an offset, before the text up to it is removed from the text
+        """
+        self.build(up_to=length)
+        index = self.line_index(length)
+        column = self.length(self.line_starts[index], length)
+        if index == 0:
+            column += self.base_column
+        self.line_starts = array("q", [0]) + array("q", (start - length for start in self.line_starts[index + 1:]))
+        self.built_up_to -= length
+        self.base_offset += length
+        self.base_line += index
+        self.base_column = column
+
+    def line_end(self, offset: int) -> int:
+        """
+        Find the offset of the newline ending the line containing an offset (or the end of the text)
+        """
+        match = self.newline_pattern.search(self.text, offset)
+        return match.start() if match is not None else max(len(self.text), offset)
 
 
 class SourceIndex:
     """
     Class indexing the source text to allow retrieving extended location information
+
+    Lines and columns are numbered from 1, and columns count characters (the newline ending a line being its last
+    column), whichever way a location is computed.
     """
 
-    def __init__(self, text: str, *, build_lazily=True):
+    def __init__(self, text: str, *, build_lazily=True, encoding: Optional[str] = None):
+        """
+        :param text:                the source text
+        :param build_lazily:        whether to only index the lines of the text as locations are needed
+        :param encoding:            the encoding of the text if it is a bytes-like object (such as bytes, a bytearray,
+                                    a memoryview or a memory map) rather than a str, in which case offsets are byte
+                                    offsets but columns still count characters
+        """
         self.text = text
-        self.line_cache = _LineCache(text, build_lazily=build_lazily)
+        self.line_table = _LineTable(text, build_lazily=build_lazily, encoding=encoding)
 
     def line_range_from_offset(self, offset: int) -> SourceRange:
         """
         Retrieve the range associated with the line containing the given offset
 
         :param offset:              the offset
-        :return:                    a SourceRange representing the line
+        :return:                    a SourceRange representing the line, which ends at its newline (excluded)
         """
-        return self.line_cache.line_range_from_offset(offset)
+        table = self.line_table
+        table.build(up_to=offset)
+        index = table.line_index(offset)
+        start = table.line_starts[index]
+        return SourceRange(table.location(start, index), table.location(table.line_end(offset), index))
 
     def line_from_offset(self, offset: int) -> int:
         """
@@ -98,7 +159,8 @@ class SourceIndex:
         :param offset:              the offset
         :return:                    the line number
         """
-        return self.line_range_from_offset(offset).start.line
+        self.line_table.build(up_to=offset)
+        return self.line_table.line_index(offset) + 1
 
     def column_from_position(self, offset: int) -> int:
         """
@@ -107,10 +169,7 @@ class SourceIndex:
         :param offset:              the position
         :return:                    the column number
         """
-        current_offset = offset
-        while current_offset > 0 and (current_offset >= len(self.text) or self.text[current_offset] != "\n"):
-            current_offset -= 1
-        return offset - current_offset
+        return self.location_from_offset(offset).column
 
     def text_in_range(self, source_range: SourceRange) -> str:
         """
@@ -119,7 +178,17 @@ class SourceIndex:
         :param source_range:        the range to use to select text
         :return:                    the text
         """
-        return self.text[source_range.start.offset:source_range.end.offset]
+        base_offset = self.line_table.base_offset
+        return self.text[source_range.start.offset - base_offset:source_range.end.offset - base_offset]
+
+    def discard(self, length: int):
+        """
+        Forget the start of the text, before it is removed from the text: offsets are then counted from the end of
+        the text removed, while locations (and their offsets) still account for it
+
+        :param length:              the length of the text removed
+        """
+        self.line_table.discard(length)
 
     def location_from_offset(self, offset: int) -> SourceLocation:
         """
@@ -128,9 +197,43 @@ class SourceIndex:
         :param offset:              the offset
         :return:                    the extended location information
         """
-        line = self.line_from_offset(offset)
-        column = self.column_from_position(offset)
-        return SourceLocation(offset, line=line, column=column)
+        self.line_table.build(up_to=offset)
+        return self.line_table.location(offset, self.line_table.line_index(offset))
+
+    def locations_from_offsets(self, offsets: Iterable[int]) -> List[SourceLocation]:
+        """
+        Retrieve the extended location information for many offsets at once, such as the offsets of the nodes of an
+        AST, indexing the text once and finding their lines in order
+
+        :param offsets:             the offsets, in any order
+        :return:                    the extended location information of each offset, in the same order
+        """
+        offsets = list(offsets)
+        if not offsets:
+            return []
+        table = self.line_table
+        table.build(up_to=max(offsets))
+        line_starts = table.line_starts
+        locations = [None] * len(offsets)
+        index, next_line_start = 0, line_starts[1] if len(line_starts) > 1 else -1
+        # Last offset located, and number of characters from the start of its line to it
+        previous, length = 0, 0
+        # Offsets are located in increasing order, so that their line is usually the line of the previous offset, from
+        # which characters are counted: encoded text is then decoded once rather than from the start of the line for
+        # each offset
+        for i in sorted(range(len(offsets)), key=offsets.__getitem__):
+            offset = offsets[i]
+            if offset >= next_line_start >= 0:
+                index = bisect_right(line_starts, offset, index) - 1
+                next_line_start = line_starts[index + 1] if index + 1 < len(line_starts) else -1
+                previous, length = line_starts[index], 0
+            length += table.length(previous, offset)
+            previous = offset
+            column = length + 1
+            if index == 0:
+                column += table.base_column
+            locations[i] = SourceLocation(offset + table.base_offset, index + table.base_line + 1, column)
+        return locations
 
     def range_from_offset_range(self, start_offset: int, end_offset: int) -> SourceRange:
         """
@@ -141,3 +244,14 @@ class SourceIndex:
         :return:                    the extended range information
         """
         return SourceRange(self.location_from_offset(start_offset), self.location_from_offset(end_offset))
+
+    def ranges_from_offset_ranges(self, offset_ranges: Iterable[Tuple[int, int]]) -> List[SourceRange]:
+        """
+        Retrieve the extended range information from many ranges of offsets at once (see locations_from_offsets)
+
+        :param offset_ranges:       the pairs of offsets delimiting the start and the end of each range
+        :return:                    the extended range information of each range, in the same order
+        """
+        offsets = [offset for offset_range in offset_ranges for offset in offset_range]
+        locations = self.locations_from_offsets(offsets)
+        return [SourceRange(start, end) for start, end in zip(locations[::2], locations[1::2])]
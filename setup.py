@@ -12,7 +12,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/doom/pegomancy",
-    scripts=["pegomant"],
+    scripts=["pegomant", "pegomant-parse"],
     packages=["pegomancy"],
     install_requires=[],
     classifiers=[
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+GRAMMARS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "grammars")
+
+
+def _read_grammar(file_name: str, memoize_all: bool = False) -> str:
+    with open(os.path.join(GRAMMARS_DIR, file_name)) as f:
+        grammar = f.read()
+    if memoize_all:
+        # Settings follow the verbatim block of the grammar, if any
+        head, verbatim_end, rest = grammar.rpartition("%}\n")
+        grammar = f"{head}{verbatim_end}@set memoize_all\n{rest}"
+    return grammar
+
+
+@pytest.fixture(scope="session")
+def read_grammar():
+    """
+    Function reading the specification of a bundled grammar, given its file name, optionally memoizing all its rules
+    """
+    return _read_grammar
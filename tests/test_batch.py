@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pegomancy.batch import parse_many, parse_split
+from pegomancy.load import load_parser
+from pegomancy.parse import BaseParseError
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+GRAMMAR = r"""
+@set split r"\n(?=\{)"
+@set whitespace r"[ \t\n]+"
+
+string: '"' r'[^"]*' '"'
+integer: r"[0-9]+"
+field: key:string ':' ~ value:(integer | string)
+record: '{' ~ fields:{ field ','...}* '}'
+records: record*
+""".lstrip()
+
+
+def records_text(count: int) -> str:
+    return "".join('{"id": %d, "name": "é%d"}\n' % (i, i) for i in range(count))
+
+
+@pytest.fixture(scope="module")
+def parser_class():
+    return load_parser(GRAMMAR, iterable_rules=["records"])
+
+
+@pytest.mark.parametrize("kind", ["text", "bytes", "path"])
+def test_parse_split_matches_a_serial_parse(parser_class, kind, tmp_path):
+    text = records_text(500)
+    source = {"text": text, "bytes": text.encode("utf-8"), "path": tmp_path / "records.txt"}[kind]
+    if kind == "path":
+        source.write_text(text, encoding="utf-8")
+    serial = list(parser_class(text.encode("utf-8") if kind != "text" else text).iter_records())
+    assert list(parse_split(parser_class, source, "records", workers=2, chunk_size=1000)) == serial
+
+
+@pytest.mark.parametrize("kind", ["text", "bytes", "path"])
+def test_parse_split_locates_errors_in_the_whole_input(parser_class, kind, tmp_path):
+    text = records_text(500).replace('"id": 400,', '"id": 400,,')
+    source = {"text": text, "bytes": text.encode("utf-8"), "path": tmp_path / "records.txt"}[kind]
+    if kind == "path":
+        source.write_text(text, encoding="utf-8")
+    with pytest.raises(BaseParseError) as expected:
+        list(parser_class(text.encode("utf-8") if kind != "text" else text).iter_records())
+    with pytest.raises(BaseParseError) as error:
+        list(parse_split(parser_class, source, "records", workers=2, chunk_size=1000))
+    assert error.value.message == expected.value.message
+    assert error.value.location == expected.value.location
+
+
+def many_documents(tmp_path):
+    """
+    Documents of each kind, two of which cannot be parsed, along with the text of each document (None for a missing
+    file)
+    """
+    texts = ['{"id": %d, "name": "é%d"}' % (i, i) for i in range(6)]
+    texts[4] = '{"id": 4,, "name": "é4"}'
+    documents = [texts[0], texts[1].encode("utf-8")]
+    for i in (2, 3, 4):
+        documents.append(tmp_path / f"record_{i}.txt")
+        documents[-1].write_text(texts[i], encoding="utf-8")
+    documents.append(tmp_path / "missing.txt")
+    texts[5] = None
+    return documents, texts
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_parse_many_reports_each_document(parser_class, ordered, tmp_path):
+    documents, texts = many_documents(tmp_path)
+    results = list(parse_many(parser_class, documents, "record", workers=2, ordered=ordered))
+    if ordered:
+        assert [result.index for result in results] == list(range(len(documents)))
+    results.sort(key=lambda result: result.index)
+    assert [result.index for result in results] == list(range(len(documents)))
+    for result, document, text in zip(results, documents, texts):
+        assert result.path == (os.fspath(document) if isinstance(document, os.PathLike) else None)
+        if text is None:
+            # Failing to read a document does not stop the batch either
+            assert isinstance(result.error, FileNotFoundError)
+            assert result.value is None
+        elif ",," in text:
+            with pytest.raises(BaseParseError) as expected:
+                parser_class(text.encode("utf-8")).parse("record")
+            assert type(result.error) is type(expected.value)
+            assert (result.error.message, result.error.location) == (expected.value.message, expected.value.location)
+            assert result.value is None
+        else:
+            assert result.error is None
+            assert result.value == parser_class(text).parse("record")
+
+
+def test_pegomant_parse_reports_each_file(tmp_path):
+    grammar_file = tmp_path / "records.txt"
+    grammar_file.write_text(GRAMMAR, encoding="utf-8")
+    parser_file = tmp_path / "records_parser.py"
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT_DIR, "pegomant"), str(grammar_file), "-o", str(parser_file)],
+        check=True,
+    )
+    documents, _ = many_documents(tmp_path)
+    # Files given one by one, or found in a directory
+    corpus_dir = tmp_path / "corpus"
+    corpus_dir.mkdir()
+    documents[2].rename(corpus_dir / documents[2].name)
+    paths = [documents[3], documents[4], corpus_dir, documents[5]]
+    process = subprocess.run(
+        [sys.executable, os.path.join(ROOT_DIR, "pegomant-parse"), str(parser_file), *map(str, paths),
+         "--rule", "record", "-j", "2", "--print-results"],
+        capture_output=True,
+        text=True,
+    )
+    assert process.returncode == 1
+    results = process.stdout.splitlines()
+    assert [result.partition(": ")[0] for result in results] == [str(documents[3]), str(corpus_dir / documents[2].name)]
+    errors = process.stderr.splitlines()
+    assert errors[0].startswith(f"{documents[4]}: parse error: ")
+    assert errors[1].startswith(f"{documents[5]}: ") and "No such file" in errors[1]
+    assert errors[2] == "2 files parsed, 2 failed"
@@ -0,0 +1,131 @@
+import time
+from random import Random
+
+import pytest
+
+from pegomancy.incremental import IncrementalParser
+from pegomancy.load import load_parser
+from pegomancy.parse import BaseParseError
+
+PARSER_KWARGS = {"whitespace_regex": r"[ \t\n]+"}
+
+# Grammar whose keyword is rejected when an alphanumeric character follows it, leaving the rest to another rule
+KEYWORD_GRAMMAR = """
+@set memoize_all
+start: kw | ident
+kw: 'if' rest
+rest: r"[+]*"
+ident: r"[a-z0-9]+"
+""".lstrip()
+
+
+@pytest.mark.parametrize("use_exceptions", [True, False])
+@pytest.mark.parametrize("encoded", [False, True])
+@pytest.mark.parametrize("text, edit, edited_text", [
+    ("ifx", (2, 1, "+"), "if+"),
+    ("if+", (2, 1, "x"), "ifx"),
+    ("if", (2, 0, "x"), "ifx"),
+])
+def test_edit_of_the_character_ending_a_keyword(use_exceptions, encoded, text, edit, edited_text):
+    parser_class = load_parser(KEYWORD_GRAMMAR, use_exceptions=use_exceptions)
+    if encoded:
+        text, edited_text = text.encode("utf-8"), edited_text.encode("utf-8")
+    parser = IncrementalParser(parser_class, "start", text)
+    parser.parse()
+    assert parser.edit(*edit) == parser_class(edited_text).parse("start")
+
+
+# Grammar failing after the leading whitespace, which is reused when whitespace is inserted before it
+FAILING_GRAMMAR = """
+@set memoize_all
+start: 'a' 'b'
+""".lstrip()
+
+
+@pytest.mark.parametrize("encoded", [False, True])
+def test_errors_of_moved_failures_are_relocated(encoded):
+    parser_class = load_parser(FAILING_GRAMMAR)
+    text, edited_text = (" ad", "  ad") if not encoded else (b" ad", b"  ad")
+    parser = IncrementalParser(parser_class, "start", text, **PARSER_KWARGS)
+    with pytest.raises(BaseParseError):
+        parser.parse()
+    outcome = parse_outcome(lambda: parser.edit(0, 0, edited_text[:1]))
+    assert outcome == parse_outcome(lambda: parser_class(edited_text, **PARSER_KWARGS).parse("start"))
+
+
+def json_parser_class(read_grammar, use_exceptions: bool):
+    return load_parser(read_grammar("json.txt", memoize_all=True), use_exceptions=use_exceptions, start_rule="json")
+
+
+def nested_json(count: int) -> str:
+    # Lists of at most 16 values, so that parsing again after an edit only goes through a few repetitions
+    items = ['{"id": %d, "name": "item", "tags": ["a", "b"]}' % i for i in range(count)]
+    while len(items) > 1:
+        items = ["[" + ", ".join(items[i:i + 16]) + "]" for i in range(0, len(items), 16)]
+    return items[0]
+
+
+def parse_outcome(parse):
+    try:
+        return parse(), None
+    except BaseParseError as e:
+        return None, (e.message, e.location)
+
+
+@pytest.mark.parametrize("use_exceptions", [True, False])
+@pytest.mark.parametrize("encoded", [False, True])
+def test_random_edits_give_the_results_of_a_new_parse(read_grammar, use_exceptions, encoded):
+    parser_class = json_parser_class(read_grammar, use_exceptions)
+    random = Random(42)
+    snippets = ["", "1", "23", "é", '"', ",", ", 4", "[", "]", "{", "}", " ", "\n", "true", '"a": ', '{"b": [5]}']
+    text = nested_json(40)
+    parser = IncrementalParser(parser_class, "json", text.encode("utf-8") if encoded else text, **PARSER_KWARGS)
+    parser.parse()
+    successes = 0
+    for _ in range(80):
+        if random.random() < 0.5:
+            # Change a number, keeping the text valid
+            offset = random.choice([i for i in range(len(parser.text)) if parser.text[i:i + 1].isdigit()])
+            removed_length, inserted_text = 1, str(random.randrange(100))
+        else:
+            offset = random.randrange(len(parser.text) + 1)
+            removed_length = min(random.choice([0, 0, 1, 1, 2, 5, 30]), len(parser.text) - offset)
+            inserted_text = random.choice(snippets)
+        if encoded:
+            inserted_text = inserted_text.encode("utf-8")
+            # Edit whole characters
+            while parser.text[offset:offset + 1] and parser.text[offset] & 0xc0 == 0x80:
+                offset -= 1
+            while parser.text[offset + removed_length:offset + removed_length + 1] and \
+                    parser.text[offset + removed_length] & 0xc0 == 0x80:
+                removed_length += 1
+        removed_text = parser.text[offset:offset + removed_length]
+        outcome = parse_outcome(lambda: parser.edit(offset, removed_length, inserted_text))
+        assert outcome == parse_outcome(lambda: parser_class(parser.text, **PARSER_KWARGS).parse("json"))
+        if outcome[1] is not None:
+            # Parse the text again after undoing the edit
+            outcome = parse_outcome(lambda: parser.edit(offset, len(inserted_text), removed_text))
+            assert outcome == parse_outcome(lambda: parser_class(parser.text, **PARSER_KWARGS).parse("json"))
+        if outcome[1] is None:
+            successes += 1
+    assert successes > 40
+
+
+def best_edit_time(parser_class, text: str) -> float:
+    parser = IncrementalParser(parser_class, "json", text, **PARSER_KWARGS)
+    parser.parse()
+    times = []
+    for i in range(10):
+        offset = parser.text.index('"id": ', len(parser.text) // 3 + i * 40) + 6
+        start = time.perf_counter()
+        parser.edit(offset, 1, "7")
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_edit_time_does_not_depend_on_the_text_length(read_grammar):
+    parser_class = json_parser_class(read_grammar, True)
+    small = best_edit_time(parser_class, nested_json(256))
+    large = best_edit_time(parser_class, nested_json(256 * 16))
+    # Copying the results of the rules for each edit would make the ratio close to 16
+    assert large / small < 4
@@ -0,0 +1,12 @@
+import sys
+
+import pytest
+
+from pegomancy.load import load_parser
+
+
+@pytest.mark.parametrize("interpret", [False, True])
+def test_loaded_module_runs_the_prelude(read_grammar, interpret):
+    parser_class = load_parser(read_grammar("eval.txt"), start_rule="expr", interpret=interpret)
+    module = sys.modules[parser_class.__module__]
+    assert parser_class("1 + 2 * 3", module.EvalRuleHandler()).parse("expr") == 7
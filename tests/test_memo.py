@@ -0,0 +1,67 @@
+import pytest
+
+from pegomancy.load import load_parser
+from pegomancy.parse import BaseParseError
+
+# Grammar whose left-recursive rule fails at the start of the input, before the parse succeeds with another alternative
+LEFT_RECURSIVE_GRAMMAR = """
+kw: 'while' | 'if'
+ident: !kw r"[a-z]+"
+expr: expr '+' ident | ident
+stmt: expr ';' | 'while' ident
+""".lstrip()
+
+
+@pytest.mark.parametrize("use_exceptions", [True, False])
+@pytest.mark.parametrize("interpret", [False, True])
+@pytest.mark.parametrize("memo_kwargs", [{}, {"memo_window": 4}, {"memo_capacity": 1}])
+def test_left_recursive_rule_with_bounded_memo(use_exceptions, interpret, memo_kwargs):
+    parser_class = load_parser(LEFT_RECURSIVE_GRAMMAR, use_exceptions=use_exceptions, interpret=interpret)
+    assert parser_class("while q", **memo_kwargs).parse("stmt") == ["while", [None, "q"]]
+    expected = parser_class("a + b + c;").parse("stmt")
+    assert parser_class("a + b + c;", **memo_kwargs).parse("stmt") == expected
+    with pytest.raises(BaseParseError):
+        parser_class("while", **memo_kwargs).parse("stmt")
+    with pytest.raises(BaseParseError):
+        parser_class("while", **memo_kwargs).parse("expr")
+
+
+# Grammar memoizing failures as well as results at most positions
+ITEMS_GRAMMAR = """
+@set memoize_all
+items: item*
+item: word ';' | number ';'
+word: r"[a-z]+"
+number: r"[0-9]+"
+""".lstrip()
+
+
+@pytest.mark.parametrize("memo_kwargs", [{"memo_window": 64}, {"memo_capacity": 32}])
+def test_bounded_memo_memory_does_not_depend_on_the_text_length(memo_kwargs):
+    parser_class = load_parser(ITEMS_GRAMMAR)
+    memory_usages = []
+    for size in (500, 4000):
+        text = "".join(f"{'x' * (i % 7 + 1)};{i};" for i in range(size))
+        parser = parser_class(text, **memo_kwargs)
+        assert len(parser.parse("items")) == 2 * size
+        assert parser.memo.evictions > 0
+        memory_usages.append(parser.memo.memory_usage())
+    assert memory_usages[1] <= memory_usages[0] * 1.25
+
+
+# Module of a parser generated before rules had IDs, whose memoized rules are decorated directly
+UNNUMBERED_PARSER_SOURCE = """
+from pegomancy.parse import RawTextParser, left_recursive_parsing_rule, parsing_rule
+
+
+class Parser(RawTextParser):
+    @{decorator}
+    def start(self):
+        return self.expect_string('a')
+"""
+
+
+@pytest.mark.parametrize("decorator", ["parsing_rule", "left_recursive_parsing_rule"])
+def test_parsers_generated_without_rule_ids_must_be_generated_again(decorator):
+    with pytest.raises(TypeError, match="rule start is memoized without a rule ID"):
+        exec(UNNUMBERED_PARSER_SOURCE.format(decorator=decorator), {})
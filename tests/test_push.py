@@ -0,0 +1,128 @@
+import time
+from random import Random
+
+import pytest
+
+from pegomancy.load import load_parser
+from pegomancy.parse import EXPECTED_EOF_MESSAGE, BaseParseError
+from pegomancy.push import PushParser
+
+PARSER_KWARGS = {"whitespace_regex": r"[ \t\n]+"}
+
+CHUNK_SIZE = 64
+
+
+def json_list(count: int) -> bytes:
+    items = ['{"id": %d, "name": "é%d",\n "tags": ["a", "b"]}' % (i, i) for i in range(count)]
+    return ("[\n" + ",\n".join(items) + "\n]").encode("utf-8")
+
+
+def push(parser_class, data: bytes):
+    parser = PushParser(parser_class, "list", **PARSER_KWARGS)
+    values = []
+    buffered = 0
+    for i in range(0, len(data), CHUNK_SIZE):
+        values += parser.feed(data[i:i + CHUNK_SIZE])
+        buffered = max(buffered, len(parser.parser.reader.text))
+    values += parser.close()
+    return values, buffered
+
+
+@pytest.fixture(
+    scope="module",
+    params=[(True, False), (False, False), (True, True), (False, True)],
+    ids=["exceptions", "sentinels", "exceptions-memoize-all", "sentinels-memoize-all"],
+)
+def parser_class(request, read_grammar):
+    use_exceptions, memoize_all = request.param
+    # Memoizing all the rules lets the results that did not examine the end of the text be reused
+    grammar = read_grammar("json.txt", memoize_all=memoize_all)
+    return load_parser(grammar, use_exceptions=use_exceptions, iterable_rules=["list"])
+
+
+def test_push_parser_buffers_a_bounded_amount_of_text(parser_class):
+    data = json_list(300)
+    values, buffered = push(parser_class, data)
+    # The parse result of the list holds the separators between its values
+    assert values == parser_class(data, **PARSER_KWARGS).parse("list")["values"][::2]
+    assert buffered < 4 * CHUNK_SIZE
+
+
+def test_push_parser_errors_refer_to_the_whole_text(parser_class):
+    data = json_list(300)
+    data = data[:-3] + b"}" + data[-3:]
+    with pytest.raises(BaseParseError) as expected:
+        parser_class(data, **PARSER_KWARGS).parse("list")
+    with pytest.raises(BaseParseError) as error:
+        push(parser_class, data)
+    assert error.value.message == expected.value.message
+    assert error.value.offset == expected.value.offset
+    assert error.value.location == expected.value.location
+
+
+def parse_outcome(parse):
+    try:
+        return parse(), None
+    except BaseParseError as e:
+        return None, (e.message, e.location)
+
+
+def parse_whole(parser_class, data: bytes):
+    parser = parser_class(data, **PARSER_KWARGS)
+    values = parser.parse("list")["values"][::2]
+    parser.reader.consume_non_significant()
+    if not parser.eof():
+        raise parser.make_error(message=EXPECTED_EOF_MESSAGE, pos=parser.mark())
+    return values
+
+
+def test_push_parser_gives_the_results_of_a_whole_parse(parser_class):
+    random = Random(42)
+    data = json_list(4)
+    for _ in range(40):
+        # The opening bracket is kept, since the iterator of the rule reports it missing rather than the rule
+        offset = random.randrange(1, len(data))
+        # Edit whole characters
+        while data[offset] & 0xc0 == 0x80:
+            offset -= 1
+        removed_length = random.choice([0, 1, 2])
+        while data[offset + removed_length:offset + removed_length + 1] and \
+                data[offset + removed_length] & 0xc0 == 0x80:
+            removed_length += 1
+        inserted_text = random.choice([b"x", b"1", b"}", b",", b"tru", b'"', b"]", b" 2"])
+        edited = data[:offset] + inserted_text + data[offset + removed_length:]
+        chunk_size = random.choice([3, 7, 16])
+
+        def push_chunks():
+            parser = PushParser(parser_class, "list", **PARSER_KWARGS)
+            values = []
+            for i in range(0, len(edited), chunk_size):
+                values += parser.feed(edited[i:i + chunk_size])
+            return values + parser.close()
+
+        assert parse_outcome(push_chunks) == parse_outcome(lambda: parse_whole(parser_class, edited))
+
+
+def nested_json(count: int) -> bytes:
+    # Lists of at most 16 values, so that matching an element again only goes through a few repetitions
+    items = ['{"id": %d, "name": "item", "tags": ["a", "b"]}' % i for i in range(count)]
+    while len(items) > 1:
+        items = ["[" + ", ".join(items[i:i + 16]) + "]" for i in range(0, len(items), 16)]
+    return items[0].encode("utf-8")
+
+
+def push_time(parser_class, data: bytes) -> float:
+    start = time.perf_counter()
+    push(parser_class, data)
+    return time.perf_counter() - start
+
+
+def test_push_time_of_a_large_element_is_linear(read_grammar):
+    parser_class = load_parser(read_grammar("json.txt", memoize_all=True), iterable_rules=["list"])
+    small = b"[" + nested_json(128) + b"]"
+    large = b"[" + nested_json(128 * 8) + b"]"
+    assert push(parser_class, large)[0] == parser_class(large, **PARSER_KWARGS).parse("list")["values"][::2]
+    small_time = min(push_time(parser_class, small) for _ in range(2))
+    large_time = min(push_time(parser_class, large) for _ in range(2))
+    # Matching the whole element again for each chunk would make the ratio close to 64
+    assert large_time / small_time < 16
@@ -0,0 +1,34 @@
+import pytest
+
+from pegomancy.reader import BufferReader, encoded_pattern
+
+
+@pytest.mark.parametrize("regex", [
+    r"[ é]+", r"[^é]", r"[à-ö]", r"é+", r"aé{2}", r"(?:a|[é])", r"a$", r"\Ab", r"a\Z", r"a|^b",
+    r".", r"[^a]", r"\W", r"[\S]", r"[^\w]", r"\D", r"a.{2}", r"(?:a.)*",
+])
+def test_unencodable_patterns_are_rejected(regex):
+    with pytest.raises(ValueError):
+        encoded_pattern(regex)
+
+
+@pytest.mark.parametrize("regex, text, matched", [
+    (r"[^\"]*", '"', ""),
+    (r"é[a-z]+", "éte", "éte"),
+    (r"(?:é)+", "ééa", "éé"),
+    (r"[a-z]+\b", "abc def", "abc"),
+    (r"[^\W_]", "a", "a"),
+    (r"[^\"]*", "éà\"", "éà"),
+    (r"(.*?)(?=;)", "éà;", "éà"),
+    (r"\W+", "é€ a", "é€ "),
+])
+def test_encodable_patterns_match_the_encoded_text(regex, text, matched):
+    reader = BufferReader(("x" + text).encode("utf-8"))
+    reader.rewind(1)
+    assert reader.expect_regex(regex) == matched
+
+
+@pytest.mark.parametrize("regex", [r".", r"[^a]"])
+def test_single_bytes_of_characters_are_not_matched(regex):
+    with pytest.raises(ValueError):
+        BufferReader("é".encode("utf-8")).expect_regex(regex)
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from pegomancy.load import load_parser
+
+# Number of top-level items of the smaller input, the larger one having SCALE times as many
+SIZE = 500
+SCALE = 4
+# Largest ratio allowed between the parse times of both inputs: linear parsing gives about SCALE, quadratic parsing
+# SCALE ** 2, and the margin absorbs the noise of timing
+MAX_TIME_RATIO = SCALE * 2.5
+
+
+def json_input(size: int) -> str:
+    item = '{"id": %d, "name": "item", "tags": ["a", "b"], "ratio": 0.5, "valid": true, "parent": null}'
+    return "[\n" + ",\n".join(item % i for i in range(size)) + "\n]"
+
+
+def grammar_input(size: int) -> str:
+    return "".join(f"rule_{i}: 'a' rule_{i + 1}? | r\"[0-9]+\" ~ ('b' | 'c')*\n" for i in range(size))
+
+
+def best_time(parser_class, rule: str, text: str, **kwargs) -> float:
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        parser_class(text, **kwargs).parse(rule)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@pytest.mark.parametrize("grammar_file, rule, make_input, kwargs", [
+    ("json.txt", "json", json_input, {"whitespace_regex": r"[ \t\n]+"}),
+    ("grammar.txt", "grammar", grammar_input, {"comments_regex": r"#[^\n]*"}),
+])
+def test_parse_time_is_linear(read_grammar, grammar_file, rule, make_input, kwargs):
+    parser_class = load_parser(read_grammar(grammar_file), start_rule=rule)
+    small = best_time(parser_class, rule, make_input(SIZE), **kwargs)
+    large = best_time(parser_class, rule, make_input(SIZE * SCALE), **kwargs)
+    assert large / small < MAX_TIME_RATIO
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from pegomancy.source_info import SourceIndex
+
+
+def source_index(text: str, encoded: bool) -> SourceIndex:
+    if encoded:
+        return SourceIndex(bytearray(text.encode("utf-8")), encoding="utf-8")
+    return SourceIndex(text)
+
+
+def character_offsets(text: str, encoded: bool):
+    # Offsets of the characters of the text, and of its end
+    offsets = [0]
+    for c in text:
+        offsets.append(offsets[-1] + (len(c.encode("utf-8")) if encoded else 1))
+    return offsets
+
+
+@pytest.mark.parametrize("encoded, discarded", [(False, 0), (True, 0), (True, 5), (True, 9)])
+def test_locations_from_offsets_match_each_location(encoded, discarded):
+    text = "aé\n€b cé\n\nxyzé😀 end"
+    index = source_index(text, encoded)
+    offsets = character_offsets(text, encoded)
+    if discarded:
+        # Text received in chunks is removed once parsed (see BufferReader.discard)
+        index.discard(offsets[discarded])
+        del index.text[:offsets[discarded]]
+        offsets = [offset - offsets[discarded] for offset in offsets[discarded:]]
+    # In any order, with repeated offsets
+    offsets = offsets[::-1] + offsets[::3]
+    assert index.locations_from_offsets(offsets) == [index.location_from_offset(offset) for offset in offsets]
+
+
+def best_locations_time(text: str) -> float:
+    index = source_index(text, True)
+    offsets = character_offsets(text, True)
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        index.locations_from_offsets(offsets)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_locations_of_a_long_encoded_line_take_linear_time():
+    small = best_locations_time("é, " * 2000)
+    large = best_locations_time("é, " * 8000)
+    # Decoding the line from its start for each offset would make the ratio close to 16
+    assert large / small < 8